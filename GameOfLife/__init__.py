@@ -11,11 +11,39 @@ __author__ = '\n'.join(["Erik O'Shaughnessy",
                         'https://github.com/JnyJny/GameOfLife'])
 __version__ = "0.1.3"
 
+import importlib
+
 from .cell import Cell as Cell
-from .world import OptimizedWorld as World
-from .world import OptimizedNumpyWorld as NumpyWorld
+from .cell import CompactCell as CompactCell
 from .patterns import Patterns
+from .rules import Rule
+
+# the engines need numpy, they are imported the first time one of
+# them is used rather than with the package
+_ENGINES = {'World': ('.world', 'OptimizedWorld'),
+            'NumpyWorld': ('.world', 'OptimizedNumpyWorld'),
+            'BitWorld': ('.bitworld', 'BitWorld'),
+            'HashLifeWorld': ('.hashlife', 'HashLifeWorld'),
+            'SparseWorld': ('.sparse', 'SparseWorld'),
+            'ArrayWorld': ('.arrayworld', 'ArrayWorld'),
+            'BatchWorld': ('.batch', 'BatchWorld')}
+
+
+def __getattr__(name):
+    try:
+        module, attr = _ENGINES[name]
+    except KeyError:
+        msg = 'module {!r} has no attribute {!r}'
+        raise AttributeError(msg.format(__name__, name)) from None
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ENGINES))
 
 
-__all__ = ['Cell', 'World', 'Patterns', 'tests',
-           'NumpyWorld']
+__all__ = ['Cell', 'CompactCell', 'World', 'Patterns', 'Rule', 'tests',
+           'NumpyWorld', 'BitWorld', 'HashLifeWorld', 'SparseWorld',
+           'ArrayWorld', 'BatchWorld']
@@ -0,0 +1,275 @@
+'''Conway's Game of Life
+
+A World whose cell state lives in contiguous typed arrays.
+
+'''
+
+import hashlib
+from collections.abc import Sequence
+
+import numpy as np
+
+from .cell import CellView
+from .world import World, lookupTable, ruleClassFor
+from .world import rowRuns, placeRuns, placePatterns, stampRegion
+from .patterns.compiled import placements
+from .rules import Rule
+from .neighbors import neighborTable
+
+_viewClasses = {}
+
+
+def viewClassFor(CellClass):
+    '''
+    :param: CellClass - subclass of Cell
+    :return: subclass of CellClass and CellView
+
+    The view classes are created once per Cell class and shared.
+    '''
+    try:
+        return _viewClasses[CellClass]
+    except KeyError:
+        pass
+    klass = type(CellClass.__name__, (CellView, CellClass), {})
+    _viewClasses[CellClass] = klass
+    return klass
+
+
+class CellViews(Sequence):
+    '''
+    Read-only sequence of the cells of an ArrayWorld. Cell views are
+    created as items are accessed.
+    '''
+
+    def __init__(self, world):
+        self.world = world
+
+    def __len__(self):
+        return self.world.width * self.world.height
+
+    def __getitem__(self, key):
+        return self.world[key]
+
+
+class ArrayWorld(World):
+    '''
+    The game World with a struct-of-arrays cell store.
+
+    >>> w = ArrayWorld(2000, 2000)
+    >>> w[0, 0].alive = True
+    >>> w.step()
+
+    The alive flag, age and live neighbor count of every cell are held
+    in three flat arrays: states, ages and counts. Indexing the world
+    returns a view of a cell, an instance of the world's Cell class
+    whose alive, age and aliveNeighbors attributes read and write the
+    arrays. Views are created on demand, so Cell subclasses keep
+    working while construction and step never create per-cell
+    objects.
+
+    Live neighbors are counted with a gather over the neighbor table
+    shared by all worlds of the same shape and topology. With the
+    'plane' topology cells beyond the edges are always dead.
+
+    The rule is taken from the Cell class, or the rulestring, and ages
+    follow Cell.act.
+    '''
+
+    def __init__(self, width=80, height=23, CellClass=None,
+                 topology='torus', rulestring=None):
+        '''
+        :param: width      - integer
+        :param: height     - integer
+        :param: CellClass  - subclass of Cell
+        :param: topology   - optional string, 'torus' or 'plane'
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+        '''
+        self.topology = topology
+        super(ArrayWorld, self).__init__(width, height, CellClass, rulestring)
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - allocates zeroed state, age and neighbor count arrays
+        - compiles the rule of the Cell class
+        '''
+        self.generation = 0
+        n = self.width * self.height
+        self.states = np.zeros(n, dtype=np.uint8)
+        self.ages = np.zeros(n, dtype=np.int64)
+        self.counts = np.zeros(n, dtype=np.uint8)
+        self.viewClass = viewClassFor(self.cellClass)
+        self.lookup = lookupTable(self.rule)
+        self.table = neighborTable(self.width, self.height, self.topology)
+
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        See World.resize, the overlap of the old and the new board is
+        copied into new state and age arrays.
+        '''
+        width, height = int(width), int(height)
+        rows = min(self.height, height)
+        cols = min(self.width, width)
+        old = (self.states.reshape(self.height, self.width),
+               self.ages.reshape(self.height, self.width))
+
+        self.width, self.height = width, height
+        self.states = np.zeros(width * height, dtype=np.uint8)
+        self.ages = np.zeros(width * height, dtype=np.int64)
+        self.counts = np.zeros(width * height, dtype=np.uint8)
+        self.table = neighborTable(width, height, self.topology)
+
+        new = (self.states.reshape(height, width),
+               self.ages.reshape(height, width))
+        for src, dst in zip(old, new):
+            dst[:rows, :cols] = src[:rows, :cols]
+
+    @World.rule.setter
+    def rule(self, newValue):
+        self.cellClass = ruleClassFor(self.cellClass, Rule.compile(newValue))
+        self.viewClass = viewClassFor(self.cellClass)
+        self.lookup = lookupTable(self.rule)
+
+    @property
+    def cells(self):
+        '''
+        A sequence of views of all cells managed by the world.
+        '''
+        return CellViews(self)
+
+    @property
+    def alive(self):
+        '''
+        A list of views of the cells that are alive.
+        '''
+        return [self.viewClass(self, int(i))
+                for i in np.flatnonzero(self.states)]
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return int(np.count_nonzero(self.states))
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        See World.fingerprint.
+        '''
+        return hashlib.blake2b(self.states.tobytes(), digest_size=16).digest()
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles.
+        '''
+        self.ages[self.ages >= period] += generations
+        self.generation += generations
+
+    def runs(self):
+        '''
+        See World.runs.
+        '''
+        return rowRuns(self.states.reshape(self.height, self.width))
+
+    def _canvas(self):
+        '''
+        See World._canvas, the states array is rendered as it is.
+        '''
+        markers = self.cells[0].markers if len(self) else ' .'
+        return self.states.reshape(self.height, self.width), markers
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: None
+
+        See World.addRuns, the runs are written into the state array.
+        '''
+        placeRuns(self.states.reshape(self.height, self.width), runs, x, y)
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :return: None
+
+        See World.addPatterns, the patterns are placed in the state
+        array with a few scatters and the cells they kill lose their
+        age.
+        '''
+        states = self.states.reshape(self.height, self.width)
+        placePatterns(states, placements(items, (self.width, self.height)))
+        self.ages *= self.states
+
+    def _stamp(self, pattern, x, y):
+        '''
+        See World._stamp, the pattern is written into the state array
+        with one assignment and the cells it kills lose their age.
+        '''
+        shape = (self.height, self.width)
+        region = stampRegion(shape, pattern, x, y)
+        self.states.reshape(shape)[region] = pattern.cells
+        self.ages.reshape(shape)[region] *= pattern.cells
+        return region
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.viewClass(self, i)
+
+    def __getitem__(self, key):
+        '''
+        :key: tuple, integer or slice
+        :return: Cell view or list of Cell views
+
+        See World.__getitem__.
+        '''
+        try:
+            x, y = self._warp(key)
+            return self.viewClass(self, (y * self.width) + x)
+        except TypeError:
+            pass
+
+        n = len(self)
+        if isinstance(key, slice):
+            return [self.viewClass(self, i) for i in range(n)[key]]
+
+        index = int(key)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('cell index out of range')
+        return self.viewClass(self, index)
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation with whole-array
+        operations on the state, age and neighbor count arrays.
+        '''
+        self.generation += 1
+
+        states = self.states
+        if self.topology == 'plane':
+            states = np.append(states, 0)
+        np.add.reduce(states[self.table], axis=1, out=self.counts)
+
+        nextStates = self.lookup[self.states, self.counts]
+        born = nextStates > self.states
+        died = nextStates < self.states
+
+        self.ages += 1
+        self.ages[born] = 1
+        self.ages[died] = 0
+        self.states[...] = nextStates
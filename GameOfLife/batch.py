@@ -0,0 +1,244 @@
+'''Conway's Game of Life
+
+Many independent boards of the same shape stepped together.
+
+'''
+
+import numpy as np
+
+from .world import NumpyWorld, _countNeighbors, _nextAges, lookupTable
+from .world import placeRuns, placePatterns
+from .rules import Rule
+from .patterns import Patterns as BuiltinPatterns, Pattern
+from .patterns.compiled import CompiledPattern, placements, textCells
+
+
+class BatchWorld(object):
+    '''
+    A batch of independent game worlds held in one array.
+
+    >>> b = BatchWorld(1000, 64, 64)
+    >>> b.randomize(0.3, seed=1)
+    >>> for _ in range(100):
+    ...     b.step()
+    >>> b.extinct.sum()
+
+    The boards are stored as a (count, height, width) array of cell
+    ages, with the same layout and wrapping edges as NumpyWorld.cells,
+    and every step advances all of them with one set of array
+    operations. Each board has its own generation counter, so boards
+    that have died out can be left behind while the others continue.
+    '''
+
+    def __init__(self, count, width=64, height=64, rulestring=None):
+        '''
+        :param: count      - integer number of boards
+        :param: width      - integer
+        :param: height     - integer
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+        '''
+        self.count = int(count)
+        self.width = int(width)
+        self.height = int(height)
+        self.rule = Rule.compile(rulestring)
+        self.lookup = lookupTable(self.rule)
+        self.reset()
+
+    @classmethod
+    def fromWorlds(cls, worlds):
+        '''
+        :param: worlds - sequence of NumpyWorlds of the same size
+        :return: BatchWorld holding copies of the worlds' boards
+        '''
+        worlds = list(worlds)
+        batch = cls(len(worlds), worlds[0].width, worlds[0].height,
+                    worlds[0].rule)
+        for n, world in enumerate(worlds):
+            batch.cells[n] = world.cells
+            batch.generation[n] = world.generation
+        return batch
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(count={self.count},',
+             'width={self.width},',
+             'height={self.height})']
+
+        return ''.join(s).format(self=self)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        '''
+        :param: index - integer
+        :return: array of cell ages of one board, a view into the batch
+        '''
+        return self.cells[index]
+
+    def reset(self):
+        '''
+        Resets every board to base state:
+        - sets all generations to zero
+        - kills all cells
+        '''
+        shape = (self.count, self.height, self.width)
+        self.cells = np.zeros(shape, dtype=np.int64)
+        self.generation = np.zeros(self.count, dtype=np.int64)
+
+    @property
+    def population(self):
+        '''
+        Array with the number of live cells on each board.
+        '''
+        return np.count_nonzero(self.cells.reshape(self.count, -1), axis=1)
+
+    @property
+    def extinct(self):
+        '''
+        Boolean array, True for each board without live cells.
+        '''
+        return ~self.cells.reshape(self.count, -1).any(axis=1)
+
+    def randomize(self, density=0.5, seed=None):
+        '''
+        :param: density - optional float, probability that a cell is alive
+        :param: seed    - optional seed for numpy.random.RandomState
+
+        Fills every board with a random soup of newborn cells.
+        '''
+        rs = np.random.RandomState(seed)
+        self.cells[...] = rs.random_sample(self.cells.shape) < density
+
+    def addPattern(self, pattern, x=0, y=0, boards=None, rule=None,
+                   eol='\n'):
+        '''
+        :param: pattern - string, Pattern or CompiledPattern
+        :param: x - optional integer
+        :param: y - optional integer
+        :param: boards - optional index, slice, boolean mask or list of
+                         boards, defaults to all of them
+        :param: rule - optional function with signature 'f(x) returns boolean'
+        :param: eol - optional character that marks the end of a line in
+                      the string
+
+        Places the pattern on the selected boards, see
+        NumpyWorld.addPattern.
+        '''
+        try:
+            pattern = BuiltinPatterns[pattern]
+        except KeyError:
+            pass
+
+        if isinstance(pattern, Pattern):
+            header, runs = pattern.read()
+            self.addRuns(runs, x, y, boards)
+            return
+
+        if boards is None:
+            boards = slice(None)
+        boards = np.atleast_1d(np.arange(self.count)[boards])
+
+        if isinstance(pattern, CompiledPattern):
+            block = pattern.cells
+            covered = np.ones(block.shape, dtype=bool)
+            x += pattern.x
+            y += pattern.y
+        else:
+            block, covered = textCells(pattern, rule, eol)
+
+        ys = (y + np.arange(block.shape[0])) % self.height
+        xs = (x + np.arange(block.shape[1])) % self.width
+        region = np.ix_(boards, ys, xs)
+        self.cells[region] = np.where(covered, block, self.cells[region])
+
+    def addRuns(self, runs, x=0, y=0, boards=None):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :param: boards - optional selection of boards, see addPattern
+
+        Brings the cells covered by the runs, offset by x,y, to life on
+        the selected boards, see NumpyWorld.addRuns.
+        '''
+        self._write(boards, lambda cells: placeRuns(cells, runs, x, y))
+
+    def addPatterns(self, items, boards=None):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :param: boards - optional selection of boards, see addPattern
+
+        Places many patterns at once on the selected boards, with a few
+        array scatters for all of them, see NumpyWorld.addPatterns.
+        '''
+        p = placements(items, (self.width, self.height))
+        self._write(boards, lambda cells: placePatterns(cells, p))
+
+    def _write(self, boards, write):
+        '''
+        :param: boards - selection of boards, see addPattern
+        :param: write  - function with signature 'f(cells)' that
+                         changes an array of boards in place
+
+        Every board is written in place; a selection is copied out,
+        written and copied back.
+        '''
+        if boards is None:
+            write(self.cells)
+            return
+        boards = np.atleast_1d(np.arange(self.count)[boards])
+        cells = self.cells[boards]
+        write(cells)
+        self.cells[boards] = cells
+
+    def step(self, active=None):
+        '''
+        :param: active - optional index, boolean mask or list of the
+                         boards to advance, defaults to the boards that
+                         are not extinct
+        :return: None
+
+        Advances the selected boards one generation and increments
+        their generation counters. The neighbor counts and rule are
+        computed for the whole batch at once.
+        '''
+        if active is None:
+            active = ~self.extinct
+            if self.lookup[0, 0]:
+                # births on zero neighbors revive empty boards
+                active = slice(None)
+
+        counts = _countNeighbors((self.cells > 0).view(np.uint8))
+        nextCells = _nextAges(self.cells, counts, self.lookup)
+
+        self.cells[active] = nextCells[active]
+        self.generation[active] += 1
+
+    def advance(self, generations, active=None):
+        '''
+        :param: generations - integer
+        :param: active      - optional selection of boards, see step
+        :return: None
+
+        Advances the selected boards the given number of generations.
+        '''
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        for _ in range(generations):
+            self.step(active)
+
+    def world(self, index, worldClass=NumpyWorld):
+        '''
+        :param: index - integer
+        :param: worldClass - optional NumpyWorld subclass
+        :return: a world holding a copy of the board and its generation
+        '''
+        world = worldClass(self.width, self.height, rulestring=self.rule)
+        world.cells[...] = self.cells[index]
+        world.generation = int(self.generation[index])
+        return world
@@ -0,0 +1,385 @@
+'''Conway's Game of Life
+
+A bit-packed world that stores 64 cells in each machine word.
+
+'''
+
+import hashlib
+
+import numpy as np
+
+from .world import NumpyWorld, placeRuns, placePatterns, stampRegion
+from .patterns.compiled import Placements, placements
+from .rules import LIFE
+
+_ONE = np.uint64(1)
+_LAST = np.uint64(63)
+
+
+class BitWorld(NumpyWorld):
+    '''
+    The game World stored as rows of packed unsigned 64-bit words.
+
+    Bit i of word j in row y holds the cell at (64 * j + i, y). The
+    next generation is computed with bit-parallel adders on whole
+    words, so the board needs one bit per cell and every array pass
+    touches 64 cells at a time.
+
+    Cells do not carry an age; indexing the world returns 1 for live
+    cells and 0 for dead cells.
+
+    >>> w = BitWorld(16384, 16384)
+    >>> w.addPattern('glider')
+    >>> w.step()
+    '''
+
+    @property
+    def words(self):
+        '''
+        Number of 64-bit words in each row.
+        '''
+        return (self.width + 63) // 64
+
+    @property
+    def bits(self):
+        '''
+        The packed board, an array of uint64 with shape (height, words).
+        '''
+        try:
+            return self._bits
+        except AttributeError:
+            pass
+        self._bits = np.zeros((self.height, self.words), dtype=np.uint64)
+        return self._bits
+
+    @property
+    def cells(self):
+        '''
+        An unpacked copy of the board as an array of zeros and ones
+        with shape (height, width). Changing it does not change the
+        world.
+        '''
+        return self._unpack(self.bits)
+
+    @property
+    def state(self):
+        '''
+        Intermediate buffer to hold cell state information.
+        '''
+        try:
+            return self._state
+        except AttributeError:
+            pass
+        self._state = np.zeros((self.height, self.width), dtype=np.uint8)
+        return self._state
+
+    @property
+    def alive(self):
+        '''
+        Returns a list of (x,y) coordinates of cells that are alive.
+        '''
+        yxs = self.cells.nonzero()
+        return [(x, y) for x, y in zip(yxs[1], yxs[0])]
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return int(np.unpackbits(self.bits.view(np.uint8)).sum())
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        The packed board is hashed as it is.
+        '''
+        return hashlib.blake2b(self.bits.tobytes(), digest_size=16).digest()
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles, cells do not carry an age.
+        '''
+        self.generation += generations
+
+    @property
+    def lastWordMask(self):
+        '''
+        Mask of the bits in the last word of a row that hold cells.
+        '''
+        used = self.width % 64
+        if used == 0:
+            return np.uint64(0xffffffffffffffff)
+        return np.uint64((1 << used) - 1)
+
+    def _warp(self, key):
+        '''
+        '''
+        x, y = map(int, key)
+        return (x % self.width, y % self.height)
+
+    def __getitem__(self, key):
+        '''
+        '''
+        x, y = self._warp(key)
+        return (int(self.bits[y, x >> 6]) >> (x & 63)) & 1
+
+    def __setitem__(self, key, value):
+        '''
+        '''
+        x, y = self._warp(key)
+        word = int(self.bits[y, x >> 6])
+        if value:
+            word |= 1 << (x & 63)
+        else:
+            word &= ~(1 << (x & 63))
+        self.bits[y, x >> 6] = word
+
+    def _pack(self, cells):
+        '''
+        :param: cells - array of shape (height, width)
+        :return: array of uint64 with shape (height, words)
+        '''
+        packed = np.packbits(np.asarray(cells) != 0, axis=-1,
+                             bitorder='little')
+        padded = np.zeros((packed.shape[0], self.words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        return padded.view('<u8').astype(np.uint64)
+
+    def _unpack(self, bits):
+        '''
+        :param: bits - array of uint64 with shape (height, words)
+        :return: array of uint8 with shape (height, width)
+        '''
+        octets = bits.astype('<u8').view(np.uint8)
+        return np.unpackbits(octets, axis=-1,
+                             bitorder='little')[:, :self.width]
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - allocates a board of dead cells
+        '''
+        self.generation = 0
+        self._bits = np.zeros((self.height, self.words), dtype=np.uint64)
+        try:
+            del self._state
+        except AttributeError:
+            pass
+
+    def _snapshotPayload(self, encoding):
+        '''
+        See World._snapshotPayload, the packed board is already in the
+        'bits' encoding.
+        '''
+        if encoding == 'bits':
+            return self.bits
+        return super(BitWorld, self)._snapshotPayload(encoding)
+
+    def restore(self, snap):
+        '''
+        :param: snap - snapshot.Snapshot
+
+        See World.restore. The memory map of a 'bits' snapshot becomes
+        the packed board without being copied; other encodings are
+        packed into a new board.
+        '''
+        if snap.rule:
+            self.rule = snap.rule
+        self.width = snap.width
+        self.height = snap.height
+        self.reset()
+        if snap.encoding == 'bits':
+            self._bits = snap.data
+        else:
+            self._bits = self._pack(snap.alive)
+        self.generation = snap.generation
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        See NumpyWorld.addRuns, only the rows the runs cover are
+        unpacked, written and packed again.
+        '''
+        runs = list(runs)
+        if not runs:
+            return
+        ys = np.array([y + ry for rx, ry, n in runs]) % self.height
+        rows = np.unique(ys)
+        cells = self._unpack(self.bits[rows])
+        index = np.searchsorted(rows, ys).tolist()
+        placeRuns(cells, [(rx, i, n) for (rx, ry, n), i in zip(runs, index)], x)
+        self.bits[rows] = self._pack(cells)
+
+    def addPatterns(self, items):
+        '''
+        See NumpyWorld.addPatterns, only the rows the patterns touch are
+        unpacked, written and packed again.
+        '''
+        p = placements(items, (self.width, self.height))
+        rows = np.unique(p.touched[1] % self.height)
+        if not len(rows):
+            return
+
+        def local(xys):
+            xs, ys = xys
+            return (xs, np.searchsorted(rows, ys % self.height))
+
+        cells = self._unpack(self.bits[rows])
+        placePatterns(cells, Placements(local(p.cleared), local(p.born),
+                                        local(p.toggled)))
+        self.bits[rows] = self._pack(cells)
+
+    def _stamp(self, pattern, x, y):
+        '''
+        See NumpyWorld._stamp, only the rows under the pattern are
+        unpacked and packed again.
+        '''
+        ys = (y + pattern.y + np.arange(pattern.height)) % self.height
+        rows = self._unpack(self.bits[ys])
+        rows[stampRegion(rows.shape, pattern, x, -pattern.y)] = pattern.cells
+        self.bits[ys] = self._pack(rows)
+        return ys
+
+    def _place(self, cells, present, x, y):
+        '''
+        See NumpyWorld._place, only the rows under the cells are
+        unpacked and packed again. The index is always a tuple of
+        arrays (ys, xs).
+        '''
+        ys = (y + np.arange(cells.shape[0])) % self.height
+        rows = self._unpack(self.bits[ys])
+        py, px = np.nonzero(present)
+        xs = (px + x) % self.width
+        rows[py, xs] = cells[present]
+        self.bits[ys] = self._pack(rows)
+        return ys[py], xs
+
+    def _west(self, rows):
+        '''
+        :param: rows - packed rows
+        :return: packed rows where each bit holds its west neighbor
+        '''
+        west = (rows << _ONE) | (np.roll(rows, 1, axis=1) >> _LAST)
+        used = self.width % 64
+        if used:
+            # bit zero of the first word wraps to the last used bit
+            west[:, 0] |= (rows[:, -1] >> np.uint64(used - 1)) & _ONE
+        return west
+
+    def _east(self, rows):
+        '''
+        :param: rows - packed rows
+        :return: packed rows where each bit holds its east neighbor
+        '''
+        east = (rows >> _ONE) | (np.roll(rows, -1, axis=1) << _LAST)
+        used = self.width % 64
+        if used:
+            # the last used bit wraps to bit zero of the first word
+            east[:, -1] |= (rows[:, 0] & _ONE) << np.uint64(used - 1)
+        return east
+
+    def neighborPlanes(self, bits):
+        '''
+        :param: bits - packed board
+        :return: list of eight packed boards, one per neighbor direction
+        '''
+        north = np.roll(bits, 1, axis=0)
+        south = np.roll(bits, -1, axis=0)
+        return [self._west(north), north, self._east(north),
+                self._west(bits), self._east(bits),
+                self._west(south), south, self._east(south)]
+
+    def countPlanes(self, bits):
+        '''
+        :param: bits - packed board
+        :return: tuple of four packed boards holding the binary digits
+                 (ones, twos, fours, eights) of each cell's live
+                 neighbor count
+
+        The neighbor planes are summed with ripple-carry adders that
+        work on 64 cells at a time.
+        '''
+        ones = np.zeros_like(bits)
+        twos = np.zeros_like(bits)
+        fours = np.zeros_like(bits)
+        eights = np.zeros_like(bits)
+
+        for plane in self.neighborPlanes(bits):
+            carry = ones & plane
+            ones ^= plane
+            plane = twos & carry
+            twos ^= carry
+            carry = fours & plane
+            fours ^= plane
+            eights |= carry
+
+        return ones, twos, fours, eights
+
+    def countEquals(self, planes, count):
+        '''
+        :param: planes - tuple of count planes, see countPlanes
+        :param: count  - integer between 0 and 8
+        :return: packed board with the cells whose live neighbor count
+                 is count set
+        '''
+        match = None
+        for n, plane in enumerate(planes):
+            if not count & (1 << n):
+                plane = ~plane
+            match = plane if match is None else match & plane
+        return match
+
+    def nextBits(self, bits):
+        '''
+        :param: bits - packed board
+        :return: packed board of the next generation
+
+        Under Conway's rule a cell is alive in the next generation if
+        it has three live neighbors, or if it is alive and has two live
+        neighbors. Other rules or together one mask per neighbor count
+        in the rule.
+        '''
+        planes = self.countPlanes(bits)
+
+        if self.rule == LIFE:
+            ones, twos, fours, eights = planes
+            nextBits = twos & ~(fours | eights) & (ones | bits)
+        else:
+            born = np.zeros_like(bits)
+            survive = np.zeros_like(bits)
+            for count in self.rule.born:
+                born |= self.countEquals(planes, count)
+            for count in self.rule.survive:
+                survive |= self.countEquals(planes, count)
+            nextBits = (born & ~bits) | (survive & bits)
+
+        nextBits[:, -1] &= self.lastWordMask
+        return nextBits
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation, see nextBits.
+        '''
+        self._bits = self.nextBits(self.bits)
+        self.generation += 1
+
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations,
+        handing the packed board from one generation to the next.
+        '''
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        bits = self.bits
+        for _ in range(generations):
+            bits = self.nextBits(bits)
+        self._bits = bits
+        self.generation += generations
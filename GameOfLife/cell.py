@@ -1,12 +1,14 @@
-import hashlib
+from .rules import LIFE
 
 
 class Cell(object):
     '''
     '''
 
-    born_rule = [3]
-    die_rule = [0, 1, 4, 5, 6, 7, 8]
+    rule = LIFE
+
+    # the world told when the cell is set alive or dead, see alive
+    _owner = None
 
     def __init__(self, x, y, alive=False, markers=' .'):
         '''
@@ -36,8 +38,16 @@ class Cell(object):
 
     @alive.setter
     def alive(self, newValue):
-        self._alive = bool(newValue)
-        if not self._alive:
+        '''
+        A cell owned by a world that keeps track of its live cells,
+        see OptimizedWorld, tells the world before its state changes.
+        '''
+        newValue = bool(newValue)
+        owner = self._owner
+        if owner is not None and newValue != self.alive:
+            owner._changed(self)
+        self._alive = newValue
+        if not newValue:
             self.age = 0
 
     def __str__(self):
@@ -57,22 +67,27 @@ class Cell(object):
 
         return ''.join(s).format(self=self)
 
-    def __hash__(self):
+    @property
+    def index(self):
         '''
-        Returns an integer hash that is invariant for the lifetime of the
-        object.
+        An integer that locates the cell: its offset in the cells of
+        its world, y * width + x. Only a world assigns indices, the
+        index of a cell created outside of a world is None.
+
+        The world numbers its cells again when it is resized, so the
+        index is not an identity: cells hash and compare by identity,
+        and sets and dicts of cells stay valid across a resize. A
+        CellView is a view of a position rather than a cell and hashes
+        by its index instead.
         '''
         try:
-            return self._hash
+            return self._index
         except AttributeError:
-            pass
-        self._hash = int(
-            hashlib.sha1(
-                bytes(
-                    repr(self),
-                    'utf-8')).hexdigest(),
-            16)
-        return self._hash
+            return None
+
+    @index.setter
+    def index(self, newValue):
+        self._index = newValue
 
     @property
     def neighbors(self):
@@ -83,6 +98,10 @@ class Cell(object):
         self._neighbors = []
         return self._neighbors
 
+    @neighbors.setter
+    def neighbors(self, newValue):
+        self._neighbors = list(newValue)
+
     @property
     def neighborLocations(self):
         '''
@@ -113,13 +132,18 @@ class Cell(object):
         This method causes the cell to determine it's new state based
         on how the number of alive neighbors.
 
+        The next state is looked up in the table of the class' rule,
+        a Rule. Set rule on a subclass to play a different game.
         '''
-        if not self.alive and self.aliveNeighbors in self.born_rule:
+        alive = self.alive
+        nextAlive = self.rule.table[alive][self.aliveNeighbors]
+
+        if nextAlive and not alive:
             self.alive = True
             self.age = 1
             return
 
-        if self.alive and self.aliveNeighbors in self.die_rule:
+        if alive and not nextAlive:
             self.alive = False
             self.age = 0
             return
@@ -140,3 +164,172 @@ class Cell(object):
         Return value + self.alive
         '''
         return other + self.alive
+
+
+class CompactCell(object):
+    '''
+    A cell that stores its state in slots rather than an instance
+    dictionary.
+
+    >>> w = World(1000, 1000, CompactCell)
+
+    The neighbors are a tuple, set once by the world, and the markers
+    are shared by the class; set markers on a subclass to change them.
+    think and act read and write the slots directly instead of going
+    through the alive property, so the world's step spends less time
+    in each cell.
+
+    CompactCell behaves like Cell and borrows its methods, but it is
+    not a subclass: any base class with an instance dictionary would
+    give every cell a dictionary again. Subclasses that do not declare
+    __slots__ get one back and may keep any attributes they like.
+    '''
+
+    __slots__ = ('location', 'aliveNeighbors', 'age',
+                 '_alive', '_neighbors', '_index', '_owner')
+
+    rule = LIFE
+    markers = ' .'
+
+    alive = Cell.alive
+    index = Cell.index
+    neighborLocations = Cell.neighborLocations
+    __str__ = Cell.__str__
+    __repr__ = Cell.__repr__
+    __add__ = Cell.__add__
+    __radd__ = Cell.__radd__
+
+    def __init__(self, x, y, alive=False):
+        '''
+        :param: x     - integer
+        :param: y     - integer
+        :param: alive - boolean
+        '''
+        self.location = (x, y)
+        self.aliveNeighbors = 0
+        self.age = 0
+        self._alive = bool(alive)
+        self._neighbors = ()
+        self._owner = None
+
+    @property
+    def neighbors(self):
+        return self._neighbors
+
+    @neighbors.setter
+    def neighbors(self, newValue):
+        self._neighbors = tuple(newValue)
+
+    def think(self):
+        '''
+        :return: None
+
+        See Cell.think, the live neighbors are counted from their
+        slots.
+        '''
+        self.aliveNeighbors = [n._alive for n in self._neighbors].count(True)
+
+    def act(self):
+        '''
+        :return: None
+
+        See Cell.act.
+        '''
+        alive = self._alive
+        nextAlive = self.rule.table[alive][self.aliveNeighbors]
+
+        if nextAlive == alive:
+            self.age += 1
+        elif nextAlive:
+            self._alive = True
+            self.age = 1
+        else:
+            self._alive = False
+            self.age = 0
+
+
+class CellView(object):
+    '''
+    Mixin that turns a Cell class into a view of one cell of an
+    ArrayWorld.
+
+    The alive, age and aliveNeighbors attributes of a view read and
+    write the world's arrays, so views are cheap to create on demand
+    and any number of them may refer to the same cell. Views of the
+    same cell compare equal and hash alike. Any other attribute set
+    on a view only lives as long as the view.
+    '''
+
+    def __init__(self, world, index):
+        '''
+        :param: world - ArrayWorld
+        :param: index - integer, offset of the cell in the world arrays
+
+        The Cell class initializer runs with the cell's x and y
+        coordinates, the state it tries to assign is ignored.
+        '''
+        self._world = world
+        self._index = index
+        self._binding = True
+        try:
+            super(CellView, self).__init__(index % world.width,
+                                           index // world.width)
+        finally:
+            self._binding = False
+
+    @property
+    def alive(self):
+        return bool(self._world.states[self._index])
+
+    @alive.setter
+    def alive(self, newValue):
+        if self._binding:
+            return
+        self._world.states[self._index] = bool(newValue)
+        if not newValue:
+            self._world.ages[self._index] = 0
+
+    @property
+    def age(self):
+        return int(self._world.ages[self._index])
+
+    @age.setter
+    def age(self, newValue):
+        if self._binding:
+            return
+        self._world.ages[self._index] = newValue
+
+    @property
+    def aliveNeighbors(self):
+        return int(self._world.counts[self._index])
+
+    @aliveNeighbors.setter
+    def aliveNeighbors(self, newValue):
+        if self._binding:
+            return
+        self._world.counts[self._index] = newValue
+
+    @property
+    def neighbors(self):
+        '''
+        A list of views of the cell's neighbors.
+        '''
+        world = self._world
+        n = len(world)
+        return [world.viewClass(world, i)
+                for i in world.table[self._index].tolist() if i < n]
+
+    def __hash__(self):
+        '''
+        Views hash to the cell's offset in the world arrays.
+        '''
+        return self._index
+
+    def __eq__(self, other):
+        '''
+        '''
+        try:
+            return (self._world is other._world and
+                    self._index == other._index)
+        except AttributeError:
+            return NotImplemented
@@ -0,0 +1,117 @@
+'''Conway's Game of Life
+
+Detection of boards that have died out, stopped changing or settled
+into an oscillator.
+
+'''
+
+import collections
+
+EXTINCT = 'extinct'
+STILL = 'still'
+PERIODIC = 'period'
+
+# what World.run does once a cycle is found
+ON_CYCLE = ('stop', 'jump', 'continue')
+
+
+class Cycle(object):
+    '''
+    A repeating board found by a CycleDetector.
+
+    kind is one of EXTINCT, STILL or PERIODIC, period is the number
+    of generations between repeats and start is the first generation
+    of the cycle. An extinct board has a period of one.
+    '''
+
+    def __init__(self, kind, period, start):
+        '''
+        :param: kind   - string
+        :param: period - integer
+        :param: start  - integer
+        '''
+        self.kind = kind
+        self.period = period
+        self.start = start
+
+    def __str__(self):
+        '''
+        '''
+        if self.kind == EXTINCT:
+            return 'extinct at generation {}'.format(self.start)
+        if self.kind == STILL:
+            return 'still from generation {}'.format(self.start)
+        return 'period {} starting at generation {}'.format(self.period,
+                                                            self.start)
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(kind={self.kind!r},',
+             'period={self.period!r},',
+             'start={self.start!r})']
+
+        return ''.join(s).format(self=self)
+
+
+class CycleDetector(object):
+    '''
+    Remembers the fingerprints of the most recent boards and reports
+    a Cycle as soon as one repeats.
+
+    >>> detector = CycleDetector()
+    >>> while True:
+    ...     w.step()
+    ...     cycle = detector.observe(w.generation, w.fingerprint(),
+    ...                              w.population)
+    ...     if cycle:
+    ...         break
+
+    The fingerprints are kept in a ring of size entries, so cycles with
+    a period up to size are found. Fingerprints are anything hashable
+    that identifies the live cells of a board, see World.fingerprint.
+    '''
+
+    def __init__(self, size=64):
+        '''
+        :param: size - optional integer, number of fingerprints kept
+        '''
+        self.size = int(size)
+        self.reset()
+
+    def reset(self):
+        '''
+        Forgets every fingerprint.
+        '''
+        self._ring = collections.deque()
+        self._seen = {}
+
+    def observe(self, generation, fingerprint, population=None):
+        '''
+        :param: generation  - integer
+        :param: fingerprint - hashable fingerprint of the board
+        :param: population  - optional integer number of live cells
+        :return: Cycle or None
+
+        Boards must be observed every generation for the periods to be
+        right. Passing a population of zero reports the board extinct
+        straight away; leave it out for rules under which an empty
+        board comes back to life.
+        '''
+        if population == 0:
+            return Cycle(EXTINCT, 1, generation)
+
+        try:
+            start = self._seen[fingerprint]
+        except KeyError:
+            pass
+        else:
+            period = generation - start
+            return Cycle(STILL if period == 1 else PERIODIC, period, start)
+
+        self._seen[fingerprint] = generation
+        self._ring.append(fingerprint)
+        if len(self._ring) > self.size:
+            del self._seen[self._ring.popleft()]
+        return None
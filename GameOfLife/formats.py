@@ -0,0 +1,527 @@
+'''Conway's Game of Life
+
+Readers and writers for the RLE and Macrocell pattern formats.
+
+Patterns are exchanged as runs: tuples (x, y, length) of horizontally
+adjacent live cells. Readers take any iterable of lines, such as an
+open file, and return a Header and an iterable of runs whose
+coordinates are relative to the top left corner of the pattern's
+bounding box. The runs are decoded as they are consumed, so a pattern
+is never held in memory as text. Writers take a Header and runs sorted
+by row and then column.
+
+RLE is described at http://www.conwaylife.com/wiki/Run_Length_Encoded
+and Macrocell at http://www.conwaylife.com/wiki/Macrocell.
+
+'''
+
+import itertools
+import os
+import re
+
+# plaintext, run length encoded and macrocell
+FORMATS = ('life', 'rle', 'mc')
+
+_RLE_HEADER = re.compile(r'^\s*x\s*=\s*\d+')
+_RLE_POSITION = re.compile(r'Pos\s*=\s*(-?\d+)\s*,\s*(-?\d+)')
+_RLE_LINE = 70
+
+
+class Header(object):
+    '''
+    The size, position and rule of a pattern.
+
+    width and height are the size of the bounding box of the pattern
+    and x, y the position of its top left corner. rule is a rulestring
+    or None if the file does not name one.
+    '''
+
+    def __init__(self, width=0, height=0, x=0, y=0, rule=None):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :param: x      - optional integer
+        :param: y      - optional integer
+        :param: rule   - optional rulestring
+        '''
+        self.width = int(width)
+        self.height = int(height)
+        self.x = int(x)
+        self.y = int(y)
+        self.rule = rule
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(width={self.width!r},',
+             'height={self.height!r},',
+             'x={self.x!r},',
+             'y={self.y!r},',
+             'rule={self.rule!r})']
+
+        return ''.join(s).format(self=self)
+
+
+def formatFor(fileobj, format=None, firstLine=None):
+    '''
+    :param: fileobj   - file-like object or path
+    :param: format    - optional string, one of FORMATS
+    :param: firstLine - optional string, the first line of the file
+    :return: string, one of FORMATS
+
+    The format is taken from the format argument, the file name's
+    extension or the first line of the file, in that order, and
+    defaults to plaintext.
+    '''
+    if format is not None:
+        if format not in FORMATS:
+            msg = 'unknown format {!r}, expecting one of {}'
+            raise ValueError(msg.format(format, FORMATS))
+        return format
+
+    name = fileobj if isinstance(fileobj, str) else getattr(fileobj, 'name',
+                                                             '')
+    ext = os.path.splitext(str(name))[1].lower().lstrip('.')
+    if ext in FORMATS:
+        return ext
+
+    if firstLine is not None:
+        if firstLine.startswith('[M2]'):
+            return 'mc'
+        if _RLE_HEADER.match(firstLine) or firstLine.startswith('#'):
+            return 'rle'
+
+    return 'life'
+
+
+def read(lines, format, rule=None):
+    '''
+    :param: lines  - iterable of strings
+    :param: format - string, one of FORMATS
+    :param: rule   - optional function with signature 'f(x) returns boolean'
+                     used to decode plaintext
+    :return: tuple of Header and runs
+    '''
+    if format == 'rle':
+        return readRLE(lines)
+    if format == 'mc':
+        return readMacrocell(lines)
+    return readLife(lines, rule)
+
+
+def readRLE(lines):
+    '''
+    :param: lines - iterable of strings
+    :return: tuple of Header and a generator of runs
+
+    Comment lines before the header are read straight away. The
+    generator decodes the body as it is consumed and stops at the
+    terminating '!'.
+    '''
+    lines = iter(lines)
+    header = Header()
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            position = _RLE_POSITION.search(line)
+            if line.startswith('#CXRLE') and position:
+                header.x, header.y = map(int, position.groups())
+            elif line[:2] in ('#r', '#R'):
+                header.rule = line[2:].strip()
+            continue
+        for field in line.split(','):
+            key, _, value = field.partition('=')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'x':
+                header.width = int(value)
+            elif key == 'y':
+                header.height = int(value)
+            elif key == 'rule':
+                header.rule = value
+        break
+
+    return header, _decodeRLE(lines)
+
+
+def _decodeRLE(lines):
+    '''
+    Generator of the runs of live cells in the body of an RLE file.
+    '''
+    x = y = 0
+    count = ''
+    for line in lines:
+        for c in line:
+            if c.isdigit():
+                count += c
+                continue
+            n = int(count) if count else 1
+            count = ''
+            if c == 'b' or c == '.':
+                x += n
+            elif c == '$':
+                x = 0
+                y += n
+            elif c == '!':
+                return
+            elif c.isalpha():
+                yield (x, y, n)
+                x += n
+
+
+def writeRLE(fileobj, header, runs):
+    '''
+    :param: fileobj - file-like object
+    :param: header  - Header
+    :param: runs    - iterable of runs sorted by row and then column
+    :return: number of characters written
+
+    Lines of the body are kept under 70 characters.
+    '''
+    nbytes = 0
+    if header.x or header.y:
+        nbytes += fileobj.write('#CXRLE Pos={},{}\n'.format(header.x,
+                                                           header.y))
+    line = 'x = {}, y = {}'.format(header.width, header.height)
+    if header.rule:
+        line += ', rule = {}'.format(header.rule)
+    nbytes += fileobj.write(line + '\n')
+
+    def token(n, tag):
+        return (str(n) if n > 1 else '') + tag
+
+    line = ''
+    cx = cy = 0
+    for x, y, n in itertools.chain(runs, [(0, None, 0)]):
+        if y is None:
+            tokens = ['!']
+        else:
+            tokens = []
+            if y > cy:
+                tokens.append(token(y - cy, '$'))
+                cx, cy = 0, y
+            if x > cx:
+                tokens.append(token(x - cx, 'b'))
+            tokens.append(token(n, 'o'))
+            cx = x + n
+        for t in tokens:
+            if len(line) + len(t) > _RLE_LINE:
+                nbytes += fileobj.write(line + '\n')
+                line = ''
+            line += t
+
+    nbytes += fileobj.write(line + '\n')
+    return nbytes
+
+
+class MacrocellTree(object):
+    '''
+    The quadtree of a Macrocell file.
+
+    Iterating over the tree yields the runs of live cells relative to
+    the top left corner of the pattern's bounding box, in quadtree
+    rather than row order. Engines that store a quadtree themselves
+    can build it node by node instead, see build.
+    '''
+
+    def __init__(self, nodes):
+        '''
+        :param: nodes - list of the file's nodes, in file order. Leaves
+                        are tuples of eight row bitmasks, bit x of row y
+                        holding the cell at (x, y). Other nodes are
+                        tuples (level, nw, ne, sw, se) of node numbers
+                        counting from one, zero for an empty quadrant.
+        '''
+        self.nodes = nodes
+        self._bounds = {}
+
+    @property
+    def level(self):
+        '''
+        Level of the root node, the tree is 2**level cells wide.
+        '''
+        if not self.nodes:
+            return 3
+        return self._level(len(self.nodes))
+
+    def _level(self, n):
+        node = self.nodes[n - 1]
+        return 3 if len(node) == 8 else node[0]
+
+    def bounds(self, n=None):
+        '''
+        :param: n - optional node number, defaults to the root
+        :return: tuple (x0, y0, x1, y1), the bounding box of the live
+                 cells of the node relative to its top left corner,
+                 or None if the node is empty
+        '''
+        if n is None:
+            n = len(self.nodes)
+        if n == 0:
+            return None
+        try:
+            return self._bounds[n]
+        except KeyError:
+            pass
+
+        node = self.nodes[n - 1]
+        box = None
+        if len(node) == 8:
+            rows = [y for y, row in enumerate(node) if row]
+            if rows:
+                columns = 0
+                for row in node:
+                    columns |= row
+                box = (((columns & -columns).bit_length() - 1), rows[0],
+                       columns.bit_length(), rows[-1] + 1)
+        else:
+            half = 1 << (node[0] - 1)
+            for child, dx, dy in zip(node[1:], (0, half, 0, half),
+                                     (0, 0, half, half)):
+                b = self.bounds(child)
+                if b is None:
+                    continue
+                b = (b[0] + dx, b[1] + dy, b[2] + dx, b[3] + dy)
+                if box is None:
+                    box = b
+                else:
+                    box = (min(box[0], b[0]), min(box[1], b[1]),
+                           max(box[2], b[2]), max(box[3], b[3]))
+        self._bounds[n] = box
+        return box
+
+    def __iter__(self):
+        box = self.bounds()
+        if box is None:
+            return iter(())
+        return self._runs(len(self.nodes), -box[0], -box[1])
+
+    def _runs(self, n, x, y):
+        '''
+        Generator of the runs of node n placed at x,y.
+        '''
+        if n == 0:
+            return
+        node = self.nodes[n - 1]
+        if len(node) == 8:
+            for dy, row in enumerate(node):
+                dx = 0
+                while row:
+                    skip = (row & -row).bit_length() - 1
+                    row >>= skip
+                    dx += skip
+                    length = (~row & (row + 1)).bit_length() - 1
+                    yield (x + dx, y + dy, length)
+                    row >>= length
+                    dx += length
+            return
+
+        half = 1 << (node[0] - 1)
+        for child, dx, dy in zip(node[1:], (0, half, 0, half),
+                                 (0, 0, half, half)):
+            for run in self._runs(child, x + dx, y + dy):
+                yield run
+
+    def build(self, leaf, join, empty):
+        '''
+        :param: leaf  - function f(rows) returning a level three node
+                        from eight row bitmasks
+        :param: join  - function f(nw, ne, sw, se) returning a node
+        :param: empty - function f(level) returning an empty node
+        :return: the root node, or None for an empty file
+
+        Builds the tree in the caller's own node type, visiting every
+        node of the file once.
+        '''
+        built = []
+        for node in self.nodes:
+            if len(node) == 8:
+                built.append(leaf(node))
+                continue
+            level = node[0]
+            built.append(join(*[built[c - 1] if c else empty(level - 1)
+                                for c in node[1:]]))
+        return built[-1] if built else None
+
+
+def readMacrocell(lines):
+    '''
+    :param: lines - iterable of strings
+    :return: tuple of Header and MacrocellTree
+
+    Node lines refer to earlier nodes, so the whole tree is read
+    before any cells are decoded. The root's centre is at (0,0).
+    '''
+    header = Header()
+    nodes = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('[M2]'):
+            continue
+        if line.startswith('#'):
+            if line[:2] == '#R':
+                header.rule = line[2:].strip()
+            continue
+        if line[0] in '.*$':
+            rows = [0] * 8
+            x = y = 0
+            for c in line:
+                if c == '$':
+                    x = 0
+                    y += 1
+                    continue
+                if c == '*':
+                    rows[y] |= 1 << x
+                x += 1
+            nodes.append(tuple(rows))
+        else:
+            nodes.append(tuple(int(v) for v in line.split()[:5]))
+
+    tree = MacrocellTree(nodes)
+    box = tree.bounds()
+    if box is not None:
+        half = 1 << (tree.level - 1)
+        header.x = box[0] - half
+        header.y = box[1] - half
+        header.width = box[2] - box[0]
+        header.height = box[3] - box[1]
+    return header, tree
+
+
+class MacrocellWriter(object):
+    '''
+    Writes a Macrocell file node by node.
+
+    >>> writer = MacrocellWriter(f, rule='B3/S23')
+    >>> a = writer.leaf(rows)
+    >>> root = writer.node(4, a, 0, 0, a)
+
+    Identical nodes are written once; leaf and node return the number
+    that refers to the node, zero for an empty one. The last node
+    written is the root of the pattern.
+    '''
+
+    def __init__(self, fileobj, rule=None):
+        '''
+        :param: fileobj - file-like object
+        :param: rule    - optional rulestring
+        '''
+        self.fileobj = fileobj
+        self.count = 0
+        self.nbytes = fileobj.write('[M2] (GameOfLife)\n')
+        if rule:
+            self.nbytes += fileobj.write('#R {}\n'.format(rule))
+        self._numbers = {}
+
+    def _write(self, key, line):
+        try:
+            return self._numbers[key]
+        except KeyError:
+            pass
+        self.nbytes += self.fileobj.write(line + '\n')
+        self.count += 1
+        self._numbers[key] = self.count
+        return self.count
+
+    def leaf(self, rows):
+        '''
+        :param: rows - sequence of eight row bitmasks
+        :return: integer node number
+        '''
+        rows = tuple(rows)
+        if not any(rows):
+            return 0
+        last = max(y for y, row in enumerate(rows) if row)
+        line = ''.join(''.join('*' if row >> x & 1 else '.'
+                               for x in range(row.bit_length())) + '$'
+                       for row in rows[:last + 1])
+        return self._write(rows, line)
+
+    def node(self, level, nw, ne, sw, se):
+        '''
+        :param: level - integer, four or more
+        :param: nw, ne, sw, se - integer node numbers of the quadrants
+        :return: integer node number
+        '''
+        if not (nw or ne or sw or se):
+            return 0
+        key = (level, nw, ne, sw, se)
+        return self._write(key, '{} {} {} {} {}'.format(*key))
+
+
+def writeMacrocell(fileobj, header, runs):
+    '''
+    :param: fileobj - file-like object
+    :param: header  - Header
+    :param: runs    - iterable of runs
+    :return: number of characters written
+
+    The runs are placed at header.x, header.y in a tree centred on
+    (0,0) just large enough to hold them.
+    '''
+    blocks = {}
+    x0 = y0 = x1 = y1 = 0
+    for x, y, n in runs:
+        x += header.x
+        y += header.y
+        x0, y0 = min(x0, x), min(y0, y)
+        x1, y1 = max(x1, x + n), max(y1, y + 1)
+        for cx in range(x, x + n):
+            rows = blocks.setdefault((cx >> 3, y >> 3), [0] * 8)
+            rows[y & 7] |= 1 << (cx & 7)
+
+    # leaves are aligned to the root's corner from level four up
+    level = 4
+    while (-(1 << (level - 1)) > min(x0, y0) or
+           (1 << (level - 1)) < max(x1, y1)):
+        level += 1
+
+    writer = MacrocellWriter(fileobj, header.rule)
+
+    # block coordinates relative to the root's top left corner
+    shift = 1 << (level - 4)
+    nodes = dict(((bx + shift, by + shift), writer.leaf(rows))
+                 for (bx, by), rows in sorted(blocks.items(),
+                                              key=lambda i: i[0][::-1]))
+
+    for k in range(4, level + 1):
+        parents = {}
+        for (bx, by) in nodes:
+            parents.setdefault((bx >> 1, by >> 1), None)
+        nodes = dict(((px, py),
+                      writer.node(k,
+                                  nodes.get((2 * px, 2 * py), 0),
+                                  nodes.get((2 * px + 1, 2 * py), 0),
+                                  nodes.get((2 * px, 2 * py + 1), 0),
+                                  nodes.get((2 * px + 1, 2 * py + 1), 0)))
+                     for px, py in sorted(parents, key=lambda p: p[::-1]))
+
+    return writer.nbytes
+
+
+def readLife(lines, rule=None):
+    '''
+    :param: lines - iterable of strings
+    :param: rule  - optional function with signature 'f(x) returns boolean'
+    :return: tuple of Header and a list of runs
+
+    Decodes the plaintext format used by the bundled patterns.
+    '''
+    if rule is None:
+        rule = lambda c: not c.isspace()
+
+    runs = []
+    width = height = 0
+    for y, line in enumerate(lines):
+        line = line.rstrip('\r\n')
+        width = max(width, len(line))
+        height = y + 1
+        for alive, group in itertools.groupby(enumerate(line),
+                                              lambda i: bool(rule(i[1]))):
+            group = list(group)
+            if alive:
+                runs.append((group[0][0], y, len(group)))
+    return Header(width, height), runs
@@ -0,0 +1,737 @@
+'''Conway's Game of Life
+
+A quadtree world that uses Gosper's HashLife algorithm to jump
+exponentially far ahead.
+
+See: https://en.wikipedia.org/wiki/Hashlife
+
+'''
+
+import numpy as np
+
+from .world import World, NumpyWorld, pointRuns, placeRuns, coverBox
+from . import snapshot
+from .rules import Rule
+from .formats import Header, MacrocellWriter
+from .patterns.compiled import placements
+
+
+class Node(object):
+    '''
+    A square quadtree node covering 2**level by 2**level cells.
+
+    Level zero nodes are single cells whose population is zero or
+    one. Every other node has four children one level smaller. Nodes
+    are immutable and canonical within a HashLifeWorld, so two nodes
+    with the same content are the same object and identity can be
+    used for hashing and comparison.
+    '''
+
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population')
+
+    def __init__(self, level, nw=None, ne=None, sw=None, se=None,
+                 population=0):
+        '''
+        :param: level      - integer
+        :param: nw         - Node, north west quadrant
+        :param: ne         - Node, north east quadrant
+        :param: sw         - Node, south west quadrant
+        :param: se         - Node, south east quadrant
+        :param: population - integer number of live cells
+        '''
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(level={self.level!r},',
+             'population={self.population!r})']
+
+        return ''.join(s).format(self=self)
+
+
+class _CacheFull(Exception):
+    '''
+    Raised inside a jump when the node table or the result cache
+    reaches maxNodes.
+    '''
+    pass
+
+
+class HashLifeWorld(NumpyWorld):
+    '''
+    An unbounded game World stored as a canonical quadtree.
+
+    >>> w = HashLifeWorld()
+    >>> w.addPattern('gosper-glider-gun')
+    >>> w.advance(10 ** 9)
+    >>> w.population
+
+    Identical quadtree nodes are shared through a node table and the
+    future of each node is memoized in a result cache, so highly
+    regular patterns can be advanced billions of generations.
+
+    Both tables are bounded by maxNodes. Nodes are immutable, so a
+    jump that fills either table is simply abandoned: the tables are
+    garbage collected down to the nodes reachable from the current
+    universe (see collect) and the jump is retried as two jumps of
+    half the size. Smaller jumps need fewer nodes, so memory stays
+    bounded at the price of speed.
+
+    The width and height describe the viewport, anchored at (0,0),
+    that is rendered by __str__ and returned by cells. The universe
+    itself has no edges.
+    '''
+
+    def __init__(self, width=80, height=23, maxNodes=1 << 20,
+                 rulestring=None):
+        '''
+        :param: width      - integer, viewport width
+        :param: height     - integer, viewport height
+        :param: maxNodes   - integer, upper bound on the number of entries
+                             kept in each of the node and result tables.
+                             Each entry costs roughly 200 bytes.
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+
+        Will raise a ValueError for rules with births on zero
+        neighbors, which would fill the unbounded universe.
+        '''
+        super(HashLifeWorld, self).__init__(width, height, rulestring)
+        self.maxNodes = int(maxNodes)
+        self.collections = 0
+        self.reset()
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(width={self.width},',
+             'height={self.height},',
+             'maxNodes={self.maxNodes})']
+
+        return ''.join(s).format(self=self)
+
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        See World.resize, the universe is unbounded so only the
+        viewport changes.
+        '''
+        self.width, self.height = int(width), int(height)
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - empties the node table and the result cache
+        - creates an empty universe
+        '''
+        self.generation = 0
+        self._jumping = False
+        self._limit = None
+        self._nodes = {}
+        self._results = {}
+        self._empties = [Node(0)]
+        self.live = Node(0, population=1)
+        self.root = self.empty(3)
+        self.originX = 0
+        self.originY = 0
+
+    @NumpyWorld.rule.setter
+    def rule(self, newValue):
+        rule = Rule.compile(newValue)
+        if 0 in rule.born:
+            msg = '{} cannot play {}, it gives birth on zero neighbors'
+            raise ValueError(msg.format(self.__class__.__name__, rule))
+        NumpyWorld.rule.fset(self, rule)
+        # results computed under the old rule are void
+        self._results = {}
+
+    @property
+    def population(self):
+        '''
+        Number of live cells in the universe.
+        '''
+        return self.root.population
+
+    def fingerprint(self):
+        '''
+        :return: Node that identifies the live cells of the universe
+
+        Every root shares the same centre, so the smallest centred node
+        that holds all live cells is the same node whenever the same
+        cells are alive. The fingerprint is only good until the next
+        collect.
+        '''
+        node = self.root
+        while node.level > 3:
+            centre = self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+            if centre.population != node.population:
+                break
+            node = centre
+        return node
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles, cells do not carry an age.
+        '''
+        self.generation += generations
+
+    def empty(self, level):
+        '''
+        :param: level - integer
+        :return: Node with no live cells
+        '''
+        while len(self._empties) <= level:
+            e = self._empties[-1]
+            self._empties.append(self.join(e, e, e, e))
+        return self._empties[level]
+
+    def join(self, nw, ne, sw, se):
+        '''
+        :param: nw - Node
+        :param: ne - Node
+        :param: sw - Node
+        :param: se - Node
+        :return: canonical Node with the given quadrants
+        '''
+        key = (nw, ne, sw, se)
+        try:
+            return self._nodes[key]
+        except KeyError:
+            pass
+
+        if self._jumping and len(self._nodes) >= self.maxNodes:
+            raise _CacheFull()
+
+        node = Node(nw.level + 1, nw, ne, sw, se,
+                    nw.population + ne.population +
+                    sw.population + se.population)
+        self._nodes[key] = node
+        return node
+
+    def collect(self):
+        '''
+        :return: None
+
+        Rebuilds the node table from the nodes reachable from the
+        current root and keeps only the results that refer to them.
+        '''
+        self.collections += 1
+
+        nodes = {}
+        for e in self._empties[1:]:
+            nodes[(e.nw, e.ne, e.sw, e.se)] = e
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in nodes:
+                continue
+            nodes[key] = node
+            stack.extend(key)
+
+        kept = set(nodes.values())
+        kept.update(self._empties[:2])
+        self._results = {key: result
+                         for key, result in self._results.items()
+                         if key[0] in kept and result in kept}
+        self._nodes = nodes
+
+    def _base(self, node):
+        '''
+        :param: node - level two Node
+        :return: level one Node, the centre of node after one generation
+        '''
+        grid = [[0] * 4 for _ in range(4)]
+        for qy, qx, q in ((0, 0, node.nw), (0, 2, node.ne),
+                          (2, 0, node.sw), (2, 2, node.se)):
+            grid[qy][qx] = q.nw.population
+            grid[qy][qx + 1] = q.ne.population
+            grid[qy + 1][qx] = q.sw.population
+            grid[qy + 1][qx + 1] = q.se.population
+
+        table = self.rule.table
+        leaves = []
+        for y, x in ((1, 1), (1, 2), (2, 1), (2, 2)):
+            n = sum(grid[y + dy][x + dx]
+                    for dy in (-1, 0, 1)
+                    for dx in (-1, 0, 1)) - grid[y][x]
+            if table[grid[y][x]][n]:
+                leaves.append(self.live)
+            else:
+                leaves.append(self._empties[0])
+
+        return self.join(*leaves)
+
+    def successor(self, node, j):
+        '''
+        :param: node - Node of level two or more
+        :param: j    - integer, at most node.level - 2
+        :return: Node one level smaller than node
+
+        Returns the central half of node advanced 2**j generations.
+        '''
+        if node.population == 0:
+            return node.nw
+
+        key = (node, j)
+        try:
+            return self._results[key]
+        except KeyError:
+            pass
+
+        if node.level == 2:
+            result = self._base(node)
+        else:
+            join = self.join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+            quads = [nw,
+                     join(nw.ne, ne.nw, nw.se, ne.sw),
+                     ne,
+                     join(nw.sw, nw.se, sw.nw, sw.ne),
+                     join(nw.se, ne.sw, sw.ne, se.nw),
+                     join(ne.sw, ne.se, se.nw, se.ne),
+                     sw,
+                     join(sw.ne, se.nw, sw.se, se.sw),
+                     se]
+
+            if j >= node.level - 2:
+                # two half steps of 2**(level - 3) generations each
+                half = node.level - 3
+                c = [self.successor(q, half) for q in quads]
+                result = join(
+                    self.successor(join(c[0], c[1], c[3], c[4]), half),
+                    self.successor(join(c[1], c[2], c[4], c[5]), half),
+                    self.successor(join(c[3], c[4], c[6], c[7]), half),
+                    self.successor(join(c[4], c[5], c[7], c[8]), half))
+            else:
+                c = [self.successor(q, j) for q in quads]
+                result = join(join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                              join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                              join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                              join(c[4].se, c[5].sw, c[7].ne, c[8].nw))
+
+        if len(self._results) >= self.maxNodes:
+            raise _CacheFull()
+
+        self._results[key] = result
+        return result
+
+    def _expand(self):
+        '''
+        Doubles the size of the universe, keeping the current root at
+        its centre.
+        '''
+        root = self.root
+        e = self.empty(root.level - 1)
+        self.root = self.join(self.join(e, e, e, root.nw),
+                              self.join(e, e, root.ne, e),
+                              self.join(e, root.sw, e, e),
+                              self.join(root.se, e, e, e))
+        half = 1 << (root.level - 1)
+        self.originX -= half
+        self.originY -= half
+
+    def _isPadded(self, node):
+        '''
+        :param: node - Node of level three or more
+        :return: boolean, True if every live cell of node is inside its
+                 central quarter
+        '''
+        return (node.nw.se.se.population + node.ne.sw.sw.population +
+                node.sw.ne.ne.population +
+                node.se.nw.nw.population) == node.population
+
+    def _jumpOnce(self, j):
+        '''
+        :param: j - integer
+        :return: None
+
+        Advances the universe 2**j generations or raises _CacheFull,
+        leaving the universe untouched, if the tables fill up.
+        '''
+        root = self.root
+        originX, originY = self.originX, self.originY
+        self._jumping = True
+        try:
+            while self.root.level < j + 3 or not self._isPadded(self.root):
+                self._expand()
+            offset = 1 << (self.root.level - 2)
+            self.root = self.successor(self.root, j)
+        except _CacheFull:
+            self.root = root
+            self.originX, self.originY = originX, originY
+            raise
+        finally:
+            self._jumping = False
+
+        self.originX += offset
+        self.originY += offset
+        self.generation += 1 << j
+
+    def _jump(self, j):
+        '''
+        :param: j - integer
+        :return: None
+
+        Advances the universe 2**j generations, falling back to smaller
+        jumps when a jump of 2**j generations does not fit in maxNodes.
+        '''
+        limit = self._limit
+        if limit is not None and j > limit:
+            for _ in range(1 << (j - limit)):
+                self._jump(limit)
+            return
+
+        try:
+            self._jumpOnce(j)
+            return
+        except _CacheFull:
+            self.collect()
+
+        if j > 0:
+            self._limit = j - 1
+            self._jump(j)
+            return
+
+        try:
+            self._jumpOnce(j)
+        except _CacheFull:
+            msg = 'maxNodes={} is too small to advance this universe'
+            raise MemoryError(msg.format(self.maxNodes))
+
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations using
+        one quadtree jump per set bit of generations.
+        '''
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        self._limit = None
+        n, j = generations, 0
+        while n:
+            if n & 1:
+                self._jump(j)
+            n >>= 1
+            j += 1
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation.
+        '''
+        self.advance(1)
+
+    def _warp(self, key):
+        '''
+        The universe is unbounded, coordinates are not wrapped.
+        '''
+        x, y = map(int, key)
+        return x, y
+
+    def _contains(self, x, y):
+        '''
+        '''
+        size = 1 << self.root.level
+        return (self.originX <= x < self.originX + size and
+                self.originY <= y < self.originY + size)
+
+    def __getitem__(self, key):
+        '''
+        '''
+        x, y = self._warp(key)
+        if not self._contains(x, y):
+            return 0
+        node = self.root
+        x -= self.originX
+        y -= self.originY
+        while node.level and node.population:
+            half = 1 << (node.level - 1)
+            if y < half:
+                node = node.nw if x < half else node.ne
+            else:
+                node = node.sw if x < half else node.se
+            x %= half
+            y %= half
+        return node.population
+
+    def _set(self, node, x, y, leaf):
+        '''
+        :return: copy of node with the cell at x,y replaced by leaf
+        '''
+        if node.level == 0:
+            return leaf
+        half = 1 << (node.level - 1)
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        if y < half:
+            if x < half:
+                nw = self._set(nw, x, y, leaf)
+            else:
+                ne = self._set(ne, x - half, y, leaf)
+        else:
+            if x < half:
+                sw = self._set(sw, x, y - half, leaf)
+            else:
+                se = self._set(se, x - half, y - half, leaf)
+        return self.join(nw, ne, sw, se)
+
+    def __setitem__(self, key, value):
+        '''
+        '''
+        x, y = self._warp(key)
+        while not self._contains(x, y):
+            self._expand()
+        leaf = self.live if value else self._empties[0]
+        self.root = self._set(self.root, x - self.originX,
+                              y - self.originY, leaf)
+
+    def _collectCells(self, node, x, y, out, region=None):
+        '''
+        Appends the (x,y) coordinates of the live cells in node, whose
+        top left corner is at x,y, to out. If region is given as
+        (x0, y0, x1, y1) only cells inside it are collected.
+        '''
+        stack = [(node, x, y)]
+        while stack:
+            node, x, y = stack.pop()
+            if node.population == 0:
+                continue
+            size = 1 << node.level
+            if region is not None:
+                x0, y0, x1, y1 = region
+                if x >= x1 or y >= y1 or x + size <= x0 or y + size <= y0:
+                    continue
+            if node.level == 0:
+                out.append((x, y))
+                continue
+            half = size >> 1
+            stack.append((node.se, x + half, y + half))
+            stack.append((node.sw, x, y + half))
+            stack.append((node.ne, x + half, y))
+            stack.append((node.nw, x, y))
+        return out
+
+    @property
+    def alive(self):
+        '''
+        Returns a list of (x,y) coordinates of cells that are alive
+        anywhere in the universe.
+        '''
+        return self._collectCells(self.root, self.originX,
+                                  self.originY, [])
+
+    @property
+    def cells(self):
+        '''
+        The viewport as an array of zeros and ones with shape
+        (height, width). Changing it does not change the world.
+        '''
+        cells = np.zeros((self.height, self.width), dtype=np.uint8)
+        region = (0, 0, self.width, self.height)
+        for x, y in self._collectCells(self.root, self.originX,
+                                       self.originY, [], region):
+            cells[y, x] = 1
+        return cells
+
+    @property
+    def header(self):
+        '''
+        A formats.Header with the bounding box of the live cells.
+        '''
+        alive = self.alive
+        if not alive:
+            return Header(rule=str(self.rule))
+        xs, ys = zip(*alive)
+        return Header(max(xs) - min(xs) + 1, max(ys) - min(ys) + 1,
+                      min(xs), min(ys), str(self.rule))
+
+    def runs(self):
+        '''
+        See World.runs, the coordinates are absolute.
+        '''
+        alive = self.alive
+        if not alive:
+            return iter(())
+        return pointRuns(*zip(*alive))
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: None
+
+        Brings the cells covered by the runs, offset by x,y, to life.
+        '''
+        for rx, ry, n in runs:
+            for X in range(x + rx, x + rx + n):
+                self[X, y + ry] = 1
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :return: None
+
+        Places many patterns at once, one cell at a time.
+        '''
+        p = placements(items)
+        for (xs, ys), alive in ((p.cleared, 0), (p.born, 1)):
+            for X, Y in zip(xs.tolist(), ys.tolist()):
+                self[X, Y] = alive
+        xs, ys = p.toggled
+        for X, Y in zip(xs.tolist(), ys.tolist()):
+            self[X, Y] = 1 - self[X, Y]
+
+    def _stamp(self, pattern, x, y):
+        '''
+        :param: pattern - CompiledPattern
+        :param: x - integer
+        :param: y - integer
+        :return: None
+
+        Sets the cells of the pattern's bounding box, placed at x,y,
+        alive or dead.
+        '''
+        x += pattern.x
+        y += pattern.y
+        for Y, row in enumerate(pattern.cells.tolist()):
+            for X, alive in enumerate(row):
+                self[x + X, y + Y] = alive
+
+    def _place(self, cells, present, x, y):
+        '''
+        See NumpyWorld._place, the universe is unbounded so the index
+        is a tuple of arrays (ys, xs) of unwrapped positions.
+        '''
+        ys, xs = np.nonzero(present)
+        ys += y
+        xs += x
+        for X, Y, alive in zip(xs.tolist(), ys.tolist(),
+                               cells[present].tolist()):
+            self[X, Y] = alive
+        return ys, xs
+
+    def _leaf(self, rows):
+        '''
+        :param: rows - sequence of eight row bitmasks, bit x of row y
+                       holding the cell at (x, y)
+        :return: level three Node
+        '''
+        dead = self._empties[0]
+        grid = [[self.live if row >> x & 1 else dead for x in range(8)]
+                for row in rows]
+        while len(grid) > 1:
+            grid = [[self.join(grid[y][x], grid[y][x + 1],
+                               grid[y + 1][x], grid[y + 1][x + 1])
+                     for x in range(0, len(grid), 2)]
+                    for y in range(0, len(grid), 2)]
+        return grid[0][0]
+
+    def restore(self, snap):
+        '''
+        See World.restore, the live cells of the snapshot are placed
+        at the position the snapshot records and the viewport is left
+        as it is.
+        '''
+        World.restore(self, snap)
+
+    def _snapshotBox(self):
+        '''
+        See World._snapshotBox, the viewport grown to hold every live
+        cell, see coverBox.
+        '''
+        return coverBox(self.header, self.width, self.height)
+
+    def _snapshotPayload(self, encoding):
+        '''
+        See World._snapshotPayload, the live cells are placed in the
+        box of _snapshotBox rather than the viewport.
+        '''
+        box = self._snapshotBox()
+        mask = np.zeros((box.height, box.width), dtype=np.uint8)
+        placeRuns(mask, self.runs(), -box.x, -box.y)
+        return snapshot.encode(mask, encoding)
+
+    def load(self, header, runs):
+        '''
+        :param: header - formats.Header
+        :param: runs   - iterable of runs relative to the top left
+                         corner of the pattern, or a formats.MacrocellTree
+
+        Replaces the universe with the pattern placed at header.x,
+        header.y and adopts the pattern's rule if it names one. A
+        Macrocell tree is built node for node into the node table, so
+        its cells are never decoded. The viewport is left as it is.
+        '''
+        if header.rule:
+            self.rule = header.rule
+        self.reset()
+
+        try:
+            build = runs.build
+        except AttributeError:
+            self.addRuns(runs, header.x, header.y)
+            return
+
+        root = build(self._leaf, self.join, self.empty)
+        if root is not None:
+            self.root = root
+            self.originX = self.originY = -(1 << (root.level - 1))
+
+    def _writeMacrocell(self, fileobj):
+        '''
+        :param: fileobj - file-like object
+        :return: number of bytes written
+
+        Writes the quadtree as it is, each distinct node once, when the
+        root is centred on (0,0) as Macrocell requires. That is the case
+        for universes read from Macrocell files; others are written
+        from their runs.
+        '''
+        half = 1 << (self.root.level - 1)
+        if self.originX != -half or self.originY != -half:
+            return super(HashLifeWorld, self)._writeMacrocell(fileobj)
+
+        writer = MacrocellWriter(fileobj, str(self.rule))
+        numbers = {}
+
+        def number(node):
+            if node.population == 0:
+                return 0
+            try:
+                return numbers[node]
+            except KeyError:
+                pass
+            if node.level == 3:
+                rows = [0] * 8
+                for x, y in self._collectCells(node, 0, 0, []):
+                    rows[y] |= 1 << x
+                n = writer.leaf(rows)
+            else:
+                n = writer.node(node.level, number(node.nw), number(node.ne),
+                                number(node.sw), number(node.se))
+            numbers[node] = n
+            return n
+
+        number(self.root)
+        return writer.nbytes
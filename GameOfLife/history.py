@@ -0,0 +1,452 @@
+'''Conway's Game of Life
+
+Compact recordings of a world's generations.
+
+A Recorder writes the live cells of a world as it runs: a full,
+bit-packed keyframe every few records and, in between, deltas that
+list the cells born and the cells that died since the previous
+record. A HistoryReader seeks to any recorded generation by loading
+the nearest keyframe before it and replaying the deltas after it.
+
+>>> with Recorder(w, 'run.golh', keyframes=64) as recorder:
+...     recorder.attach()
+...     for _ in range(1000):
+...         w.step()
+>>> history = HistoryReader('run.golh')
+>>> history.cells(500)
+
+The file starts with a header and holds one record per recorded
+generation, each a small fixed header and a zlib-compressed payload.
+Closing the recorder appends an index of the records, which the
+reader uses to seek; files without one, because the recorder never
+closed, are scanned instead.
+
+'''
+
+import bisect
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from .world import aliveMask
+
+MAGIC = b'GOLH'
+VERSION = 1
+
+KEYFRAME = b'K'
+DELTA = b'D'
+
+# magic, version, width, height, keyframe interval
+_HEADER = struct.Struct('<4sHQQI')
+# kind, generation, payload length
+_RECORD = struct.Struct('<cqQ')
+# index offset, magic
+_FOOTER = struct.Struct('<Q4s')
+# births, bytes per birth gap, bytes per death gap
+_DELTA = struct.Struct('<QBB')
+_INDEX = np.dtype([('generation', '<i8'), ('offset', '<u8'), ('kind', 'S1')])
+
+
+def _encodeIndices(indices):
+    '''
+    :param: indices - sorted array of flat cell indices
+    :return: array of the gaps between the indices, in the narrowest
+             unsigned integer type that holds them; gaps compress far
+             better than the indices
+    '''
+    gaps = np.diff(indices, prepend=0)
+    top = int(gaps.max()) if len(gaps) else 0
+    for dtype in ('<u1', '<u2', '<u4', '<u8'):
+        if top <= np.iinfo(dtype).max:
+            return gaps.astype(dtype)
+
+
+def _decodeIndices(gaps):
+    '''
+    :param: gaps - array of gaps, see _encodeIndices
+    :return: array of int64 flat cell indices
+    '''
+    return np.cumsum(gaps, dtype=np.int64)
+
+
+class Recorder(object):
+    '''
+    Records the generations of a world to a file.
+
+    Each call to record captures the world's live cells. Every
+    keyframes-th record is a keyframe, the others are deltas, so a
+    reader replays at most keyframes - 1 deltas to reach any record.
+
+    Capturing a generation and working out its delta happens on the
+    caller's thread; compressing and writing happen on a writer
+    thread, fed through a queue of at most backlog records. Errors on
+    the writer thread are raised by the next call to record or close.
+    '''
+
+    def __init__(self, world, fileobj, keyframes=64, backlog=64, level=1):
+        '''
+        :param: world     - any engine
+        :param: fileobj   - binary file-like object or path
+        :param: keyframes - optional integer, records per keyframe
+        :param: backlog   - optional integer, records queued for the
+                            writer thread before record blocks
+        :param: level     - optional integer, zlib compression level
+        '''
+        self.world = world
+        self.level = level
+        self.keyframes = int(keyframes)
+        if self.keyframes < 1:
+            raise ValueError('keyframes must be at least one')
+
+        if hasattr(fileobj, 'write'):
+            self.fileobj = fileobj
+            self._owned = False
+        else:
+            self.fileobj = open(fileobj, 'wb')
+            self._owned = True
+
+        self.width = world.width
+        self.height = world.height
+        self.count = 0
+        self._previous = None
+        self._step = None
+        self._index = []
+        self._error = None
+        self._offset = self.fileobj.write(
+            _HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                         self.keyframes))
+
+        self._queue = queue.Queue(int(backlog))
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self):
+        '''
+        :return: None
+
+        Captures the world's current generation.
+        '''
+        self._raise()
+        if (self.world.width, self.world.height) != (self.width,
+                                                     self.height):
+            raise ValueError('the world was resized while recording')
+
+        mask = aliveMask(self.world)
+        generation = self.world.generation
+
+        if self.count % self.keyframes == 0:
+            self._queue.put((KEYFRAME, generation, mask))
+        else:
+            changed = mask ^ self._previous
+            births = np.flatnonzero(changed & mask)
+            deaths = np.flatnonzero(changed & self._previous)
+            self._queue.put((DELTA, generation, (births, deaths)))
+
+        self._previous = mask
+        self.count += 1
+
+    def attach(self):
+        '''
+        Records every generation the world takes through its step
+        method, starting with the current one. Engines' advance
+        methods that do not call step are not recorded; call record
+        after them.
+        '''
+        if self._step is not None:
+            return
+        step = self.world.step
+
+        def recordingStep(*args, **kwds):
+            result = step(*args, **kwds)
+            self.record()
+            return result
+
+        self._step = step
+        self.world.step = recordingStep
+        self.record()
+
+    def detach(self):
+        '''
+        Stops recording the world's steps.
+        '''
+        if self._step is None:
+            return
+        del self.world.step
+        self._step = None
+
+    def close(self):
+        '''
+        Waits for the writer thread, appends the index and closes the
+        file if the recorder opened it.
+        '''
+        if self._writer is None:
+            return
+        self.detach()
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        try:
+            self._raise()
+            index = np.array(self._index, dtype=_INDEX)
+            self.fileobj.write(index.tobytes())
+            self.fileobj.write(_FOOTER.pack(self._offset, MAGIC))
+            self.fileobj.flush()
+        finally:
+            if self._owned:
+                self.fileobj.close()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self):
+        '''
+        Writer thread: compresses and writes queued records until it
+        gets None.
+        '''
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            kind, generation, data = item
+            try:
+                if kind == KEYFRAME:
+                    payload = np.packbits(data).tobytes()
+                else:
+                    births, deaths = data
+                    births = _encodeIndices(births)
+                    deaths = _encodeIndices(deaths)
+                    payload = b''.join([
+                        _DELTA.pack(len(births), births.itemsize,
+                                    deaths.itemsize),
+                        births.tobytes(), deaths.tobytes()])
+                payload = zlib.compress(payload, self.level)
+                self._index.append((generation, self._offset, kind))
+                self._offset += self.fileobj.write(
+                    _RECORD.pack(kind, generation, len(payload)))
+                self._offset += self.fileobj.write(payload)
+            except Exception as error:
+                self._error = error
+
+
+class HistoryReader(object):
+    '''
+    Reads a file written by a Recorder.
+
+    >>> history = HistoryReader('run.golh')
+    >>> history.generations[:3]
+    [0, 1, 2]
+    >>> history.cells(2)
+    '''
+
+    def __init__(self, fileobj):
+        '''
+        :param: fileobj - seekable binary file-like object or path
+        '''
+        if hasattr(fileobj, 'read'):
+            self.fileobj = fileobj
+        else:
+            self.fileobj = open(fileobj, 'rb')
+
+        f = self.fileobj
+        f.seek(0)
+        magic, version, width, height, keyframes = _HEADER.unpack(
+            f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('not a GameOfLife history file')
+        if version != VERSION:
+            raise ValueError('unsupported history version {}'.format(version))
+        self.width = width
+        self.height = height
+        self.keyframes = keyframes
+        self.index = self._readIndex()
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(width={self.width},',
+             'height={self.height},',
+             'records={n})']
+
+        return ''.join(s).format(self=self, n=len(self))
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def generations(self):
+        '''
+        List of the recorded generations, in recording order.
+        '''
+        return self.index['generation'].tolist()
+
+    def _readIndex(self):
+        '''
+        :return: index array read from the footer, or built by scanning
+                 the records of a file that has none
+        '''
+        f = self.fileobj
+        end = f.seek(0, 2)
+        if end >= _HEADER.size + _FOOTER.size:
+            f.seek(end - _FOOTER.size)
+            offset, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+            size = end - _FOOTER.size - offset
+            if magic == MAGIC and size >= 0 and size % _INDEX.itemsize == 0:
+                f.seek(offset)
+                return np.frombuffer(f.read(size), dtype=_INDEX)
+
+        index = []
+        offset = _HEADER.size
+        while offset + _RECORD.size <= end:
+            f.seek(offset)
+            kind, generation, length = _RECORD.unpack(f.read(_RECORD.size))
+            if kind not in (KEYFRAME, DELTA):
+                break
+            if offset + _RECORD.size + length > end:
+                # a record cut short by a crash
+                break
+            index.append((generation, offset, kind))
+            offset += _RECORD.size + length
+        return np.array(index, dtype=_INDEX)
+
+    def _payload(self, position):
+        '''
+        :param: position - integer position of a record in the index
+        :return: tuple of the record's kind and decompressed payload
+        '''
+        entry = self.index[position]
+        self.fileobj.seek(int(entry['offset']))
+        kind, generation, length = _RECORD.unpack(
+            self.fileobj.read(_RECORD.size))
+        return kind, zlib.decompress(self.fileobj.read(length))
+
+    def _position(self, generation):
+        '''
+        :return: position in the index of the last record of generation
+        '''
+        generations = self.index['generation']
+        position = bisect.bisect_right(generations, generation) - 1
+        if position < 0 or generations[position] != generation:
+            raise KeyError('generation {} was not recorded'.format(generation))
+        return position
+
+    def delta(self, generation):
+        '''
+        :param: generation - integer, a recorded generation
+        :return: tuple (births, deaths) of tuples of arrays (xs, ys),
+                 the cells that changed since the previous record
+
+        The first record has every live cell born.
+        '''
+        position = self._position(generation)
+        kind, payload = self._payload(position)
+        if kind == KEYFRAME:
+            now = self._unpack(payload)
+            before = (self.cells(self.index['generation'][position - 1])
+                      if position else np.zeros_like(now))
+            births = np.flatnonzero(now & ~before)
+            deaths = np.flatnonzero(before & ~now)
+        else:
+            births, deaths = self._deltas(payload)
+        return (self._coordinates(births), self._coordinates(deaths))
+
+    def cells(self, generation):
+        '''
+        :param: generation - integer, a recorded generation
+        :return: boolean array with shape (height, width), True for the
+                 live cells of that generation
+
+        Loads the nearest keyframe at or before the record and replays
+        the deltas that follow it.
+        '''
+        position = self._position(generation)
+        kinds = self.index['kind'][:position + 1]
+        start = int(np.flatnonzero(kinds == KEYFRAME)[-1])
+
+        kind, payload = self._payload(start)
+        flat = self._unpack(payload).ravel()
+        for p in range(start + 1, position + 1):
+            births, deaths = self._deltas(self._payload(p)[1])
+            flat[births] = True
+            flat[deaths] = False
+        return flat.reshape(self.height, self.width)
+
+    def __iter__(self):
+        '''
+        Yields tuples (generation, cells) for every record in order,
+        decoding each record once.
+        '''
+        flat = None
+        for position in range(len(self)):
+            kind, payload = self._payload(position)
+            if kind == KEYFRAME:
+                flat = self._unpack(payload).ravel()
+            else:
+                births, deaths = self._deltas(payload)
+                flat[births] = True
+                flat[deaths] = False
+            yield (int(self.index['generation'][position]),
+                   flat.reshape(self.height, self.width).copy())
+
+    def world(self, generation, worldClass=None):
+        '''
+        :param: generation - integer, a recorded generation
+        :param: worldClass - optional NumpyWorld subclass
+        :return: a world holding the live cells of that generation,
+                 each with an age of one
+        '''
+        if worldClass is None:
+            from .world import NumpyWorld as worldClass
+        world = worldClass(self.width, self.height)
+        world.cells[...] = self.cells(generation)
+        world.generation = generation
+        return world
+
+    def _unpack(self, payload):
+        '''
+        :return: boolean board from a keyframe payload
+        '''
+        n = self.width * self.height
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))[:n]
+        return bits.astype(bool).reshape(self.height, self.width)
+
+    def _deltas(self, payload):
+        '''
+        :return: tuple (births, deaths) of flat index arrays from a
+                 delta payload
+        '''
+        count, bsize, dsize = _DELTA.unpack_from(payload)
+        births = np.frombuffer(payload, dtype='<u{}'.format(bsize),
+                               count=count, offset=_DELTA.size)
+        deaths = np.frombuffer(payload, dtype='<u{}'.format(dsize),
+                               offset=_DELTA.size + count * bsize)
+        return _decodeIndices(births), _decodeIndices(deaths)
+
+    def _coordinates(self, indices):
+        '''
+        :return: tuple of arrays (xs, ys) of flat indices
+        '''
+        ys, xs = np.divmod(indices, self.width)
+        return xs, ys
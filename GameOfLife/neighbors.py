@@ -0,0 +1,69 @@
+'''Conway's Game of Life
+
+Precomputed neighbor index tables.
+
+A neighbor table lists, for every cell of a width x height board
+stored row by row, the flat indices of its eight neighbors in the
+order of Cell.neighborLocations. Tables are read-only and cached
+process-wide, so every world of the same shape and topology shares
+one table.
+
+'''
+
+import functools
+
+import numpy as np
+
+# same order as Cell.neighborLocations
+OFFSETS = ((-1, -1), (0, -1), (1, -1),
+           (-1, 0), (1, 0),
+           (-1, 1), (0, 1), (1, 1))
+
+# torus - edges wrap around
+# plane - neighbors beyond the edges are a dead sentinel cell whose
+#         index is width * height
+TOPOLOGIES = ('torus', 'plane')
+
+CACHE_SIZE = 32
+
+
+def neighborTable(width, height, topology='torus'):
+    '''
+    :param: width    - integer
+    :param: height   - integer
+    :param: topology - optional string, one of TOPOLOGIES
+    :return: read-only array of indices with shape (width * height, 8)
+
+    The least recently used tables are evicted once more than
+    CACHE_SIZE shapes are in use; see neighborTable.cache_info().
+    '''
+    if topology not in TOPOLOGIES:
+        msg = 'unknown topology {!r}, expecting one of {}'
+        raise ValueError(msg.format(topology, TOPOLOGIES))
+
+    return _buildTable(int(width), int(height), topology)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _buildTable(width, height, topology):
+    '''
+    Computes the neighbor table, see neighborTable.
+    '''
+    ys, xs = np.divmod(np.arange(width * height, dtype=np.intp), width)
+
+    table = np.empty((width * height, len(OFFSETS)), dtype=np.intp)
+    for n, (dx, dy) in enumerate(OFFSETS):
+        nx = xs + dx
+        ny = ys + dy
+        if topology == 'torus':
+            table[:, n] = (ny % height) * width + (nx % width)
+        else:
+            inside = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+            table[:, n] = np.where(inside, ny * width + nx, width * height)
+
+    table.flags.writeable = False
+    return table
+
+
+neighborTable.cache_info = _buildTable.cache_info
+neighborTable.cache_clear = _buildTable.cache_clear
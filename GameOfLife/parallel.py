@@ -0,0 +1,277 @@
+'''Conway's Game of Life
+
+A NumpyWorld that steps rectangular tiles of the board in a pool of
+worker processes.
+
+'''
+
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .world import NumpyWorld, stepRegion
+
+# boards attached by each worker process, see _attach
+_boards = []
+
+
+def _attach(names, shape, dtype):
+    '''
+    Pool initializer, maps the shared boards into the worker process.
+    '''
+    del _boards[:]
+    for name in names:
+        shm = SharedMemory(name=name)
+        _boards.append((shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)))
+
+
+def _stepTile(task):
+    '''
+    :param: task - tuple (src, y0, y1, x0, x1, lookup)
+
+    Computes the next generation of one tile from board src into the
+    other board. The tile's halo is read straight from shared memory.
+    '''
+    src, y0, y1, x0, x1, lookup = task
+    stepRegion(_boards[src][1], _boards[1 - src][1],
+               slice(y0, y1), slice(x0, x1), lookup)
+
+
+def _bounds(n, parts):
+    '''
+    :return: list of (start, stop) tuples splitting range(n) into at
+             most parts nearly equal pieces
+    '''
+    parts = max(1, min(int(parts), n))
+    edges = [(n * i) // parts for i in range(parts + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class ParallelNumpyWorld(NumpyWorld):
+    '''
+    A NumpyWorld whose step is split over a pool of processes.
+
+    >>> with ParallelNumpyWorld(20000, 20000, tiles=(8, 8)) as w:
+    ...     w.addPattern('acorn', x=10000, y=10000)
+    ...     w.step()
+
+    The board is double buffered in multiprocessing shared memory.
+    Each generation every worker reads one tile of the current board,
+    plus its one row and one column halo, and writes the tile of the
+    next board; the buffers are then swapped. Only tile coordinates
+    cross process boundaries, the board is never pickled.
+
+    The cells property is the current buffer, so it changes identity
+    after every step. Call close, or use the world as a context
+    manager, to stop the workers and release the shared memory. Like a
+    closed file, a closed world raises ValueError when its cells are
+    used or it is stepped.
+    '''
+
+    # True once close was called
+    closed = False
+
+    def __init__(self, width=80, height=23, tiles=(2, 2), processes=None,
+                 rulestring=None):
+        '''
+        :param: width      - integer
+        :param: height     - integer
+        :param: tiles      - optional tuple (rows, columns) of tile counts
+        :param: processes  - optional integer number of worker processes,
+                             defaults to the number of tiles
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+        '''
+        super(ParallelNumpyWorld, self).__init__(width, height, rulestring)
+        self.tiles = tuple(tiles)
+        self.processes = processes
+        self._memory = []
+        self._boards = []
+        self._current = 0
+        self._pool = None
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(width={self.width},',
+             'height={self.height},',
+             'tiles={self.tiles})']
+
+        return ''.join(s).format(self=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def tileBounds(self):
+        '''
+        A list of (y0, y1, x0, x1) tuples, one per tile.
+        '''
+        rows, cols = self.tiles
+        return [(y0, y1, x0, x1)
+                for y0, y1 in _bounds(self.height, rows)
+                for x0, x1 in _bounds(self.width, cols)]
+
+    def _allocate(self):
+        '''
+        Creates the two shared boards for the current width and height.
+        '''
+        self._release()
+        shape = (self.height, self.width)
+        size = max(1, self.height * self.width * 8)
+        for n in range(2):
+            shm = SharedMemory(create=True, size=size)
+            board = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+            board.fill(0)
+            self._memory.append(shm)
+            self._boards.append(board)
+        self._current = 0
+
+    def _checkOpen(self):
+        '''
+        Raises ValueError if the world was closed.
+        '''
+        if self.closed:
+            raise ValueError('world is closed')
+
+    @property
+    def cells(self):
+        '''
+        The current board, an array in shared memory.
+        '''
+        self._checkOpen()
+        if not self._boards:
+            self._allocate()
+        return self._boards[self._current]
+
+    @property
+    def pool(self):
+        '''
+        The pool of worker processes, started on first use.
+        '''
+        if self._pool is not None:
+            return self._pool
+        cells = self.cells
+        names = [shm.name for shm in self._memory]
+        processes = self.processes or len(self.tileBounds)
+        self._pool = multiprocessing.Pool(processes, _attach,
+                                          (names, cells.shape, cells.dtype))
+        return self._pool
+
+    def close(self):
+        '''
+        Stops the worker processes and releases the shared memory. The
+        world can not be used afterwards; closing it again does
+        nothing.
+        '''
+        self._release()
+        self.closed = True
+
+    def _release(self):
+        '''
+        Stops the worker processes and releases the shared memory.
+        '''
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._boards = []
+        for shm in self._memory:
+            try:
+                shm.close()
+            except BufferError:
+                # a caller still holds the cells array, the mapping
+                # goes away with it
+                pass
+            shm.unlink()
+        self._memory = []
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - reallocates the shared boards if the world was resized
+        - kills all cells
+        '''
+        self.generation = 0
+        if self.cells.shape != (self.height, self.width):
+            self._allocate()
+        self.cells.fill(0)
+
+    def restore(self, snap):
+        '''
+        :param: snap - snapshot.Snapshot
+
+        See World.restore, the snapshot is copied into the shared
+        boards whatever its encoding.
+        '''
+        if snap.rule:
+            self.rule = snap.rule
+        self.width = snap.width
+        self.height = snap.height
+        self.reset()
+        self.cells[...] = snap.ages
+        self.generation = snap.generation
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation, one tile per task.
+        '''
+        self._checkOpen()
+        tasks = [(self._current,) + bounds + (self.lookup,)
+                 for bounds in self.tileBounds]
+        self.pool.map(_stepTile, tasks)
+        self._current = 1 - self._current
+        self.generation += 1
+
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations, each
+        one split over the worker processes.
+        '''
+        self._checkOpen()
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        pool = self.pool
+        tiles = self.tileBounds
+        for _ in range(generations):
+            pool.map(_stepTile, [(self._current,) + bounds + (self.lookup,)
+                                 for bounds in tiles])
+            self._current = 1 - self._current
+        self.generation += generations
+
+    def verify(self, generations=1):
+        '''
+        :param: generations - optional integer
+        :return: boolean
+
+        Advances the world the given number of generations alongside a
+        single process NumpyWorld started from the same board and
+        returns True if the two boards are bit-identical after every
+        generation.
+        '''
+        reference = NumpyWorld(self.width, self.height, self.rule)
+        reference.cells[...] = self.cells
+        for _ in range(generations):
+            reference.step()
+            self.step()
+            if not np.array_equal(reference.cells, self.cells):
+                return False
+        return True
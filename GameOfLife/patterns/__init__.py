@@ -2,21 +2,144 @@
 
 Canned patterns.
 
+Patterns maps pattern names to patterns. Plaintext '.life' patterns
+are strings, RLE '.rle' and Macrocell '.mc' patterns are Pattern
+objects that are only decoded when they are placed in a world.
+
 '''
 
-from pkg_resources import ResourceManager
+import os
+from collections.abc import Mapping
 
-Patterns = {}
-_EXT = '.life'
-_rm = ResourceManager()
-_pkg = 'GameOfLife.patterns.data'
-for fname in [f for f in _rm.resource_listdir(_pkg, '.') if f.endswith(_EXT)]:
-    with _rm.resource_stream(_pkg, fname) as f:
-        Patterns.setdefault(fname.split('.')[0].lower(),
-                            f.read().decode('utf-8'))
+from .. import formats
 
 
 class Pattern(object):
+    '''
+    A pattern stored in one of the formats of the formats module.
+
+    >>> p = Pattern('glider', 'x = 3, y = 3\\nbo$2bo$3o!')
+    >>> w.addPattern(p)
+
+    The text is decoded each time the pattern is read, see read.
+    '''
+
+    def __init__(self, name, data=None, format='rle'):
+        '''
+        :param: name   - string
+        :param: data   - optional string, the pattern's file contents
+        :param: format - optional string, one of formats.FORMATS
+        '''
+        self.name = name
+        self.data = data or ''
+        self.format = format
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(name={self.name!r},',
+             'format={self.format!r})']
+
+        return ''.join(s).format(self=self)
+
+    def __str__(self):
+        '''
+        The pattern as plaintext, 'x' for live cells.
+        '''
+        header, runs = self.read()
+        rows = [[' '] * header.width for _ in range(header.height)]
+        for x, y, n in runs:
+            rows[y][x:x + n] = 'x' * n
+        return '\n'.join(''.join(row) for row in rows)
+
+    def read(self):
+        '''
+        :return: tuple of formats.Header and runs, see formats.read
+        '''
+        return formats.read(self.data.splitlines(), self.format)
+
+    @property
+    def header(self):
+        '''
+        The pattern's formats.Header.
+        '''
+        return self.read()[0]
+
+    def runs(self):
+        '''
+        :return: iterable of the pattern's runs (x, y, length)
+        '''
+        return self.read()[1]
+
+
+class PatternRegistry(Mapping):
+    '''
+    Read-only mapping of pattern names to the patterns in the files of
+    a directory.
+
+    >>> Patterns['glider']
+    'x\n  x\nxxx'
+
+    Only the file names are listed when the registry is created; a
+    file is read the first time its pattern is looked up and kept
+    after that.
+    '''
+
+    # file extensions and the formats they hold
+    EXTENSIONS = {'.life': 'life', '.rle': 'rle', '.mc': 'mc'}
+
+    def __init__(self, path):
+        '''
+        :param: path - string, directory holding the pattern files
+        '''
+        self.path = path
+        self._files = {}
+        self._cache = {}
+        for fname in sorted(os.listdir(path)):
+            name, dot, ext = fname.rpartition('.')
+            format = self.EXTENSIONS.get(dot + ext)
+            if format is not None:
+                self._files.setdefault(name.lower(), (fname, format))
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(path={self.path!r})']
+
+        return ''.join(s).format(self=self)
+
+    def __getitem__(self, name):
+        '''
+        :param: name - string
+        :return: string for plaintext patterns, Pattern otherwise
+        '''
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        fname, format = self._files[name]
+        with open(os.path.join(self.path, fname), encoding='utf-8') as f:
+            data = f.read()
+        if format != 'life':
+            data = Pattern(name, data, format)
+        self._cache[name] = data
+        return data
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, name):
+        try:
+            return name in self._files
+        except TypeError:
+            return False
+
+
+_DATA = os.path.join(os.path.dirname(__file__), 'data')
 
-    def __init__(self, name, data=None):
-        pass
+Patterns = PatternRegistry(_DATA)
@@ -0,0 +1,512 @@
+'''Conway's Game of Life
+
+Patterns compiled once into packed bit arrays.
+
+A CompiledPattern holds the cells of a pattern's bounding box packed
+eight to a byte, with the box's position in the source pattern and
+its population. Engines stamp compiled patterns into their boards
+without parsing anything:
+
+>>> glider = compilePattern('glider')
+>>> w.addPattern(glider.transform('rot90'), x=10, y=10)
+
+Compiled patterns are kept by a PatternCache, keyed by a hash of the
+pattern's content. The shared cache also keeps them on disk if the
+GAMEOFLIFE_PATTERN_CACHE environment variable names a directory.
+
+'''
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from . import Patterns, Pattern
+
+# how addPatterns combines a pattern with the cells under it
+OR = 'or'
+OVERWRITE = 'overwrite'
+XOR = 'xor'
+MODES = (OR, OVERWRITE, XOR)
+
+# rotations are clockwise, flipX mirrors left to right and flipY top
+# to bottom
+TRANSFORMS = ('identity', 'rot90', 'rot180', 'rot270',
+              'flipX', 'flipY', 'transpose', 'antitranspose')
+
+_TRANSFORMS = {'identity': lambda a: a,
+               'rot90': lambda a: np.rot90(a, -1),
+               'rot180': lambda a: np.rot90(a, 2),
+               'rot270': lambda a: np.rot90(a, 1),
+               'flipX': lambda a: a[:, ::-1],
+               'flipY': lambda a: a[::-1],
+               'transpose': lambda a: a.T,
+               'antitranspose': lambda a: np.rot90(a, 2).T}
+
+
+class CompiledPattern(object):
+    '''
+    The live cells of a pattern's bounding box as a packed bit array.
+
+    x and y are the position of the bounding box's top left corner in
+    the source pattern, so a compiled pattern lands on the same cells
+    as the source pattern placed at the same position. An empty
+    pattern has a bounding box of zero cells.
+    '''
+
+    def __init__(self, bits, width, height, x=0, y=0, name=None):
+        '''
+        :param: bits   - uint8 array of shape (height, (width + 7) // 8),
+                         rows packed with numpy.packbits
+        :param: width  - integer
+        :param: height - integer
+        :param: x      - optional integer
+        :param: y      - optional integer
+        :param: name   - optional string
+        '''
+        self.bits = bits
+        self.width = int(width)
+        self.height = int(height)
+        self.x = int(x)
+        self.y = int(y)
+        self.name = name
+        self._transforms = {'identity': self}
+
+    @classmethod
+    def fromCells(cls, cells, x=0, y=0, name=None):
+        '''
+        :param: cells - two dimensional array, nonzero for live cells
+        :param: x     - optional integer, position of cells in the source
+        :param: y     - optional integer
+        :param: name  - optional string
+        :return: CompiledPattern of the bounding box of the live cells
+        '''
+        alive = np.asarray(cells) != 0
+        rows = np.flatnonzero(alive.any(axis=1))
+        cols = np.flatnonzero(alive.any(axis=0))
+        if not len(rows):
+            return cls(np.zeros((0, 0), dtype=np.uint8), 0, 0, x, y, name)
+        alive = alive[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        return cls(np.packbits(alive, axis=1), alive.shape[1],
+                   alive.shape[0], x + cols[0], y + rows[0], name)
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(name={self.name!r},',
+             'width={self.width!r},',
+             'height={self.height!r},',
+             'x={self.x!r},',
+             'y={self.y!r})']
+
+        return ''.join(s).format(self=self)
+
+    def __str__(self):
+        '''
+        '''
+        return '\n'.join(''.join('x' if v else ' ' for v in row)
+                         for row in self.cells)
+
+    @property
+    def cells(self):
+        '''
+        Read-only uint8 array of shape (height, width), one for live
+        cells and zero for dead cells.
+        '''
+        try:
+            return self._cells
+        except AttributeError:
+            pass
+        cells = np.unpackbits(self.bits, axis=1)[:, :self.width]
+        cells.flags.writeable = False
+        self._cells = cells
+        return self._cells
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        try:
+            return self._population
+        except AttributeError:
+            pass
+        self._population = int(np.unpackbits(self.bits).sum())
+        return self._population
+
+    @property
+    def bounds(self):
+        '''
+        Tuple (x, y, width, height) of the bounding box.
+        '''
+        return (self.x, self.y, self.width, self.height)
+
+    def transform(self, name):
+        '''
+        :param: name - string, one of TRANSFORMS
+        :return: CompiledPattern
+
+        Returns the pattern turned or mirrored within its bounding box,
+        whose top left corner stays where it is. Each transform is
+        computed once.
+        '''
+        try:
+            return self._transforms[name]
+        except KeyError:
+            pass
+        try:
+            function = _TRANSFORMS[name]
+        except KeyError:
+            msg = 'unknown transform {!r}, expecting one of {}'
+            raise ValueError(msg.format(name, TRANSFORMS)) from None
+        cells = np.ascontiguousarray(function(self.cells))
+        pattern = CompiledPattern(np.packbits(cells, axis=1),
+                                  cells.shape[1], cells.shape[0],
+                                  self.x, self.y, self.name)
+        self._transforms[name] = pattern
+        return pattern
+
+    @property
+    def transforms(self):
+        '''
+        Dictionary of all eight transforms of the pattern, by name.
+        '''
+        return dict((name, self.transform(name)) for name in TRANSFORMS)
+
+
+def textCells(text, rule=None, eol='\n'):
+    '''
+    :param: text - plaintext string
+    :param: rule - optional function with signature 'f(x) returns boolean'
+    :param: eol  - optional character that marks the end of a line in
+                   the string
+    :return: tuple (cells, present) of a uint8 array with shape
+             (lines, longest line), one for the characters the rule
+             calls alive, and a boolean array of the same shape, True
+             where the line has a character
+
+    The text is converted to an array of code points once and the rule
+    is called once per distinct character.
+    '''
+    if rule is None:
+        rule = lambda c: not c.isspace()
+
+    lines = text.split(eol)
+    lengths = np.array([len(l) for l in lines])
+    width = int(lengths.max())
+    padded = ''.join(l.ljust(width) for l in lines)
+    codes = np.frombuffer(padded.encode('utf-32-le'), dtype='<u4')
+
+    chars = sorted(set(padded))
+    alive = np.array([bool(rule(c)) for c in chars], dtype=np.uint8)
+    index = np.searchsorted(np.array([ord(c) for c in chars]), codes)
+
+    present = np.arange(width) < lengths[:, None]
+    cells = alive[index].reshape(present.shape) * present
+    return cells, present
+
+
+def decode(pattern, rule=None, eol='\n'):
+    '''
+    :param: pattern - plaintext string or Pattern
+    :param: rule    - optional function with signature 'f(x) returns boolean'
+    :param: eol     - optional character that marks the end of a line in
+                      the string
+    :return: CompiledPattern
+    '''
+    if isinstance(pattern, Pattern):
+        header, runs = pattern.read()
+        cells = np.zeros((header.height, header.width), dtype=np.uint8)
+        for x, y, n in runs:
+            cells[y, x:x + n] = 1
+        return CompiledPattern.fromCells(cells, name=pattern.name)
+
+    return CompiledPattern.fromCells(textCells(pattern, rule, eol)[0])
+
+
+class PatternCache(object):
+    '''
+    Compiles patterns once and keeps them, keyed by a hash of their
+    content.
+
+    >>> cache = PatternCache('/var/cache/life')
+    >>> glider = cache.compile('glider')
+
+    If a directory is given compiled patterns are also saved there,
+    one file per pattern, and read back by later processes instead of
+    being decoded again.
+    '''
+
+    def __init__(self, directory=None):
+        '''
+        :param: directory - optional string, where to keep compiled
+                            patterns on disk
+        '''
+        self.directory = directory
+        self._patterns = {}
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def clear(self):
+        '''
+        Forgets the patterns kept in memory.
+        '''
+        self._patterns.clear()
+
+    def key(self, pattern, eol='\n'):
+        '''
+        :param: pattern - plaintext string or Pattern
+        :param: eol     - optional string
+        :return: string, hex digest of the pattern's content
+        '''
+        if isinstance(pattern, Pattern):
+            content = '\0'.join([pattern.format, pattern.data])
+        else:
+            content = '\0'.join(['life', eol, pattern])
+        return hashlib.blake2b(content.encode('utf-8'),
+                               digest_size=16).hexdigest()
+
+    def compile(self, pattern, rule=None, eol='\n'):
+        '''
+        :param: pattern - name of a bundled pattern, plaintext string,
+                          Pattern or CompiledPattern
+        :param: rule    - optional function with signature
+                          'f(x) returns boolean', patterns decoded with
+                          a rule are not cached
+        :param: eol     - optional character that marks the end of a line
+                          in the string
+        :return: CompiledPattern with all of its transforms computed
+        '''
+        if isinstance(pattern, CompiledPattern):
+            return pattern
+
+        name = None
+        if pattern in Patterns:
+            name, pattern = pattern, Patterns[pattern]
+
+        if rule is not None:
+            return decode(pattern, rule, eol)
+
+        key = self.key(pattern, eol)
+        try:
+            return self._patterns[key]
+        except KeyError:
+            pass
+
+        compiled = self._load(key)
+        if compiled is None:
+            compiled = decode(pattern, eol=eol)
+            self._save(key, compiled)
+        compiled.name = name or compiled.name
+        compiled.transforms
+        self._patterns[key] = compiled
+        return compiled
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _load(self, key):
+        '''
+        :return: CompiledPattern read from the directory or None
+        '''
+        if self.directory is None:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                width, height, x, y = data['bounds'].tolist()
+                return CompiledPattern(data['bits'], width, height, x, y)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key, compiled):
+        '''
+        Writes compiled to the directory, replacing the file in one
+        step so readers never see a partial file.
+        '''
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, bits=compiled.bits,
+                         bounds=np.array([compiled.width, compiled.height,
+                                          compiled.x, compiled.y]))
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+cache = PatternCache(os.environ.get('GAMEOFLIFE_PATTERN_CACHE'))
+
+
+def compilePattern(pattern, rule=None, eol='\n'):
+    '''
+    :param: pattern - name of a bundled pattern, plaintext string,
+                      Pattern or CompiledPattern
+    :param: rule    - optional function with signature 'f(x) returns boolean'
+    :param: eol     - optional character that marks the end of a line in
+                      the string
+    :return: CompiledPattern, see PatternCache.compile
+    '''
+    return cache.compile(pattern, rule, eol)
+
+
+class Placements(object):
+    '''
+    The cells touched by a batch of pattern placements, see
+    placements.
+
+    cleared, born and toggled are tuples (xs, ys) of integer arrays of
+    absolute coordinates, not wrapped to any board. Engines apply them
+    in that order: the cleared cells die, the born cells come to life
+    and the toggled cells flip once for every time they are listed.
+    '''
+
+    def __init__(self, cleared, born, toggled):
+        '''
+        :param: cleared - tuple of arrays (xs, ys)
+        :param: born    - tuple of arrays (xs, ys)
+        :param: toggled - tuple of arrays (xs, ys)
+        '''
+        self.cleared = cleared
+        self.born = born
+        self.toggled = toggled
+
+    @property
+    def touched(self):
+        '''
+        Tuple of arrays (xs, ys) of every cell listed, with repeats.
+        '''
+        return _concat([self.cleared, self.born, self.toggled])
+
+
+def _concat(pairs):
+    '''
+    :param: pairs - list of tuples of arrays (xs, ys)
+    :return: tuple of arrays (xs, ys)
+    '''
+    if not pairs:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    return (np.concatenate([xs for xs, ys in pairs]),
+            np.concatenate([ys for xs, ys in pairs]))
+
+
+def placements(items, size=None):
+    '''
+    :param: items - iterable of tuples (pattern, (x, y)),
+                    (pattern, (x, y), transform) or
+                    (pattern, (x, y), transform, mode)
+    :param: size  - optional tuple (width, height) of a board whose
+                    edges wrap
+    :return: Placements
+
+    Patterns are anything compilePattern accepts, transform is one of
+    TRANSFORMS and mode one of MODES, defaulting to 'identity' and OR.
+
+    Items that place the same compiled pattern with the same mode are
+    expanded together with one broadcast. Overlapping placements
+    combine as if the items were placed one at a time, in order: each
+    cell takes the state of the last OVERWRITE or OR that sets it and
+    then flips for every XOR after that. The coordinates are wrapped
+    to size first, if given, so placements that meet across an edge
+    combine the same way.
+    '''
+    groups = {}
+    known = {}
+    for order, item in enumerate(items):
+        pattern, position = item[0], item[1]
+        transform = item[2] if len(item) > 2 and item[2] else 'identity'
+        mode = item[3] if len(item) > 3 and item[3] else OR
+        if mode not in MODES:
+            msg = 'unknown mode {!r}, expecting one of {}'
+            raise ValueError(msg.format(mode, MODES))
+        try:
+            compiled = known[pattern, transform]
+        except KeyError:
+            compiled = compilePattern(pattern).transform(transform)
+            known[pattern, transform] = compiled
+        key = (id(compiled), mode)
+        group = groups.setdefault(key, (compiled, mode, [], []))
+        group[2].append(position)
+        group[3].append(order)
+
+    sets, toggles = [], []
+    for compiled, mode, positions, orders in groups.values():
+        corners = np.array(positions, dtype=np.int64).reshape(-1, 2)
+        xs = corners[:, 0:1] + compiled.x
+        ys = corners[:, 1:2] + compiled.y
+
+        if mode == OVERWRITE:
+            boxYs, boxXs = np.indices((compiled.height, compiled.width))
+            values = compiled.cells.ravel().astype(bool)
+            cellYs, cellXs = boxYs.ravel(), boxXs.ravel()
+        else:
+            cellYs, cellXs = np.nonzero(compiled.cells)
+            values = np.ones(len(cellXs), dtype=bool)
+        events = ((xs + cellXs).ravel(), (ys + cellYs).ravel(),
+                  np.repeat(np.array(orders, dtype=np.int64), len(cellXs)),
+                  np.tile(values, len(orders)))
+        (toggles if mode == XOR else sets).append(events)
+
+    sets = _events(sets, size)
+    toggles = _events(toggles, size)
+    if not len(sets[0]) or (not len(toggles[0]) and sets[3].all()):
+        # only flips, or only cells brought to life: the order of the
+        # items does not matter
+        nothing = np.zeros(0, dtype=np.int64)
+        return Placements((nothing, nothing), sets[:2], toggles[:2])
+    return _resolve(sets, toggles)
+
+
+def _events(events, size):
+    '''
+    :param: events - list of tuples of arrays (xs, ys, orders, values)
+    :param: size   - tuple (width, height) or None
+    :return: tuple of arrays (xs, ys, orders, values)
+    '''
+    if not events:
+        empty = np.zeros(0, dtype=np.int64)
+        return (empty, empty, empty, np.zeros(0, dtype=bool))
+    xs, ys, orders, values = [np.concatenate(a) for a in zip(*events)]
+    if size is not None:
+        xs = xs % size[0]
+        ys = ys % size[1]
+    return (xs, ys, orders, values)
+
+
+def _resolve(sets, toggles):
+    '''
+    :param: sets    - tuple of arrays (xs, ys, orders, values) of the
+                      cells set by OVERWRITE and OR items
+    :param: toggles - tuple of arrays (xs, ys, orders, values) of the
+                      cells flipped by XOR items
+    :return: Placements
+
+    Keeps the last set of every cell and the flips that come after it.
+    '''
+    xs = np.concatenate([sets[0], toggles[0]])
+    ys = np.concatenate([sets[1], toggles[1]])
+    x0, y0 = xs.min(), ys.min()
+    keys = (ys - y0) * (xs.max() - x0 + 1) + (xs - x0)
+    setKeys, toggleKeys = keys[:len(sets[0])], keys[len(sets[0]):]
+
+    order = np.lexsort((sets[2], setKeys))
+    sortedKeys = setKeys[order]
+    last = order[np.append(sortedKeys[1:] != sortedKeys[:-1], True)]
+    lastKeys = setKeys[last]
+
+    at = np.minimum(np.searchsorted(lastKeys, toggleKeys), len(last) - 1)
+    after = np.where(lastKeys[at] == toggleKeys, sets[2][last][at], -1)
+    flips = toggles[2] > after
+
+    setXs, setYs, values = sets[0][last], sets[1][last], sets[3][last]
+    return Placements((setXs[~values], setYs[~values]),
+                      (setXs[values], setYs[values]),
+                      (toggles[0][flips], toggles[1][flips]))
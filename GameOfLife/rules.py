@@ -0,0 +1,159 @@
+'''Conway's Game of Life
+
+Life-like rules written as B/S rulestrings.
+
+A rulestring lists the live neighbor counts that give birth to a dead
+cell and the counts that let a live cell survive: 'B3/S23' is
+Conway's rule, 'B36/S23' is HighLife and 'B2/S' is Seeds. The older
+'S/B' spelling, '23/3', is accepted as well.
+
+'''
+
+import re
+
+_RULESTRINGS = [
+    re.compile(r'^B(?P<born>[0-8]*)/?S(?P<survive>[0-8]*)$', re.IGNORECASE),
+    re.compile(r'^S(?P<survive>[0-8]*)/?B(?P<born>[0-8]*)$', re.IGNORECASE),
+    re.compile(r'^(?P<survive>[0-8]*)/(?P<born>[0-8]*)$')]
+
+
+class Rule(object):
+    '''
+    A Life-like rule compiled into a lookup table.
+
+    >>> r = Rule.fromString('B36/S23')
+    >>> r.table[alive][aliveNeighbors]
+    1
+
+    The table has two rows of nine entries, indexed first by the
+    current state of a cell, 0 or 1, and then by its number of live
+    neighbors. Each entry is the state of the cell in the next
+    generation, so applying the rule is a single lookup. Engines copy
+    the table into whatever form suits them once, when the rule is
+    set.
+
+    Rules are immutable, compare equal when they have the same table
+    and may be used as dictionary keys.
+    '''
+
+    _compiled = {}
+
+    def __init__(self, born=(3,), survive=(2, 3)):
+        '''
+        :param: born    - optional list of neighbor counts that give birth
+        :param: survive - optional list of neighbor counts that sustain life
+
+        Will raise a ValueError if a count is not between 0 and 8.
+        '''
+        born = tuple(sorted(set(int(n) for n in born)))
+        survive = tuple(sorted(set(int(n) for n in survive)))
+
+        for n in born + survive:
+            if not 0 <= n <= 8:
+                msg = 'neighbor counts must be between 0 and 8, got {}'
+                raise ValueError(msg.format(n))
+
+        self._born = born
+        self._survive = survive
+        self._table = (tuple(int(n in born) for n in range(9)),
+                       tuple(int(n in survive) for n in range(9)))
+
+    @classmethod
+    def fromString(cls, rulestring):
+        '''
+        :param: rulestring - string, e.g. 'B3/S23'
+        :return: Rule
+
+        Will raise a ValueError if the string is not a rulestring.
+        '''
+        for pattern in _RULESTRINGS:
+            match = pattern.match(rulestring.strip())
+            if match:
+                return cls(map(int, match.group('born')),
+                           map(int, match.group('survive')))
+
+        msg = 'expecting a rulestring like B3/S23, got {!r}'
+        raise ValueError(msg.format(rulestring))
+
+    @classmethod
+    def compile(cls, rule):
+        '''
+        :param: rule - Rule, rulestring or None for Conway's rule
+        :return: Rule
+
+        Rulestrings are parsed once and the compiled rules shared.
+        '''
+        if rule is None:
+            return LIFE
+
+        if isinstance(rule, Rule):
+            return rule
+
+        try:
+            return cls._compiled[rule]
+        except KeyError:
+            pass
+        compiled = cls.fromString(rule)
+        cls._compiled[rule] = compiled
+        return compiled
+
+    @property
+    def born(self):
+        '''
+        Tuple of the neighbor counts that give birth.
+        '''
+        return self._born
+
+    @property
+    def survive(self):
+        '''
+        Tuple of the neighbor counts that sustain life.
+        '''
+        return self._survive
+
+    @property
+    def table(self):
+        '''
+        The lookup table, table[state][aliveNeighbors] is the next state.
+        '''
+        return self._table
+
+    def __str__(self):
+        '''
+        The rule as a B/S rulestring.
+        '''
+        return 'B{}/S{}'.format(''.join(map(str, self.born)),
+                                ''.join(map(str, self.survive)))
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(born={self.born!r},',
+             'survive={self.survive!r})']
+
+        return ''.join(s).format(self=self)
+
+    def __eq__(self, other):
+        '''
+        '''
+        try:
+            return self.table == other.table
+        except AttributeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        '''
+        '''
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        '''
+        '''
+        return hash(self.table)
+
+
+LIFE = Rule((3,), (2, 3))
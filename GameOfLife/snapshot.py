@@ -0,0 +1,241 @@
+'''Conway's Game of Life
+
+Binary snapshots of a board.
+
+A snapshot is a fixed size header followed by the board as one
+array, so it can be opened with np.memmap: opening reads only the
+header, whatever the size of the board, and the cells are paged in
+from the file as they are used.
+
+The header records the position of the board's top left corner.
+Bounded worlds save their board at 0,0; unbounded worlds save the
+smallest box that holds their viewport and every live cell, which
+may start at negative coordinates. Unbounded worlds restore the
+cells at their position, bounded worlds place the box at 0,0.
+
+>>> w.save('board.gols')
+>>> copy = NumpyWorld.open('board.gols')
+
+The payload is stored in one of three encodings:
+
+- 'bits'  one bit per cell, each row packed into little-endian
+          64-bit words, bit i of word j holding column 64 * j + i;
+          the layout of BitWorld.bits
+- 'uint8' one byte per cell, the age of the cell capped at 255
+- 'int64' eight bytes per cell, the age of the cell; the layout of
+          NumpyWorld.cells
+
+'''
+
+import struct
+
+import numpy as np
+
+from . import formats
+
+MAGIC = b'GOLS'
+VERSION = 1
+
+ENCODINGS = {'bits': np.dtype('<u8'),
+             'uint8': np.dtype('u1'),
+             'int64': np.dtype('<i8')}
+
+# magic, version, encoding, width, height, generation, rule, x, y
+_HEADER = struct.Struct('<4sH6sQQq64sqq')
+
+# the payload starts on a cache line so memory maps of it are aligned
+OFFSET = 128
+
+
+def pack(alive):
+    '''
+    :param: alive - two dimensional array, nonzero for live cells
+    :return: array of uint64 with shape (height, words), see 'bits'
+    '''
+    h, w = alive.shape
+    octets = np.zeros((h, ((w + 63) // 64) * 8), dtype=np.uint8)
+    octets[:, :(w + 7) // 8] = np.packbits(alive != 0, axis=-1,
+                                           bitorder='little')
+    return octets.view('<u8')
+
+
+def unpack(bits, width):
+    '''
+    :param: bits  - array of uint64 with shape (height, words)
+    :param: width - integer, number of cells in a row
+    :return: array of zeros and ones with shape (height, width)
+    '''
+    octets = np.ascontiguousarray(bits, dtype='<u8').view(np.uint8)
+    return np.unpackbits(octets, axis=-1, bitorder='little')[:, :width]
+
+
+def encode(cells, encoding='bits'):
+    '''
+    :param: cells    - two dimensional array of ages, zero for dead cells
+    :param: encoding - optional string, one of ENCODINGS
+    :return: array holding the cells in the encoding
+    '''
+    if encoding == 'bits':
+        return pack(cells)
+    if encoding == 'uint8':
+        return np.minimum(cells, 255).astype(np.uint8)
+    if encoding == 'int64':
+        return np.ascontiguousarray(cells, dtype='<i8')
+    raise ValueError('unknown snapshot encoding {!r}'.format(encoding))
+
+
+def write(fileobj, payload, encoding, width, height, generation=0, rule=None,
+          x=0, y=0):
+    '''
+    :param: fileobj    - binary file-like object or path
+    :param: payload    - array in the encoding, see encode
+    :param: encoding   - string, one of ENCODINGS
+    :param: width      - integer
+    :param: height     - integer
+    :param: generation - optional integer
+    :param: rule       - optional rulestring
+    :param: x          - optional integer, column of the top left corner
+    :param: y          - optional integer, row of the top left corner
+    :return: number of bytes written
+
+    The payload is written from its buffer without being copied.
+    '''
+    if not hasattr(fileobj, 'write'):
+        with open(fileobj, 'wb') as f:
+            return write(f, payload, encoding, width, height,
+                         generation, rule, x, y)
+
+    if encoding not in ENCODINGS:
+        raise ValueError('unknown snapshot encoding {!r}'.format(encoding))
+
+    rule = (rule or '').encode('ascii')
+    if len(rule) > 64:
+        raise ValueError('rulestring too long for a snapshot: {!r}'.format(
+            rule.decode('ascii')))
+
+    header = _HEADER.pack(MAGIC, VERSION, encoding.encode('ascii'),
+                          width, height, generation, rule, x, y)
+    payload = np.ascontiguousarray(payload, dtype=ENCODINGS[encoding])
+    nbytes = fileobj.write(header.ljust(OFFSET, b'\0'))
+    nbytes += fileobj.write(memoryview(payload).cast('B'))
+    return nbytes
+
+
+class Snapshot(object):
+    '''
+    A snapshot opened from a file.
+
+    >>> s = Snapshot('board.gols')
+    >>> s.width, s.height, s.generation
+    (4096, 4096, 1000)
+    >>> s.alive
+
+    The payload, data, is a memory map of the file with the given
+    mode: 'r' read-only, 'c' copy-on-write, changes are kept in memory,
+    and 'r+' changes are written to the file. File-like objects that
+    are not files are read into memory instead.
+    '''
+
+    def __init__(self, fileobj, mode='r'):
+        '''
+        :param: fileobj - binary file-like object or path
+        :param: mode    - optional string, 'r', 'c' or 'r+'
+        '''
+        self.mode = mode
+
+        if hasattr(fileobj, 'read'):
+            fileobj.seek(0)
+            raw = fileobj.read(OFFSET)
+        else:
+            with open(fileobj, 'rb') as f:
+                raw = f.read(OFFSET)
+
+        if len(raw) < OFFSET:
+            raise ValueError('not a GameOfLife snapshot')
+        (magic, version, encoding, width, height,
+         generation, rule, x, y) = _HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError('not a GameOfLife snapshot')
+        if version != VERSION:
+            raise ValueError('unsupported snapshot version {}'.format(version))
+
+        self.encoding = encoding.rstrip(b'\0').decode('ascii')
+        self.width = width
+        self.height = height
+        self.generation = generation
+        self.rule = rule.rstrip(b'\0').decode('ascii') or None
+        self.x = x
+        self.y = y
+
+        if self.encoding not in ENCODINGS:
+            raise ValueError('unknown snapshot encoding {!r}'.format(
+                self.encoding))
+
+        dtype = ENCODINGS[self.encoding]
+        if self.encoding == 'bits':
+            shape = (height, (width + 63) // 64)
+        else:
+            shape = (height, width)
+
+        try:
+            self.data = np.memmap(fileobj, dtype=dtype, mode=mode,
+                                  offset=OFFSET, shape=shape)
+        except (AttributeError, OSError, ValueError):
+            # a file-like object without a file behind it
+            fileobj.seek(OFFSET)
+            count = shape[0] * shape[1]
+            buf = bytearray(fileobj.read(count * dtype.itemsize))
+            data = np.frombuffer(buf, dtype=dtype, count=count)
+            self.data = data.reshape(shape)
+            self.data.flags.writeable = mode != 'r'
+
+    def __repr__(self):
+        '''
+        '''
+        s = ['{self.__class__.__name__}',
+             '(width={self.width},',
+             'height={self.height},',
+             'generation={self.generation},',
+             'encoding={self.encoding!r})']
+
+        return ''.join(s).format(self=self)
+
+    @property
+    def header(self):
+        '''
+        A formats.Header describing the board: its size, the position
+        of its top left corner and its rule.
+        '''
+        return formats.Header(self.width, self.height, self.x, self.y,
+                              self.rule)
+
+    @property
+    def alive(self):
+        '''
+        Array of zeros and ones with shape (height, width), one for
+        live cells.
+        '''
+        if self.encoding == 'bits':
+            return unpack(self.data, self.width)
+        return (self.data > 0).view(np.uint8)
+
+    @property
+    def ages(self):
+        '''
+        Array of int64 ages with shape (height, width). For 'int64'
+        snapshots this is the memory map itself; the cells of 'bits'
+        snapshots have an age of one.
+        '''
+        if self.encoding == 'int64':
+            return self.data
+        if self.encoding == 'bits':
+            return self.alive.astype(np.int64)
+        return self.data.astype(np.int64)
+
+    def flush(self):
+        '''
+        Writes changes to a memory map opened with mode 'r+' to the file.
+        '''
+        flush = getattr(self.data, 'flush', None)
+        if flush is not None:
+            flush()
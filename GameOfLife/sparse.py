@@ -0,0 +1,442 @@
+'''Conway's Game of Life
+
+An unbounded world that only stores the coordinates of live cells.
+
+'''
+
+import hashlib
+
+import numpy as np
+
+from .world import World, NumpyWorld, pointRuns, placeRuns, coverBox
+from . import snapshot
+from .formats import Header
+from .rules import Rule
+from .patterns import Patterns as BuiltinPatterns, Pattern
+from .patterns.compiled import CompiledPattern, placements, textCells
+
+# coordinates are packed into a single int64, y in the high word
+_BIAS = 1 << 30
+_SHIFT = 32
+_XMASK = (1 << _SHIFT) - 1
+
+_NEIGHBOR_OFFSETS = np.array([(dy << _SHIFT) + dx
+                              for dy in (-1, 0, 1)
+                              for dx in (-1, 0, 1)
+                              if dx or dy], dtype=np.int64)
+
+
+def pack(xs, ys):
+    '''
+    :param: xs - array of integer x coordinates
+    :param: ys - array of integer y coordinates
+    :return: array of int64 keys
+
+    Coordinates must lie in [-2**30, 2**30). Sorting keys orders
+    cells by row and then by column.
+    '''
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    return ((ys + _BIAS) << _SHIFT) | (xs + _BIAS)
+
+
+def unpack(keys):
+    '''
+    :param: keys - array of int64 keys
+    :return: tuple of arrays (xs, ys)
+    '''
+    keys = np.asarray(keys, dtype=np.int64)
+    return (keys & _XMASK) - _BIAS, (keys >> _SHIFT) - _BIAS
+
+
+class SparseWorld(NumpyWorld):
+    '''
+    An unbounded game World that stores only its live cells.
+
+    >>> w = SparseWorld()
+    >>> w.addPattern('acorn')
+    >>> w.step()
+
+    Live cells are kept as a sorted array of packed coordinates with
+    a parallel array of ages. Each generation the eight neighbor keys
+    of every live cell are generated in one array operation and
+    counted with np.unique, so the cost of a step and the memory used
+    scale with the population rather than the area of the board.
+
+    The width and height describe the viewport, anchored at (0,0),
+    that is rendered by __str__ and returned by cells. The world
+    itself has no edges; coordinates must lie in [-2**30, 2**30).
+    '''
+
+    def __init__(self, width=80, height=23, rulestring=None):
+        '''
+        :param: width      - integer, viewport width
+        :param: height     - integer, viewport height
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+
+        Will raise a ValueError for rules with births on zero
+        neighbors, which would fill the unbounded world.
+        '''
+        super(SparseWorld, self).__init__(width, height, rulestring)
+        self.reset()
+
+    @NumpyWorld.rule.setter
+    def rule(self, newValue):
+        rule = Rule.compile(newValue)
+        if 0 in rule.born:
+            msg = '{} cannot play {}, it gives birth on zero neighbors'
+            raise ValueError(msg.format(self.__class__.__name__, rule))
+        NumpyWorld.rule.fset(self, rule)
+
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        See World.resize, the universe is unbounded so only the
+        viewport changes.
+        '''
+        self.width, self.height = int(width), int(height)
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - removes all live cells
+        '''
+        self.generation = 0
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.ages = np.zeros(0, dtype=np.int64)
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return len(self.keys)
+
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations. The
+        cost of a step already follows the population, so this is a
+        plain loop over step.
+        '''
+        World.advance(self, generations)
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        The sorted keys of the live cells are hashed.
+        '''
+        return hashlib.blake2b(self.keys.tobytes(), digest_size=16).digest()
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles.
+        '''
+        self.ages[self.ages >= period] += generations
+        self.generation += generations
+
+    @property
+    def alive(self):
+        '''
+        Returns a list of (x,y) coordinates of cells that are alive.
+        '''
+        xs, ys = unpack(self.keys)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    @property
+    def cells(self):
+        '''
+        The ages of the cells in the viewport as an array with shape
+        (height, width). Changing it does not change the world.
+        '''
+        cells = np.zeros((self.height, self.width), dtype=np.int64)
+        xs, ys = unpack(self.keys)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        cells[ys[inside], xs[inside]] = self.ages[inside]
+        return cells
+
+    @property
+    def header(self):
+        '''
+        A formats.Header with the bounding box of the live cells.
+        '''
+        xs, ys = unpack(self.keys)
+        if not len(xs):
+            return Header(rule=str(self.rule))
+        return Header(xs.max() - xs.min() + 1, ys.max() - ys.min() + 1,
+                      xs.min(), ys.min(), str(self.rule))
+
+    def runs(self):
+        '''
+        See World.runs, the coordinates are absolute.
+        '''
+        return pointRuns(*unpack(self.keys))
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: None
+
+        Brings the cells covered by the runs, offset by x,y, to life.
+        The runs are expanded to keys with array operations and merged
+        into the world in one pass.
+        '''
+        runs = np.array(list(runs), dtype=np.int64).reshape(-1, 3)
+        lengths = runs[:, 2]
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        xs = np.repeat(runs[:, 0] + x, lengths) + (np.arange(len(offsets)) -
+                                                   offsets)
+        ys = np.repeat(runs[:, 1] + y, lengths)
+        born = np.unique(pack(xs, ys))
+
+        keep = ~np.isin(self.keys, born)
+        keys = np.concatenate([self.keys[keep], born])
+        ages = np.concatenate([self.ages[keep],
+                               np.ones(len(born), np.int64)])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ages = ages[order]
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :return: None
+
+        Places many patterns at once. The placements are turned into
+        keys and merged into the world with set operations on sorted
+        arrays: cleared keys are removed, born keys added and keys
+        toggled an odd number of times flipped.
+        '''
+        p = placements(items)
+        keys, ages = self.keys, self.ages
+
+        keep = ~np.isin(keys, pack(*p.cleared))
+        keys, ages = keys[keep], ages[keep]
+
+        born = np.setdiff1d(pack(*p.born), keys)
+        keys = np.concatenate([keys, born])
+        ages = np.concatenate([ages, np.ones(len(born), np.int64)])
+
+        toggled, counts = np.unique(pack(*p.toggled), return_counts=True)
+        toggled = toggled[counts % 2 == 1]
+        alive = np.isin(keys, toggled)
+        born = np.setdiff1d(toggled, keys[alive], assume_unique=True)
+        keys = np.concatenate([keys[~alive], born])
+        ages = np.concatenate([ages[~alive], np.ones(len(born), np.int64)])
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ages = ages[order]
+
+    def _stamp(self, pattern, x, y):
+        '''
+        :param: pattern - CompiledPattern
+        :param: x - integer
+        :param: y - integer
+        :return: None
+
+        Replaces the cells in the pattern's bounding box, placed at x,y,
+        with the pattern's live cells in one merge.
+        '''
+        x += pattern.x
+        y += pattern.y
+        xs, ys = unpack(self.keys)
+        inside = ((xs >= x) & (xs < x + pattern.width) &
+                  (ys >= y) & (ys < y + pattern.height))
+        bornYs, bornXs = np.nonzero(pattern.cells)
+        born = pack(bornXs + x, bornYs + y)
+
+        keys = np.concatenate([self.keys[~inside], born])
+        ages = np.concatenate([self.ages[~inside],
+                               np.ones(len(born), np.int64)])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ages = ages[order]
+
+    def restore(self, snap):
+        '''
+        See World.restore, the live cells of the snapshot are placed
+        at the position the snapshot records and the viewport is left
+        as it is.
+        '''
+        World.restore(self, snap)
+
+    def _snapshotBox(self):
+        '''
+        See World._snapshotBox, the viewport grown to hold every live
+        cell, see coverBox.
+        '''
+        return coverBox(self.header, self.width, self.height)
+
+    def _snapshotPayload(self, encoding):
+        '''
+        See World._snapshotPayload, the live cells are placed in the
+        box of _snapshotBox rather than the viewport.
+        '''
+        box = self._snapshotBox()
+        mask = np.zeros((box.height, box.width), dtype=np.uint8)
+        placeRuns(mask, self.runs(), -box.x, -box.y)
+        return snapshot.encode(mask, encoding)
+
+    def load(self, header, runs):
+        '''
+        :param: header - formats.Header
+        :param: runs   - iterable of runs relative to the top left
+                         corner of the pattern
+
+        Replaces the live cells with the pattern placed at header.x,
+        header.y and adopts the pattern's rule if it names one. The
+        viewport is left as it is.
+        '''
+        if header.rule:
+            self.rule = header.rule
+        self.reset()
+        self.addRuns(runs, header.x, header.y)
+
+    def _warp(self, key):
+        '''
+        The world is unbounded, coordinates are not wrapped.
+        '''
+        x, y = map(int, key)
+        return x, y
+
+    def _find(self, key):
+        '''
+        :param: key - tuple of x,y integer values
+        :return: tuple of the packed key, its insertion index in keys
+                 and a boolean that is True if the cell is alive
+        '''
+        x, y = self._warp(key)
+        k = int(pack(x, y))
+        i = int(np.searchsorted(self.keys, k))
+        return k, i, i < len(self.keys) and self.keys[i] == k
+
+    def __getitem__(self, key):
+        '''
+        '''
+        k, i, found = self._find(key)
+        return int(self.ages[i]) if found else 0
+
+    def __setitem__(self, key, value):
+        '''
+        '''
+        k, i, found = self._find(key)
+        if found and not value:
+            self.keys = np.delete(self.keys, i)
+            self.ages = np.delete(self.ages, i)
+        elif found:
+            self.ages[i] = value
+        elif value:
+            self.keys = np.insert(self.keys, i, k)
+            self.ages = np.insert(self.ages, i, value)
+
+    def addPattern(self, pattern, x=0, y=0, rule=None, eol='\n', resize=False):
+        '''
+        :param: pattern - string, Pattern or CompiledPattern
+        :param: x - optional integer
+        :param: y - optional integer
+        :param: rule - optional function with signature 'f(x) returns boolean'
+        :param: eol - optional character that marks the end of a line in
+                      the string
+        :param: resize - optional boolean, resizes the viewport to pattern
+
+        :return: tuple of arrays (ys, xs) of the positions covered by a
+                 string, None for a Pattern or CompiledPattern
+
+        Every position covered by the pattern string is set alive or
+        dead; the string is converted to an array once, see textCells,
+        and its live cells are merged into the world in one pass.
+        '''
+        try:
+            pattern = BuiltinPatterns[pattern]
+        except KeyError:
+            pass
+
+        if isinstance(pattern, Pattern):
+            header, runs = pattern.read()
+            if resize:
+                self.width, self.height = header.width, header.height
+                self.reset()
+            self.addRuns(runs, x, y)
+            return None
+
+        if isinstance(pattern, CompiledPattern):
+            if resize:
+                self.width = pattern.x + pattern.width
+                self.height = pattern.y + pattern.height
+                self.reset()
+            self._stamp(pattern, x, y)
+            return None
+
+        cells, present = textCells(pattern, rule, eol)
+
+        if resize:
+            self.height, self.width = cells.shape
+            self.reset()
+
+        ys, xs = np.nonzero(present)
+        xs += x
+        ys += y
+        alive = cells[present] != 0
+
+        # the live cells at positions the string covers are replaced
+        h, w = cells.shape
+        kxs, kys = unpack(self.keys)
+        kxs, kys = kxs - x, kys - y
+        inside = (kxs >= 0) & (kxs < w) & (kys >= 0) & (kys < h)
+        keep = ~inside
+        keep[inside] = ~present[kys[inside], kxs[inside]]
+        born = pack(xs[alive], ys[alive])
+        keys = np.concatenate([self.keys[keep], born])
+        ages = np.concatenate([self.ages[keep], np.ones(len(born), np.int64)])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ages = ages[order]
+
+        return ys, xs
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation.
+
+        Every live cell contributes its eight neighbor keys, np.unique
+        turns them into a sorted list of candidate cells with their
+        live neighbor counts and the rule is applied to the candidates
+        with array operations.
+        '''
+        keys = self.keys
+        self.generation += 1
+
+        if len(keys) == 0:
+            return
+
+        neighbors = (keys[:, None] + _NEIGHBOR_OFFSETS).ravel()
+        if self.lookup[1, 0]:
+            # live cells without neighbors survive, count them too
+            neighbors = np.concatenate([neighbors, keys])
+        candidates, counts = np.unique(neighbors, return_counts=True)
+
+        index = np.searchsorted(keys, candidates)
+        index[index == len(keys)] = 0
+        wasAlive = keys[index] == candidates
+
+        if self.lookup[1, 0]:
+            counts -= wasAlive
+
+        nextAlive = self.lookup[wasAlive.view(np.uint8), counts] > 0
+
+        ages = np.where(wasAlive, self.ages[index] + 1, 1)
+
+        self.keys = candidates[nextAlive]
+        self.ages = ages[nextAlive]
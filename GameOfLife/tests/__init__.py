@@ -5,8 +5,34 @@
 from .test_cell import CellTestCase
 from .test_world import WorldTestCase, OptimizedWorldTestCase
 from .test_patterns import PatternsTestCase
+from .test_bitworld import BitWorldTestCase
+from .test_hashlife import HashLifeWorldTestCase
+from .test_sparse import SparseWorldTestCase
+from .test_arrayworld import ArrayWorldTestCase
+from .test_neighbors import NeighborTableTestCase
+from .test_parallel import ParallelNumpyWorldTestCase
+from .test_batch import BatchWorldTestCase
+from .test_rules import RuleTestCase
+from .test_cycles import CycleDetectorTestCase
+from .test_formats import FormatsTestCase
+from .test_compiled import CompiledPatternTestCase
+from .test_history import HistoryTestCase
+from .test_snapshot import SnapshotTestCase
 
 __all__ = ['CellTestCase',
            'WorldTestCase',
            'OptimizedWorldTestCase',
-           'PatternsTestCase']
+           'PatternsTestCase',
+           'BitWorldTestCase',
+           'HashLifeWorldTestCase',
+           'SparseWorldTestCase',
+           'ArrayWorldTestCase',
+           'NeighborTableTestCase',
+           'ParallelNumpyWorldTestCase',
+           'BatchWorldTestCase',
+           'RuleTestCase',
+           'CycleDetectorTestCase',
+           'FormatsTestCase',
+           'CompiledPatternTestCase',
+           'HistoryTestCase',
+           'SnapshotTestCase']
@@ -0,0 +1,82 @@
+
+import time
+import unittest
+
+from GameOfLife import Cell
+from GameOfLife.cell import CellView
+from GameOfLife.world import World
+from GameOfLife.arrayworld import ArrayWorld
+
+
+class ColorCell(Cell):
+
+    @property
+    def color(self):
+        if not self.alive:
+            return (0, 0, 0)
+        return (self.age, self.age, self.age)
+
+
+class ArrayWorldTestCase(unittest.TestCase):
+
+    def testArrayWorldCreation(self):
+        world = ArrayWorld(width=10, height=5)
+        self.assertIsInstance(world, World)
+        self.assertEqual(len(world.cells), 50)
+        self.assertEqual(len(world.states), 50)
+        self.assertEqual(len(world.alive), 0)
+
+        with self.assertRaises(TypeError):
+            ArrayWorld(CellClass=object)
+
+    def testConstructionIsFast(self):
+        t0 = time.time()
+        world = ArrayWorld(width=2000, height=2000)
+        world.step()
+        self.assertLess(time.time() - t0, 5)
+        self.assertEqual(world.states.nbytes, 2000 * 2000)
+
+    def testCellViews(self):
+        world = ArrayWorld(width=10, height=10, CellClass=ColorCell)
+        cell = world[3, 4]
+        self.assertIsInstance(cell, ColorCell)
+        self.assertIsInstance(cell, CellView)
+        self.assertEqual(cell.location, (3, 4))
+        self.assertFalse(cell.alive)
+
+        cell.alive = True
+        cell.age = 7
+        self.assertTrue(world[3, 4].alive)
+        self.assertEqual(world[13, 14].age, 7)
+        self.assertEqual(world[3, 4].color, (7, 7, 7))
+        self.assertEqual(world[3, 4], cell)
+        self.assertNotEqual(world[4, 3], cell)
+        self.assertEqual(len(set([cell, world[3, 4]])), 1)
+
+        cell.alive = False
+        self.assertEqual(world.ages[43], 0)
+
+    def testGetitemMethod(self):
+        world = ArrayWorld(width=4, height=3)
+        self.assertEqual(world[5].location, (1, 1))
+        self.assertEqual(world[-1].location, (3, 2))
+        self.assertEqual([c.location for c in world[1:3]], [(1, 0), (2, 0)])
+        self.assertEqual(len(list(world)), 12)
+        with self.assertRaises(IndexError):
+            world[12]
+
+    def testStepMatchesWorld(self):
+        for name in ['glider', 'r-pentomino', 'pulsar']:
+            world = World(width=24, height=20)
+            aworld = ArrayWorld(width=24, height=20)
+            world.addPattern(name, x=3, y=3)
+            aworld.addPattern(name, x=3, y=3)
+            for trip in range(12):
+                world.step()
+                aworld.step()
+                self.assertEqual(aworld.generation, world.generation)
+            for cell in world:
+                view = aworld[cell.location]
+                self.assertEqual(view.alive, cell.alive, name)
+                self.assertEqual(view.age, cell.age, name)
+            self.assertEqual(str(aworld), str(world))
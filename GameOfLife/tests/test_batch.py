@@ -0,0 +1,92 @@
+
+import unittest
+
+import numpy as np
+
+from GameOfLife.world import NumpyWorld
+from GameOfLife.batch import BatchWorld
+from GameOfLife.patterns import Pattern
+
+
+class BatchWorldTestCase(unittest.TestCase):
+
+    def testBatchWorldCreation(self):
+        batch = BatchWorld(5, width=10, height=8)
+        self.assertEqual(len(batch), 5)
+        self.assertEqual(batch.cells.shape, (5, 8, 10))
+        self.assertEqual(list(batch.generation), [0] * 5)
+        self.assertTrue(batch.extinct.all())
+        self.assertEqual(list(batch.population), [0] * 5)
+
+    def testStepMatchesNumpyWorld(self):
+        batch = BatchWorld(6, width=20, height=16)
+        batch.randomize(0.35, seed=7)
+        worlds = [batch.world(n) for n in range(len(batch))]
+        for trip in range(15):
+            batch.step(active=slice(None))
+            for world in worlds:
+                world.step()
+        for n, world in enumerate(worlds):
+            self.assertTrue(np.array_equal(batch[n], world.cells))
+            self.assertEqual(batch.generation[n], world.generation)
+
+    def testExtinctBoardsStop(self):
+        batch = BatchWorld(3, width=12, height=12)
+        batch.addPattern('x', x=2, y=2, boards=0)
+        batch.addPattern('blinker', x=4, y=4, boards=[1, 2])
+        self.assertEqual(list(batch.population), [1, 3, 3])
+        for trip in range(4):
+            batch.step()
+        self.assertEqual(list(batch.extinct), [True, False, False])
+        self.assertEqual(list(batch.generation), [1, 4, 4])
+
+    def testStepMask(self):
+        batch = BatchWorld(2, width=12, height=12)
+        batch.addPattern('blinker', x=4, y=4)
+        batch.step(active=np.array([True, False]))
+        self.assertEqual(list(batch.generation), [1, 0])
+        self.assertFalse(np.array_equal(batch[0] > 0, batch[1] > 0))
+
+    def testFromWorlds(self):
+        worlds = [NumpyWorld(9, 7) for _ in range(3)]
+        worlds[1].addPattern('glider')
+        worlds[1].step()
+        batch = BatchWorld.fromWorlds(worlds)
+        self.assertEqual(list(batch.generation), [0, 1, 0])
+        world = batch.world(1)
+        self.assertEqual(str(world), str(worlds[1]))
+        self.assertEqual(world.generation, 1)
+
+    def testAddPatternFormats(self):
+        rle = Pattern('glider', 'x = 3, y = 3\nbo$2bo$3o!')
+        batch = BatchWorld(2, 40, 40)
+        batch.addPattern(rle, x=38, y=5, boards=1)
+        reference = NumpyWorld(40, 40)
+        reference.addPattern(rle, x=38, y=5)
+        self.assertEqual(list(batch.population), [0, 5])
+        self.assertTrue(np.array_equal(batch[1], reference.cells))
+
+        batch.addPattern(rle)
+        self.assertEqual(list(batch.population), [5, 10])
+
+    def testAddPatterns(self):
+        items = [('block', (0, 0)),
+                 ('glider', (0, 0), None, 'overwrite'),
+                 ('blinker', (10, 10), 'rot90'),
+                 ('block', (11, 10), None, 'xor'),
+                 ('glider', (18, 18))]
+        batch = BatchWorld(3, 20, 20)
+        batch.addPattern('x', x=5, y=5)
+        batch.addPatterns(items, boards=[0, 2])
+        reference = NumpyWorld(20, 20)
+        reference.addPattern('x', x=5, y=5)
+        reference.addPatterns(items)
+        for n in (0, 2):
+            self.assertTrue(np.array_equal(batch[n], reference.cells), n)
+        self.assertEqual(list(batch.population),
+                         [reference.population, 1, reference.population])
+
+        batch.addPatterns([('block', (5, 5), None, 'xor')])
+        self.assertEqual(list(batch.population),
+                         [reference.population + 2, 3,
+                          reference.population + 2])
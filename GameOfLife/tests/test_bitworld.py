@@ -0,0 +1,116 @@
+
+import unittest
+
+from GameOfLife import Patterns
+from GameOfLife.world import NumpyWorld
+from GameOfLife.bitworld import BitWorld
+import numpy
+
+
+class BitWorldTestCase(unittest.TestCase):
+
+    def testBitWorldCreation(self):
+        world = BitWorld(width=130, height=7)
+        self.assertIsInstance(world, NumpyWorld)
+        self.assertEqual(world.bits.shape, (7, 3))
+        self.assertEqual(world.bits.dtype, numpy.uint64)
+        self.assertEqual(world.cells.shape, (7, 130))
+        self.assertEqual(len(world.alive), 0)
+
+    def testGetitemSetitemMethods(self):
+        world = BitWorld(width=70, height=5)
+        for key in [(0, 0), (63, 1), (64, 2), (69, 4), (-1, -1)]:
+            world[key] = 1
+            self.assertEqual(world[key], 1)
+        self.assertEqual(len(world.alive), 4)
+        self.assertEqual(world[69, 4], 1)
+        world[69, 4] = 0
+        self.assertEqual(world[-1, -1], 0)
+        self.assertEqual(len(world.alive), 3)
+
+    def testPackUnpack(self):
+        rs = numpy.random.RandomState(2)
+        for width in [1, 8, 63, 64, 65, 200]:
+            world = BitWorld(width=width, height=3)
+            cells = rs.randint(0, 2, (3, width)).astype(numpy.uint8)
+            world._bits = world._pack(cells)
+            self.assertTrue(numpy.array_equal(world.cells, cells))
+
+    def testStrMethod(self):
+        for name in ['glider', 'pulsar']:
+            world = BitWorld(width=20, height=20)
+            nworld = NumpyWorld(width=20, height=20)
+            world.addPattern(name)
+            nworld.addPattern(name)
+            self.assertEqual(str(world), str(nworld))
+
+    def testStepMatchesNumpyWorld(self):
+        rs = numpy.random.RandomState(3)
+        for width, height in [(8, 8), (64, 10), (70, 9), (128, 5), (200, 33)]:
+            world = BitWorld(width=width, height=height)
+            nworld = NumpyWorld(width=width, height=height)
+            nworld.cells[...] = rs.randint(0, 2, (height, width))
+            world._bits = world._pack(nworld.cells)
+            for trip in range(1, 12):
+                world.step()
+                nworld.step()
+                self.assertEqual(world.generation, trip)
+                self.assertTrue(numpy.array_equal(world.cells,
+                                                  nworld.cells > 0),
+                                '{}x{} {}'.format(width, height, trip))
+
+    def testAdvanceMethod(self):
+        world = BitWorld(width=100, height=30)
+        nworld = NumpyWorld(width=100, height=30)
+        world.addPattern('gosper-glider-gun', x=10, y=5)
+        nworld.addPattern('gosper-glider-gun', x=10, y=5)
+        world.advance(90)
+        nworld.advance(90)
+        self.assertEqual(world.generation, 90)
+        self.assertEqual(str(world), str(nworld))
+
+    def testStepWrapsEdges(self):
+        world = BitWorld(width=70, height=6)
+        world.addPattern('glider')
+        for trip in range(4 * 70):
+            world.step()
+        self.assertEqual(len(world.alive), 5)
+
+    def testAddRunsAndPatterns(self):
+        rs = numpy.random.RandomState(3)
+        world = BitWorld(width=130, height=40)
+        nworld = NumpyWorld(width=130, height=40)
+        board = rs.randint(0, 2, (40, 130))
+        world.bits[...] = world._pack(board)
+        nworld.cells[...] = board
+
+        unpacked = []
+        unpack = world._unpack
+        world._unpack = lambda bits: unpacked.append(len(bits)) or unpack(bits)
+
+        runs = [(0, 0, 3), (125, 1, 10), (60, 39, 70)]
+        items = [('glider', (128, 38)),
+                 ('block', (64, 10), None, 'overwrite'),
+                 ('blinker', (3, 10), None, 'xor')]
+        for w in (world, nworld):
+            w.addRuns(runs, x=2, y=20)
+            w.addPatterns(items)
+        self.assertEqual(unpacked, [3, 5])
+        del world._unpack
+        self.assertTrue(numpy.array_equal(world.cells, nworld.cells > 0))
+
+        world.addRuns([])
+        world.addPatterns([])
+        self.assertTrue(numpy.array_equal(world.cells, nworld.cells > 0))
+
+    def testResetMethod(self):
+        world = BitWorld(width=10, height=10)
+        world.addPattern('block')
+        world.step()
+        world.reset()
+        self.assertEqual(world.generation, 0)
+        self.assertEqual(len(world.alive), 0)
+
+        world.addPattern('glider', resize=True)
+        self.assertEqual((world.width, world.height), (3, 3))
+        self.assertEqual(len(world.alive), 5)
@@ -1,7 +1,8 @@
 
+import tracemalloc
 import unittest
 
-from GameOfLife import Cell
+from GameOfLife import Cell, CompactCell
 
 
 class CellTestCase(unittest.TestCase):
@@ -149,3 +150,80 @@ class CellTestCase(unittest.TestCase):
             self.assertEqual(sum(cells), 0)
             cells = [Cell(x, 0, alive=True) for x in range(n)]
             self.assertEqual(sum(cells), n)
+
+    def testCellIndex(self):
+        a = Cell(3, 4)
+        b = Cell(3, 4)
+        self.assertIsNone(a.index)
+        self.assertIsNone(CompactCell(3, 4).index)
+        self.assertNotEqual(a, b)
+        self.assertEqual(len({a, b}), 2)
+        cells = {a}
+        a.alive = True
+        a.index = 7
+        self.assertEqual(a.index, 7)
+        self.assertIn(a, cells)
+
+    def testCompactCell(self):
+        cells = [CompactCell(x, 0, alive=(x < 3)) for x in range(9)]
+        self.assertEqual(cells[0].location, (0, 0))
+        self.assertTrue(cells[0].alive)
+        self.assertEqual(cells[0].markers, ' .')
+
+        for n in range(9):
+            cell = CompactCell(0, 0)
+            cell.neighbors = cells[:n]
+            cell.think()
+            self.assertEqual(cell.aliveNeighbors, min(n, 3))
+
+        self.assertFalse(hasattr(cells[0], '__dict__'))
+        self.assertIn(cells[0], set(cells))
+        self.assertEqual(str(cells[0]), '.')
+        self.assertEqual(cells[0] + cells[1], 2)
+        self.assertEqual(sum(cells), 3)
+
+        class OxCell(CompactCell):
+            __slots__ = ()
+            markers = 'ox'
+
+        self.assertEqual(str(OxCell(0, 0)), 'o')
+        self.assertFalse(hasattr(OxCell(0, 0), '__dict__'))
+
+        cell = CompactCell(0, 0)
+        cell.neighbors = cells[:3]
+        self.assertIsInstance(cell.neighbors, tuple)
+        cell.think()
+        cell.act()
+        self.assertTrue(cell.alive)
+        self.assertEqual(cell.age, 1)
+        cell.act()
+        self.assertEqual(cell.age, 2)
+        cell.alive = False
+        self.assertEqual(cell.age, 0)
+
+        class ColorCell(CompactCell):
+            @property
+            def color(self):
+                return (self.age, self.age, self.age)
+
+        cell = ColorCell(0, 0, alive=True)
+        self.assertEqual(repr(cell), 'ColorCell(x=0,y=0,alive=True,markers=\' .\')')
+        cell.size = (10, 10)
+        self.assertEqual(cell.color, (0, 0, 0))
+
+    def testCompactCellMemory(self):
+
+        def bytesPerCell(CellClass, n=2000):
+            tracemalloc.start()
+            try:
+                cells = [CellClass(i, 0) for i in range(n)]
+                for cell in cells:
+                    cell.index = cell.location[0]
+                    cell.neighbors = cells[:8]
+                return tracemalloc.get_traced_memory()[0] / n
+            finally:
+                tracemalloc.stop()
+
+        # the first run also traces allocations made once per process
+        compact = min(bytesPerCell(CompactCell) for _ in range(2))
+        self.assertLess(compact, bytesPerCell(Cell) / 2)
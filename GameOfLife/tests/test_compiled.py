@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from GameOfLife.patterns import Patterns, Pattern
+from GameOfLife.patterns.compiled import CompiledPattern, PatternCache
+from GameOfLife.patterns.compiled import TRANSFORMS, compilePattern, textCells
+from GameOfLife.world import World, OptimizedWorld
+from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld
+from GameOfLife.arrayworld import ArrayWorld
+from GameOfLife.batch import BatchWorld
+
+
+class CompiledPatternTestCase(unittest.TestCase):
+
+    def engines(self):
+        return [World(16, 16), OptimizedWorld(16, 16), ArrayWorld(16, 16),
+                NumpyWorld(16, 16), OptimizedNumpyWorld(16, 16, tileSize=4),
+                BitWorld(16, 16), HashLifeWorld(16, 16), SparseWorld(16, 16)]
+
+    def testCompile(self):
+        glider = compilePattern('glider')
+        self.assertEqual(glider.name, 'glider')
+        self.assertEqual(glider.bounds, (0, 0, 3, 3))
+        self.assertEqual(glider.population, 5)
+        self.assertEqual(str(glider), 'x  \n  x\nxxx')
+        self.assertIs(compilePattern('glider'), glider)
+        self.assertIs(compilePattern(Patterns['glider']), glider)
+
+        padded = compilePattern('   \n  xx\n')
+        self.assertEqual(padded.bounds, (2, 1, 2, 1))
+
+        rle = compilePattern(Pattern('glider', 'x = 3, y = 3\nbo$2bo$3o!'))
+        self.assertEqual(rle.population, 5)
+
+        empty = compilePattern('   ')
+        self.assertEqual((empty.width, empty.height, empty.population),
+                         (0, 0, 0))
+
+    def testTransforms(self):
+        pattern = CompiledPattern.fromCells([[1, 1, 1],
+                                             [1, 0, 0]])
+        self.assertEqual(len(pattern.transforms), len(TRANSFORMS))
+        cells = dict((name, pattern.transform(name).cells.tolist())
+                     for name in TRANSFORMS)
+        self.assertEqual(cells['identity'], [[1, 1, 1], [1, 0, 0]])
+        self.assertEqual(cells['rot90'], [[1, 1], [0, 1], [0, 1]])
+        self.assertEqual(cells['rot180'], [[0, 0, 1], [1, 1, 1]])
+        self.assertEqual(cells['rot270'], [[1, 0], [1, 0], [1, 1]])
+        self.assertEqual(cells['flipX'], [[1, 1, 1], [0, 0, 1]])
+        self.assertEqual(cells['flipY'], [[1, 0, 0], [1, 1, 1]])
+        self.assertEqual(cells['transpose'], [[1, 1], [1, 0], [1, 0]])
+        self.assertEqual(cells['antitranspose'], [[0, 1], [0, 1], [1, 1]])
+        self.assertIs(pattern.transform('rot90'), pattern.transform('rot90'))
+        with self.assertRaises(ValueError):
+            pattern.transform('rot45')
+
+    def testStamp(self):
+        glider = compilePattern('glider')
+        for world in self.engines():
+            # unbounded worlds do not wrap
+            x = 4 if isinstance(world, (HashLifeWorld, SparseWorld)) else 14
+            reference = NumpyWorld(16, 16)
+            reference.addPattern('glider', x=x, y=6)
+            world.addPattern(glider, x=x, y=6)
+            self.assertEqual(str(world).replace('.', 'x'),
+                             str(reference).replace('.', 'x'))
+            self.assertEqual(world.population, 5)
+            # the bounding box is overwritten, not merged
+            world.addPattern(glider.transform('rot180'), x=x, y=6)
+            self.assertEqual(world.population, 5)
+
+        world = OptimizedNumpyWorld(64, 64, tileSize=8)
+        reference = NumpyWorld(64, 64)
+        for w in (world, reference):
+            w.step()
+            w.addPattern(glider.transform('rot90'), x=30, y=30)
+        for _ in range(20):
+            world.step()
+            reference.step()
+        self.assertTrue(np.array_equal(world.cells, reference.cells))
+
+        batch = BatchWorld(3, 16, 16)
+        batch.addPattern(glider, x=2, y=2, boards=[0, 2])
+        self.assertEqual(batch.population.tolist(), [5, 0, 5])
+
+    def testAddPatterns(self):
+        items = [('glider', (1, 1)),
+                 ('block', (1, 1), None, 'overwrite'),
+                 ('blinker', (8, 8), 'rot90'),
+                 ('block', (12, 3), 'identity', 'xor'),
+                 (compilePattern('block'), (13, 3), None, 'xor')]
+        expected = set([(1, 1), (2, 1), (1, 2), (2, 2), (3, 2), (1, 3),
+                        (2, 3), (3, 3), (8, 8), (8, 9), (8, 10),
+                        (12, 3), (12, 4), (14, 3), (14, 4)])
+
+        for world in self.engines():
+            world.addPatterns(items)
+            alive = set((x + i, y) for x, y, n in world.runs()
+                        for i in range(n))
+            self.assertEqual(alive, expected, world)
+            self.assertEqual(world.population, len(expected))
+
+        world = OptimizedNumpyWorld(64, 64, tileSize=8)
+        reference = NumpyWorld(64, 64)
+        for w in (world, reference):
+            w.step()
+            w.addPatterns([('glider', (x, 40)) for x in range(0, 64, 8)])
+        for _ in range(20):
+            world.step()
+            reference.step()
+        self.assertTrue(np.array_equal(world.cells, reference.cells))
+
+        with self.assertRaises(ValueError):
+            NumpyWorld().addPatterns([('block', (0, 0), None, 'and')])
+
+    def testAddPatternsInOrder(self):
+        # one call gives the same board as placing the items one at a
+        # time, whatever their modes
+        items = [('block', (0, 0)),
+                 ('glider', (0, 0), None, 'overwrite'),
+                 ('block', (6, 6), None, 'xor'),
+                 ('glider', (5, 5), 'rot90', 'overwrite'),
+                 ('blinker', (6, 5), None, 'xor'),
+                 ('block', (6, 5)),
+                 ('glider', (9, 9), None, 'xor'),
+                 ('glider', (10, 9), 'flipX', 'overwrite'),
+                 ('block', (14, 14), None, 'overwrite'),
+                 ('block', (-2, -2), None, 'xor'),
+                 ('glider', (2, 12), None, 'overwrite'),
+                 ('glider', (2, 12), 'rot180', 'overwrite')]
+        for world in self.engines():
+            reference = world.__class__(16, 16)
+            world.addPatterns(items)
+            for item in items:
+                reference.addPatterns([item])
+            self.assertEqual(sorted(world.runs()), sorted(reference.runs()),
+                             world)
+
+        world = NumpyWorld(8, 8)
+        world.addPatterns([('block', (0, 0)),
+                           ('glider', (0, 0), None, 'overwrite')])
+        reference = NumpyWorld(8, 8)
+        reference.addPattern('glider', x=0, y=0)
+        self.assertEqual(str(world), str(reference))
+
+    def testTextCells(self):
+        cells, present = textCells('x\n  x\nxxx')
+        self.assertEqual(cells.tolist(), [[1, 0, 0], [0, 0, 1], [1, 1, 1]])
+        self.assertEqual(present.tolist(), [[True, False, False],
+                                            [True, True, True],
+                                            [True, True, True]])
+        cells, present = textCells('ab|\u2588 b', rule=lambda c: c in 'a\u2588',
+                                   eol='|')
+        self.assertEqual(cells.tolist(), [[1, 0, 0], [1, 0, 0]])
+        self.assertEqual(present[0].tolist(), [True, True, False])
+
+    def testAddPatternString(self):
+        # a string only writes the positions its lines cover
+        text = 'xx\n x x\n'
+        expected = [(6, 4, 3), (4, 5, 2), (7, 5, 1), (9, 5, 1)]
+        for world in self.engines():
+            world.addPattern('xx\nxx', x=7, y=4)
+            world.addPattern('xxxx', x=4, y=5)
+            world.addPattern(text, x=6, y=4)
+            self.assertEqual(list(world.runs()), expected, world)
+
+        world = NumpyWorld(16, 16)
+        region = world.addPattern('xxx\nx x', x=2, y=3)
+        self.assertEqual(region, (slice(3, 5), slice(2, 5)))
+        self.assertEqual(world.cells[region].tolist(), [[1, 1, 1], [1, 0, 1]])
+        ys, xs = world.addPattern('x\n x', x=15, y=15)
+        self.assertEqual(sorted(zip(xs.tolist(), ys.tolist())),
+                         [(0, 0), (15, 0), (15, 15)])
+
+    def testDiskCache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            cache = PatternCache(tmpdir)
+            glider = cache.compile('glider')
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
+
+            again = PatternCache(tmpdir).compile('glider')
+            self.assertIsNot(again, glider)
+            self.assertEqual(again.bounds, glider.bounds)
+            self.assertTrue(np.array_equal(again.cells, glider.cells))
+        finally:
+            shutil.rmtree(tmpdir)
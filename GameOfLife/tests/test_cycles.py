@@ -0,0 +1,99 @@
+
+import unittest
+
+import numpy as np
+
+from GameOfLife.cycles import Cycle, CycleDetector, EXTINCT, STILL, PERIODIC
+from GameOfLife.world import World, OptimizedWorld
+from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld
+from GameOfLife.arrayworld import ArrayWorld
+
+
+class CycleDetectorTestCase(unittest.TestCase):
+
+    def engines(self):
+        return [World(24, 24), OptimizedWorld(24, 24), ArrayWorld(24, 24),
+                NumpyWorld(24, 24), OptimizedNumpyWorld(24, 24, tileSize=8),
+                BitWorld(24, 24), HashLifeWorld(24, 24), SparseWorld(24, 24)]
+
+    def testObserve(self):
+        detector = CycleDetector(size=3)
+        for generation, fingerprint in enumerate('abcd'):
+            self.assertIsNone(detector.observe(generation, fingerprint, 1))
+        # a fell out of the ring
+        self.assertIsNone(detector.observe(4, 'a', 1))
+        cycle = detector.observe(5, 'c', 1)
+        self.assertEqual((cycle.kind, cycle.period, cycle.start),
+                         (PERIODIC, 3, 2))
+        self.assertEqual(str(cycle), 'period 3 starting at generation 2')
+
+        cycle = detector.observe(6, 'x', 0)
+        self.assertEqual((cycle.kind, cycle.period, cycle.start),
+                         (EXTINCT, 1, 6))
+        self.assertEqual(str(Cycle(STILL, 1, 9)), 'still from generation 9')
+
+    def testFingerprint(self):
+        for world in self.engines():
+            empty = world.fingerprint()
+            world.addPattern('blinker', x=5, y=5)
+            blinker = world.fingerprint()
+            self.assertNotEqual(blinker, empty, world)
+            world.step()
+            self.assertNotEqual(world.fingerprint(), blinker, world)
+            world.step()
+            self.assertEqual(world.fingerprint(), blinker, world)
+            self.assertEqual(world.population, 3, world)
+
+    def testRunFindsCycles(self):
+        for name, kind, period, start in [('block', STILL, 1, 0),
+                                          ('pulsar', PERIODIC, 3, 0),
+                                          ('diehard', EXTINCT, 1, 130)]:
+            for world in self.engines():
+                world.addPattern(name, x=5, y=6)
+                cycle = world.run(500)
+                result = (cycle.kind, cycle.period, cycle.start)
+                self.assertEqual(result, (kind, period, start), (name, world))
+                stop = start if kind == EXTINCT else start + period
+                self.assertEqual(world.generation, stop)
+
+    def testRunWithoutCycle(self):
+        world = NumpyWorld(40, 40)
+        world.addPattern('r-pentomino', x=20, y=20)
+        self.assertIsNone(world.run(10))
+        self.assertEqual(world.generation, 10)
+        with self.assertRaises(ValueError):
+            world.run(10, onCycle='sometimes')
+
+    def testRunJumpsAhead(self):
+        for world, reference in [(World(12, 12), World(12, 12)),
+                                 (NumpyWorld(12, 12), NumpyWorld(12, 12)),
+                                 (SparseWorld(12, 12), SparseWorld(12, 12))]:
+            for w in (world, reference):
+                w.addPattern('blinker', x=2, y=2)
+                w.addPattern('block', x=7, y=7)
+            cycle = world.run(1001, onCycle='jump')
+            self.assertEqual(cycle.period, 2)
+            for trip in range(1001):
+                reference.step()
+            self.assertEqual(world.generation, 1001)
+            self.assertEqual(str(world), str(reference))
+            if isinstance(world, World) and not isinstance(world, NumpyWorld):
+                ages = [c.age for c in world]
+                self.assertEqual(ages, [c.age for c in reference])
+            else:
+                self.assertTrue(np.array_equal(world.cells, reference.cells))
+
+    def testRunContinues(self):
+        world = BitWorld(16, 16)
+        world.addPattern('blinker', x=4, y=4)
+        cycle = world.run(25, onCycle='continue')
+        self.assertEqual(str(cycle), 'period 2 starting at generation 0')
+        self.assertEqual(world.generation, 25)
+
+    def testBirthOnZeroIsNotExtinct(self):
+        world = NumpyWorld(6, 6, 'B0/S')
+        cycle = world.run(10)
+        self.assertEqual((cycle.kind, cycle.period), (PERIODIC, 2))
@@ -0,0 +1,149 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from GameOfLife.formats import readRLE, writeRLE
+from GameOfLife.formats import readMacrocell, writeMacrocell, formatFor
+from GameOfLife.patterns import Pattern
+from GameOfLife.world import World, OptimizedWorld
+from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld
+from GameOfLife.arrayworld import ArrayWorld
+
+GUN = '''#N Gosper glider gun
+x = 36, y = 9, rule = B3/S23
+24bo$22bobo$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o$2o8bo3bob2o4b
+obo$10bo5bo7bo$11bo3bo$12b2o!
+'''
+
+
+class FormatsTestCase(unittest.TestCase):
+
+    def bounded(self):
+        return [World(40, 12), OptimizedWorld(40, 12), ArrayWorld(40, 12),
+                NumpyWorld(40, 12), OptimizedNumpyWorld(40, 12, tileSize=8),
+                BitWorld(40, 12)]
+
+    def testFormatFor(self):
+        self.assertEqual(formatFor('gun.RLE'), 'rle')
+        self.assertEqual(formatFor('gun.mc', 'rle'), 'rle')
+        self.assertEqual(formatFor(io.StringIO(), None, 'x = 3, y = 1'), 'rle')
+        self.assertEqual(formatFor(io.StringIO(), None, '[M2] (golly)'), 'mc')
+        self.assertEqual(formatFor(io.StringIO(), None, 'x x'), 'life')
+        with self.assertRaises(ValueError):
+            formatFor('gun.rle', 'gif')
+
+    def testReadRLE(self):
+        header, runs = readRLE(io.StringIO(GUN))
+        self.assertEqual((header.width, header.height), (36, 9))
+        self.assertEqual(header.rule, 'B3/S23')
+        runs = list(runs)
+        self.assertEqual(runs[:3], [(24, 0, 1), (22, 1, 1), (24, 1, 1)])
+        self.assertEqual(sum(n for x, y, n in runs), 36)
+
+        header, runs = readRLE(['#CXRLE Pos=-5,7', 'x = 3, y = 1', '3o!'])
+        self.assertEqual((header.x, header.y), (-5, 7))
+        self.assertEqual(list(runs), [(0, 0, 3)])
+
+    def testRLERoundTrip(self):
+        header, runs = readRLE(io.StringIO(GUN))
+        runs = list(runs)
+        f = io.StringIO()
+        nbytes = writeRLE(f, header, runs)
+        self.assertEqual(nbytes, len(f.getvalue()))
+        self.assertTrue(all(len(l) <= 70 for l in f.getvalue().split('\n')))
+        f.seek(0)
+        again, decoded = readRLE(f)
+        self.assertEqual((again.width, again.height), (36, 9))
+        self.assertEqual(list(decoded), runs)
+
+    def testMacrocellRoundTrip(self):
+        header, runs = readRLE(io.StringIO(GUN))
+        runs = list(runs)
+        header.x, header.y = -20, 3
+        f = io.StringIO()
+        writeMacrocell(f, header, runs)
+        f.seek(0)
+        again, tree = readMacrocell(f)
+        self.assertEqual((again.x, again.y), (-20, 3))
+        self.assertEqual((again.width, again.height), (36, 9))
+        self.assertEqual(again.rule, 'B3/S23')
+        self.assertEqual(sorted(tree, key=lambda r: (r[1], r[0])), runs)
+
+    def testBoundedEngines(self):
+        for world in self.bounded():
+            world.read(io.StringIO(GUN))
+            self.assertEqual((world.width, world.height), (36, 9))
+            self.assertEqual(world.population, 36)
+            for format in ('rle', 'mc'):
+                f = io.StringIO()
+                world.write(f, format=format)
+                f.seek(0)
+                reference = NumpyWorld()
+                reference.read(f)
+                self.assertEqual(str(reference), str(world))
+
+    def testRuleIsAdopted(self):
+        text = 'x = 1, y = 1, rule = B36/S23\no!\n'
+        for world in self.bounded() + [SparseWorld(), HashLifeWorld()]:
+            world.read(io.StringIO(text))
+            self.assertEqual(str(world.rule), 'B36/S23')
+
+    def testUnboundedEngines(self):
+        for world in [SparseWorld(), HashLifeWorld()]:
+            world.addPattern('glider', x=-100, y=50)
+            for format in ('rle', 'mc'):
+                f = io.StringIO()
+                world.write(f, format=format)
+                f.seek(0)
+                copy = world.__class__()
+                copy.read(f)
+                self.assertEqual(sorted(copy.alive), sorted(world.alive))
+
+    def testHashLifeMacrocell(self):
+        world = HashLifeWorld()
+        world.read(io.StringIO(GUN))
+        world.advance(1000)
+        f = io.StringIO()
+        world.write(f, format='mc')
+        f.seek(0)
+        copy = HashLifeWorld()
+        copy.read(f)
+        self.assertEqual(copy.population, world.population)
+        self.assertEqual(sorted(copy.alive), sorted(world.alive))
+
+        # a universe read from a Macrocell file is written node for node
+        f = io.StringIO()
+        copy.write(f, format='mc')
+        f.seek(0)
+        again = SparseWorld()
+        again.read(f)
+        self.assertEqual(sorted(again.alive), sorted(world.alive))
+
+    def testFilePaths(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'gun.rle')
+            world = NumpyWorld()
+            world.read(io.StringIO(GUN))
+            world.write(path)
+            with open(path) as f:
+                self.assertEqual(formatFor(f), 'rle')
+            copy = NumpyWorld()
+            copy.read(path)
+            self.assertEqual(str(copy), str(world))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testPattern(self):
+        pattern = Pattern('glider', 'x = 3, y = 3\nbo$2bo$3o!')
+        self.assertEqual(str(pattern), ' x \n  x\nxxx')
+        self.assertEqual(pattern.header.width, 3)
+        for world in self.bounded() + [SparseWorld(), HashLifeWorld()]:
+            world.addPattern(pattern, x=1, y=2)
+            self.assertEqual(list(world.runs()),
+                             [(2, 2, 1), (3, 3, 1), (1, 4, 3)])
@@ -0,0 +1,111 @@
+
+import unittest
+
+from GameOfLife.world import NumpyWorld
+from GameOfLife.hashlife import HashLifeWorld, Node
+
+
+class HashLifeWorldTestCase(unittest.TestCase):
+
+    def assertSameCells(self, world, nworld):
+        expected = sorted((int(x), int(y)) for x, y in nworld.alive)
+        self.assertEqual(sorted(world.alive), expected)
+
+    def testHashLifeWorldCreation(self):
+        world = HashLifeWorld()
+        self.assertIsInstance(world, NumpyWorld)
+        self.assertIsInstance(world.root, Node)
+        self.assertEqual(world.population, 0)
+        self.assertEqual(world.alive, [])
+
+    def testGetitemSetitemMethods(self):
+        world = HashLifeWorld()
+        keys = [(0, 0), (5, 7), (-3, -9), (1000, -1000)]
+        for key in keys:
+            world[key] = 1
+        for key in keys:
+            self.assertEqual(world[key], 1)
+        self.assertEqual(world[1, 1], 0)
+        self.assertEqual(world[10 ** 6, 10 ** 6], 0)
+        self.assertEqual(sorted(world.alive), sorted(keys))
+        world[5, 7] = 0
+        self.assertEqual(world.population, 3)
+
+    def testNodesAreCanonical(self):
+        world = HashLifeWorld()
+        a = world.join(world.live, world.empty(0), world.empty(0), world.live)
+        b = world.join(world.live, world.empty(0), world.empty(0), world.live)
+        self.assertIs(a, b)
+        self.assertEqual(a.population, 2)
+        self.assertIs(world.empty(4), world.join(*[world.empty(3)] * 4))
+
+    def testStepMatchesNumpyWorld(self):
+        for name in ['r-pentomino', 'acorn', 'gosper-glider-gun']:
+            world = HashLifeWorld()
+            nworld = NumpyWorld(width=300, height=300)
+            world.addPattern(name, x=150, y=150)
+            nworld.addPattern(name, x=150, y=150)
+            for trip in range(1, 6):
+                world.step()
+                nworld.step()
+                self.assertEqual(world.generation, trip)
+            self.assertSameCells(world, nworld)
+            world.advance(95)
+            for trip in range(95):
+                nworld.step()
+            self.assertEqual(world.generation, 100)
+            self.assertSameCells(world, nworld)
+
+    def testAdvanceMethod(self):
+        world = HashLifeWorld()
+        world.addPattern('glider')
+        world.advance(4)
+        start = sorted(world.alive)
+        world.advance(4 * 1000)
+        moved = sorted((x - 1000, y - 1000) for x, y in world.alive)
+        self.assertEqual(moved, start)
+
+        with self.assertRaises(ValueError):
+            world.advance(-1)
+
+    def testAdvanceBillions(self):
+        world = HashLifeWorld()
+        world.addPattern('gosper-glider-gun')
+        world.advance(10 ** 9)
+        self.assertEqual(world.generation, 10 ** 9)
+        self.assertEqual(world.population, 166666713)
+
+    def testBoundedCache(self):
+        world = HashLifeWorld(maxNodes=8000)
+        world.addPattern('gosper-glider-gun')
+        world.advance(10 ** 9)
+        self.assertEqual(world.population, 166666713)
+        self.assertGreater(world.collections, 0)
+        self.assertLessEqual(len(world._nodes), world.maxNodes)
+        self.assertLessEqual(len(world._results), world.maxNodes)
+
+        world = HashLifeWorld(maxNodes=16)
+        world.addPattern('acorn')
+        with self.assertRaises(MemoryError):
+            world.advance(1000)
+
+    def testCollectMethod(self):
+        world = HashLifeWorld()
+        world.addPattern('acorn')
+        world.advance(300)
+        population = world.population
+        world.collect()
+        self.assertEqual(world.population, population)
+        world.advance(10)
+        nworld = HashLifeWorld()
+        nworld.addPattern('acorn')
+        nworld.advance(310)
+        self.assertEqual(sorted(world.alive), sorted(nworld.alive))
+
+    def testStrMethod(self):
+        world = HashLifeWorld(width=5, height=4)
+        nworld = NumpyWorld(width=5, height=4)
+        world.addPattern('glider', x=1, y=1)
+        nworld.addPattern('glider', x=1, y=1)
+        world[-1, -1] = 1
+        self.assertEqual(str(world), str(nworld))
@@ -0,0 +1,115 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from GameOfLife.history import Recorder, HistoryReader, aliveMask
+from GameOfLife.world import World, NumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.sparse import SparseWorld
+
+
+class HistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'run.golh')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def reference(self, generations):
+        world = NumpyWorld(24, 20)
+        world.addPattern('glider', x=2, y=2)
+        world.addPattern('blinker', x=15, y=10)
+        boards = [aliveMask(world)]
+        for _ in range(generations):
+            world.step()
+            boards.append(aliveMask(world))
+        return boards
+
+    def record(self, world, generations, keyframes=8):
+        world.addPattern('glider', x=2, y=2)
+        world.addPattern('blinker', x=15, y=10)
+        with Recorder(world, self.path, keyframes=keyframes) as recorder:
+            recorder.attach()
+            for _ in range(generations):
+                world.step()
+
+    def testSeek(self):
+        boards = self.reference(50)
+        self.record(NumpyWorld(24, 20), 50)
+        with HistoryReader(self.path) as history:
+            self.assertEqual(history.generations, list(range(51)))
+            self.assertEqual(history.keyframes, 8)
+            kinds = history.index['kind'].tolist()
+            self.assertEqual(kinds.count(b'K'), 7)
+            for generation in (0, 1, 7, 8, 9, 33, 50):
+                self.assertTrue(np.array_equal(history.cells(generation),
+                                               boards[generation]))
+            for generation, cells in history:
+                self.assertTrue(np.array_equal(cells, boards[generation]))
+            with self.assertRaises(KeyError):
+                history.cells(51)
+
+    def testEngines(self):
+        boards = self.reference(20)
+        for world in [World(24, 20), BitWorld(24, 20), SparseWorld(24, 20)]:
+            self.record(world, 20, keyframes=5)
+            with HistoryReader(self.path) as history:
+                self.assertTrue(np.array_equal(history.cells(17), boards[17]),
+                                world.__class__.__name__)
+
+    def testDelta(self):
+        boards = self.reference(3)
+        self.record(NumpyWorld(24, 20), 3, keyframes=2)
+        with HistoryReader(self.path) as history:
+            for generation in (1, 2, 3):
+                (bx, by), (dx, dy) = history.delta(generation)
+                before = boards[generation - 1]
+                after = boards[generation]
+                self.assertTrue(after[by, bx].all())
+                self.assertFalse(before[by, bx].any())
+                self.assertTrue(before[dy, dx].all())
+                self.assertFalse(after[dy, dx].any())
+                self.assertEqual(len(bx) + len(dx),
+                                 np.count_nonzero(before ^ after))
+
+    def testWorld(self):
+        boards = self.reference(12)
+        self.record(NumpyWorld(24, 20), 12)
+        with HistoryReader(self.path) as history:
+            world = history.world(12)
+            self.assertEqual(world.generation, 12)
+            world.step()
+            self.assertTrue(np.array_equal(aliveMask(world),
+                                           self.reference(13)[13]))
+
+    def testUnclosed(self):
+        world = NumpyWorld(24, 20)
+        world.addPattern('glider')
+        f = io.BytesIO()
+        recorder = Recorder(world, f, keyframes=4)
+        for _ in range(10):
+            world.step()
+            recorder.record()
+        recorder._queue.put(None)
+        recorder._writer.join()
+        history = HistoryReader(io.BytesIO(f.getvalue()))
+        self.assertEqual(history.generations, list(range(1, 11)))
+        self.assertTrue(np.array_equal(history.cells(10), aliveMask(world)))
+
+    def testDetach(self):
+        world = NumpyWorld(8, 8)
+        f = io.BytesIO()
+        recorder = Recorder(world, f)
+        recorder.attach()
+        world.step()
+        recorder.detach()
+        world.step()
+        self.assertEqual(recorder.count, 2)
+        self.assertNotIn('step', vars(world))
+        recorder.close()
@@ -0,0 +1,63 @@
+
+import unittest
+
+from GameOfLife import Cell
+from GameOfLife.world import World
+from GameOfLife.arrayworld import ArrayWorld
+from GameOfLife.neighbors import neighborTable, OFFSETS
+
+
+class NeighborTableTestCase(unittest.TestCase):
+
+    def testOffsetsMatchCell(self):
+        cell = Cell(5, 5)
+        self.assertEqual([(x - 5, y - 5) for x, y in cell.neighborLocations],
+                         list(OFFSETS))
+
+    def testTorusTable(self):
+        width, height = 7, 4
+        table = neighborTable(width, height)
+        self.assertEqual(table.shape, (width * height, 8))
+        self.assertFalse(table.flags.writeable)
+        for y in range(height):
+            for x in range(width):
+                cell = Cell(x, y)
+                expected = [(ny % height) * width + (nx % width)
+                            for nx, ny in cell.neighborLocations]
+                self.assertEqual(table[y * width + x].tolist(), expected)
+
+    def testPlaneTable(self):
+        table = neighborTable(3, 3, 'plane')
+        self.assertEqual(table[4].tolist(), [0, 1, 2, 3, 5, 6, 7, 8])
+        self.assertEqual(table[0].tolist(), [9, 9, 9, 9, 1, 9, 3, 4])
+
+        with self.assertRaises(ValueError):
+            neighborTable(3, 3, 'sphere')
+
+    def testTablesAreShared(self):
+        neighborTable.cache_clear()
+        a = World(width=9, height=6)
+        b = ArrayWorld(width=9, height=6)
+        self.assertIs(b.table, neighborTable(9, 6))
+        info = neighborTable.cache_info()
+        self.assertEqual(info.currsize, 1)
+        self.assertGreater(info.hits, 0)
+
+    def testWorldNeighbors(self):
+        world = World(width=5, height=4)
+        for cell in world:
+            self.assertEqual([n.location for n in cell.neighbors],
+                             [world._warp(loc)
+                              for loc in cell.neighborLocations])
+
+    def testArrayWorldPlane(self):
+        torus = ArrayWorld(width=6, height=6)
+        plane = ArrayWorld(width=6, height=6, topology='plane')
+        for world in [torus, plane]:
+            for x in range(3):
+                world[x, 0].alive = True
+        torus.step()
+        plane.step()
+        self.assertEqual(len(torus.alive), 3)
+        self.assertEqual(len(plane.alive), 2)
+        self.assertEqual(len(plane[0, 0].neighbors), 3)
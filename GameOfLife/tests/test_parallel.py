@@ -0,0 +1,67 @@
+
+import unittest
+
+from GameOfLife.world import NumpyWorld
+from GameOfLife.parallel import ParallelNumpyWorld
+import numpy
+
+
+class ParallelNumpyWorldTestCase(unittest.TestCase):
+
+    def testTileBounds(self):
+        world = ParallelNumpyWorld(width=10, height=7, tiles=(3, 2))
+        bounds = world.tileBounds
+        self.assertEqual(len(bounds), 6)
+        covered = numpy.zeros((7, 10), dtype=int)
+        for y0, y1, x0, x1 in bounds:
+            covered[y0:y1, x0:x1] += 1
+        self.assertTrue((covered == 1).all())
+        world.close()
+
+    def testVerifyMethod(self):
+        rs = numpy.random.RandomState(7)
+        for tiles in [(1, 1), (2, 3), (4, 1)]:
+            with ParallelNumpyWorld(width=50, height=37, tiles=tiles,
+                                    processes=2) as world:
+                world.cells[...] = rs.randint(0, 2, world.cells.shape)
+                self.assertTrue(world.verify(4), tiles)
+                self.assertEqual(world.generation, 4)
+
+    def testStepMatchesNumpyWorld(self):
+        with ParallelNumpyWorld(width=60, height=40, tiles=(2, 2)) as world:
+            nworld = NumpyWorld(width=60, height=40)
+            world.addPattern('gosper-glider-gun', x=20, y=10)
+            nworld.addPattern('gosper-glider-gun', x=20, y=10)
+            for trip in range(40):
+                world.step()
+                nworld.step()
+            self.assertTrue(numpy.array_equal(world.cells, nworld.cells))
+            self.assertEqual(str(world), str(nworld))
+            world.advance(15)
+            nworld.advance(15)
+            self.assertEqual(world.generation, 55)
+            self.assertTrue(numpy.array_equal(world.cells, nworld.cells))
+
+    def testResetAndResize(self):
+        with ParallelNumpyWorld(width=8, height=8) as world:
+            world.addPattern('blinker')
+            world.step()
+            world.reset()
+            self.assertEqual(world.generation, 0)
+            self.assertEqual(len(world.alive), 0)
+            world.addPattern('pulsar', resize=True)
+            self.assertEqual(world.cells.shape, (world.height, world.width))
+            self.assertTrue(world.verify(3))
+
+    def testClose(self):
+        with ParallelNumpyWorld(width=12, height=12) as world:
+            world.addPattern('glider')
+            world.step()
+            self.assertFalse(world.closed)
+        self.assertTrue(world.closed)
+        for use in (lambda: world.cells, world.step,
+                    lambda: world.advance(2), lambda: world.alive):
+            with self.assertRaises(ValueError):
+                use()
+        world.close()
+        self.assertTrue(world.closed)
@@ -1,8 +1,76 @@
-
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 from unittest import TestCase
 
+import GameOfLife
 from GameOfLife.patterns import *
+from GameOfLife.patterns import PatternRegistry
+
+# seconds a fresh interpreter may spend on 'import GameOfLife'
+IMPORT_BUDGET = 0.4
 
 
 class PatternsTestCase(TestCase):
-    pass
+
+    def testRegistry(self):
+        self.assertIn('glider', Patterns)
+        self.assertNotIn('x\nxx', Patterns)
+        self.assertEqual(len(Patterns), len(list(Patterns)))
+        self.assertEqual(Patterns['glider'], 'x\n  x\nxxx')
+        self.assertIs(Patterns['glider'], Patterns['glider'])
+        with self.assertRaises(KeyError):
+            Patterns['no-such-pattern']
+
+    def testLazyLoading(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(tmpdir, 'Blinker.life'), 'w') as f:
+                f.write('xxx')
+            with open(os.path.join(tmpdir, 'glider.rle'), 'w') as f:
+                f.write('x = 3, y = 3\nbo$2bo$3o!\n')
+            with open(os.path.join(tmpdir, 'README'), 'w') as f:
+                f.write('not a pattern')
+
+            registry = PatternRegistry(tmpdir)
+            self.assertEqual(sorted(registry), ['blinker', 'glider'])
+            self.assertEqual(registry._cache, {})
+
+            glider = registry['glider']
+            self.assertIsInstance(glider, Pattern)
+            self.assertEqual(str(glider), ' x \n  x\nxxx')
+
+            # contents are cached after the first look up
+            os.remove(os.path.join(tmpdir, 'Blinker.life'))
+            with self.assertRaises(OSError):
+                registry['blinker']
+            self.assertIs(registry['glider'], glider)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testImportBudget(self):
+        code = '\n'.join(['import sys, time',
+                          't = time.perf_counter()',
+                          'import GameOfLife',
+                          'print(time.perf_counter() - t)',
+                          'print(int("numpy" in sys.modules))',
+                          'print(int("pkg_resources" in sys.modules))'])
+        root = os.path.dirname(os.path.dirname(GameOfLife.__file__))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([root,
+                                             env.get('PYTHONPATH', '')])
+        seconds, numpy, pkg_resources = subprocess.check_output(
+            [sys.executable, '-c', code], env=env).split()
+
+        self.assertLess(float(seconds), IMPORT_BUDGET)
+        self.assertEqual(int(numpy), 0)
+        self.assertEqual(int(pkg_resources), 0)
+
+    def testEnginesAreLoadedOnUse(self):
+        from GameOfLife.world import OptimizedNumpyWorld
+        self.assertIs(GameOfLife.NumpyWorld, OptimizedNumpyWorld)
+        self.assertIn('BitWorld', dir(GameOfLife))
+        with self.assertRaises(AttributeError):
+            GameOfLife.NoSuchWorld
@@ -0,0 +1,121 @@
+
+import unittest
+
+import numpy as np
+
+from GameOfLife import Cell
+from GameOfLife.rules import Rule, LIFE
+from GameOfLife.world import World, OptimizedWorld, NumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld
+from GameOfLife.arrayworld import ArrayWorld
+from GameOfLife.batch import BatchWorld
+
+
+class HighLifeCell(Cell):
+    rule = Rule.fromString('B36/S23')
+
+
+class RuleTestCase(unittest.TestCase):
+
+    def testRuleFromString(self):
+        for rulestring in ['B3/S23', 'b3/s23', 'S23/B3', '23/3', 'B3S23']:
+            self.assertEqual(Rule.fromString(rulestring), LIFE)
+
+        highlife = Rule.fromString('B36/S23')
+        self.assertEqual(highlife.born, (3, 6))
+        self.assertEqual(highlife.survive, (2, 3))
+        self.assertEqual(str(highlife), 'B36/S23')
+
+        seeds = Rule.fromString('B2/S')
+        self.assertEqual(seeds.survive, ())
+        self.assertEqual(str(seeds), 'B2/S')
+
+        for rulestring in ['', 'B9/S23', 'life', 'B3/X23']:
+            with self.assertRaises(ValueError):
+                Rule.fromString(rulestring)
+
+    def testRuleTable(self):
+        table = LIFE.table
+        self.assertEqual(len(table), 2)
+        self.assertEqual([n for n in range(9) if table[0][n]], [3])
+        self.assertEqual([n for n in range(9) if table[1][n]], [2, 3])
+
+    def testRuleCompile(self):
+        self.assertIs(Rule.compile(None), LIFE)
+        self.assertIs(Rule.compile(LIFE), LIFE)
+        self.assertIs(Rule.compile('B36/S23'), Rule.compile('B36/S23'))
+        self.assertEqual(len(set([LIFE, Rule(), Rule.compile('23/3')])), 1)
+
+    def testCellRule(self):
+        cell = HighLifeCell(0, 0)
+        cell.aliveNeighbors = 6
+        cell.act()
+        self.assertTrue(cell.alive)
+        self.assertEqual(cell.age, 1)
+
+        cell = Cell(0, 0)
+        cell.aliveNeighbors = 6
+        cell.act()
+        self.assertFalse(cell.alive)
+
+    def testWorldRulestring(self):
+        world = World(10, 10, rulestring='B36/S23')
+        self.assertTrue(issubclass(world.cellClass, Cell))
+        self.assertEqual(world.rule, HighLifeCell.rule)
+        self.assertIs(World(5, 5, rulestring='B3/S23').cellClass, Cell)
+        self.assertEqual(World(5, 5, HighLifeCell).rule, HighLifeCell.rule)
+
+    def testEnginesAgree(self):
+        for rulestring in ['B36/S23', 'B2/S', 'B3/S012345678']:
+            worlds = [World(40, 40, rulestring=rulestring),
+                      OptimizedWorld(40, 40, rulestring=rulestring),
+                      ArrayWorld(40, 40, rulestring=rulestring)]
+            engines = [NumpyWorld(40, 40, rulestring),
+                       BitWorld(40, 40, rulestring),
+                       HashLifeWorld(40, 40, rulestring=rulestring),
+                       SparseWorld(40, 40, rulestring)]
+            for world in worlds + engines:
+                world.addPattern('r-pentomino', x=18, y=18)
+            for trip in range(5):
+                for world in worlds + engines:
+                    world.step()
+            expected = str(worlds[0])
+            for world in worlds + engines:
+                self.assertEqual(str(world), expected, (rulestring, world))
+            for world in engines:
+                self.assertTrue(np.array_equal(world.cells > 0,
+                                               engines[0].cells > 0))
+
+    def testBirthOnZero(self):
+        for world in [World(6, 5, rulestring='B0/S'),
+                      OptimizedWorld(6, 5, rulestring='B0/S'),
+                      NumpyWorld(6, 5, 'B0/S'),
+                      BitWorld(6, 5, 'B0/S')]:
+            world.step()
+            self.assertEqual(str(world).count('.'), 30, world)
+            world.step()
+            self.assertEqual(str(world).count('.'), 0, world)
+
+        batch = BatchWorld(2, 6, 5, 'B0/S')
+        batch.step()
+        self.assertEqual(list(batch.population), [30, 30])
+
+        for worldClass in [HashLifeWorld, SparseWorld]:
+            with self.assertRaises(ValueError):
+                worldClass(rulestring='B0/S')
+
+    def testRuleChange(self):
+        world = HashLifeWorld(20, 20)
+        world.addPattern('r-pentomino', x=8, y=8)
+        world.advance(4)
+        world.rule = 'B2/S'
+        world.step()
+        reference = NumpyWorld(20, 20)
+        reference.addPattern('r-pentomino', x=8, y=8)
+        for trip in range(4):
+            reference.step()
+        reference.rule = 'B2/S'
+        reference.step()
+        self.assertEqual(str(world), str(reference))
@@ -0,0 +1,134 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from GameOfLife.snapshot import Snapshot, ENCODINGS, pack, unpack
+from GameOfLife.world import World, OptimizedWorld
+from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld
+from GameOfLife.bitworld import BitWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld
+from GameOfLife.arrayworld import ArrayWorld
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'board.gols')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def source(self):
+        world = NumpyWorld(70, 30, 'B36/S23')
+        world.addPattern('glider', x=5, y=5)
+        world.addPattern('blinker', x=60, y=20)
+        world.advance(7)
+        return world
+
+    def testPack(self):
+        alive = np.random.RandomState(1).random_sample((5, 130)) < 0.5
+        bits = pack(alive)
+        self.assertEqual(bits.shape, (5, 3))
+        self.assertTrue(np.array_equal(unpack(bits, 130), alive))
+        world = BitWorld(130, 5)
+        world._bits = world._pack(alive)
+        self.assertTrue(np.array_equal(world.bits, bits))
+
+    def testRoundTrip(self):
+        source = self.source()
+        engines = [World, OptimizedWorld, ArrayWorld, NumpyWorld,
+                   OptimizedNumpyWorld, BitWorld]
+        for encoding in ENCODINGS:
+            source.save(self.path, encoding)
+            for engine in engines:
+                world = engine.open(self.path)
+                self.assertEqual((world.width, world.height), (70, 30))
+                self.assertEqual(world.generation, 7)
+                self.assertEqual(str(world.rule), 'B36/S23')
+                self.assertEqual(list(world.runs()), list(source.runs()))
+
+    def testUnbounded(self):
+        source = self.source()
+        source.save(self.path)
+        for engine in [SparseWorld, HashLifeWorld]:
+            world = engine.open(self.path)
+            self.assertEqual(sorted(world.alive), sorted(source.alive))
+            world.save(self.path)
+            self.assertEqual(list(NumpyWorld.open(self.path).runs()),
+                             list(source.runs()))
+
+    def testAges(self):
+        source = self.source()
+        source.cells[0, 0] = 300
+        source.save(self.path, 'int64')
+        self.assertTrue(np.array_equal(NumpyWorld.open(self.path).cells,
+                                       source.cells))
+        source.save(self.path, 'uint8')
+        self.assertEqual(NumpyWorld.open(self.path).cells[0, 0], 255)
+
+    def testZeroCopy(self):
+        source = self.source()
+        source.save(self.path, 'int64')
+        world = NumpyWorld.open(self.path)
+        self.assertIsInstance(world.cells, np.memmap)
+        world.step()
+        self.assertEqual(NumpyWorld.open(self.path).generation, 7)
+        self.assertTrue(np.array_equal(NumpyWorld.open(self.path).cells,
+                                       source.cells))
+
+        world = NumpyWorld.open(self.path, mode='r+')
+        world.step()
+        source.step()
+        world.cells.flush()
+        self.assertTrue(np.array_equal(NumpyWorld.open(self.path).cells,
+                                       source.cells))
+
+        source.save(self.path, 'bits')
+        world = BitWorld.open(self.path)
+        self.assertIsInstance(world.bits, np.memmap)
+        world.step()
+        self.assertEqual(world.population, source.population)
+
+    def testFileObjects(self):
+        source = self.source()
+        f = io.BytesIO()
+        nbytes = source.save(f, 'uint8')
+        self.assertEqual(nbytes, len(f.getvalue()))
+        self.assertEqual(nbytes, 128 + 70 * 30)
+        snap = Snapshot(f)
+        self.assertEqual(repr(snap), "Snapshot(width=70,height=30,"
+                         "generation=7,encoding='uint8')")
+        self.assertTrue(np.array_equal(snap.alive, source.cells > 0))
+        with self.assertRaises(ValueError):
+            Snapshot(io.BytesIO(b'x = 3, y = 1\n3o!\n'))
+        with self.assertRaises(ValueError):
+            source.save(f, 'gif')
+
+    def testOutsideViewport(self):
+        for engine in [SparseWorld, HashLifeWorld]:
+            source = engine(10, 10)
+            source.addPattern('r-pentomino', x=3, y=3)
+            source.advance(300)
+            header = source.header
+            self.assertTrue(header.x < 0 or header.y < 0)
+            source.save(self.path)
+
+            snap = Snapshot(self.path)
+            self.assertEqual((snap.x, snap.y),
+                             (min(0, header.x), min(0, header.y)))
+            for other in [SparseWorld, HashLifeWorld]:
+                world = other.open(self.path)
+                self.assertEqual(world.generation, 300)
+                self.assertEqual(world.population, source.population)
+                self.assertEqual(sorted(world.alive), sorted(source.alive))
+
+            world = NumpyWorld.open(self.path)
+            self.assertEqual((world.width, world.height),
+                             (snap.width, snap.height))
+            self.assertEqual(world.population, source.population)
@@ -0,0 +1,93 @@
+
+import unittest
+
+from GameOfLife.world import NumpyWorld
+from GameOfLife.hashlife import HashLifeWorld
+from GameOfLife.sparse import SparseWorld, pack, unpack
+import numpy
+
+
+class SparseWorldTestCase(unittest.TestCase):
+
+    def testPackUnpack(self):
+        xs = numpy.array([0, -1, 5, 2 ** 30 - 1, -2 ** 30])
+        ys = numpy.array([0, 3, -7, -2 ** 30, 2 ** 30 - 1])
+        a, b = unpack(pack(xs, ys))
+        self.assertTrue(numpy.array_equal(a, xs))
+        self.assertTrue(numpy.array_equal(b, ys))
+
+        keys = pack([1, 0, 5], [0, 1, 0])
+        self.assertEqual(list(numpy.argsort(keys)), [0, 2, 1])
+
+    def testGetitemSetitemMethods(self):
+        world = SparseWorld()
+        keys = [(0, 0), (5, 7), (-3, -9), (10 ** 6, -10 ** 6)]
+        for key in keys:
+            world[key] = 1
+        for key in keys:
+            self.assertEqual(world[key], 1)
+        self.assertEqual(world[1, 1], 0)
+        self.assertEqual(sorted(world.alive), sorted(keys))
+        world[5, 7] = 0
+        self.assertEqual(world.population, 3)
+
+    def testAddPatternMethod(self):
+        world = SparseWorld()
+        world.addPattern('glider', x=-10, y=-10)
+        self.assertEqual(world.population, 5)
+        world.addPattern('block', x=-10, y=-10)
+        self.assertEqual(world.population, 4 + 4)
+        self.assertTrue(all(world[x, y] == 1 for x, y in world.alive))
+
+    def testStepMethod(self):
+        world = SparseWorld()
+        world.addPattern('block', x=-1, y=-1)
+        for trip in range(1, 5):
+            world.step()
+            self.assertEqual(world.generation, trip)
+            self.assertEqual(sorted(world.alive),
+                             [(-1, -1), (-1, 0), (0, -1), (0, 0)])
+            self.assertEqual(world[0, 0], trip + 1)
+
+        world = SparseWorld()
+        world.addPattern('blinker')
+        world.step()
+        world.step()
+        world.step()
+        world.reset()
+        world.step()
+        self.assertEqual(world.population, 0)
+
+    def testStepMatchesNumpyWorld(self):
+        for name in ['r-pentomino', 'pulsar', 'gosper-glider-gun']:
+            world = SparseWorld(width=200, height=200)
+            nworld = NumpyWorld(width=200, height=200)
+            world.addPattern(name, x=80, y=80)
+            nworld.addPattern(name, x=80, y=80)
+            for trip in range(60):
+                world.step()
+                nworld.step()
+            self.assertTrue(numpy.array_equal(world.cells, nworld.cells),
+                            name)
+
+    def testAdvanceMethod(self):
+        world = SparseWorld(width=40, height=40)
+        nworld = NumpyWorld(width=40, height=40)
+        world.addPattern('r-pentomino', x=20, y=20)
+        nworld.addPattern('r-pentomino', x=20, y=20)
+        world.advance(15)
+        nworld.advance(15)
+        self.assertEqual(world.generation, 15)
+        self.assertTrue(numpy.array_equal(world.cells, nworld.cells))
+
+    def testUnbounded(self):
+        world = SparseWorld()
+        hworld = HashLifeWorld()
+        world.addPattern('acorn')
+        hworld.addPattern('acorn')
+        for trip in range(600):
+            world.step()
+        hworld.advance(600)
+        self.assertEqual(sorted(world.alive), sorted(hworld.alive))
+        xs, ys = zip(*world.alive)
+        self.assertLess(min(xs), 0)
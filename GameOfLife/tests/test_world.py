@@ -1,14 +1,18 @@
 
+import io
+import pickle
 import unittest
 
-from GameOfLife import Cell, Patterns
+from GameOfLife import Cell, CompactCell, Patterns
 from GameOfLife.world import World, OptimizedWorld
-from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld
+from GameOfLife.world import NumpyWorld, OptimizedNumpyWorld, aliveMask
 import numpy
 
 
 class WorldTestCase(unittest.TestCase):
 
+    worldClass = World
+
     def assertIsWorld(self, obj):
         self.assertIsInstance(obj, World)
 
@@ -45,19 +49,78 @@ class WorldTestCase(unittest.TestCase):
         self.assertIsWorld(World(width=dim, height=dim))
         self.assertIsWorld(World(dim, dim, TestCell))
 
+    def testCompactCells(self):
+        worlds = []
+        for CellClass in (Cell, CompactCell):
+            world = self.worldClass(20, 20, CellClass, 'B36/S23')
+            world.addPattern('glider', x=2, y=2)
+            world.addPattern('blinker', x=12, y=12)
+            world.advance(9)
+            worlds.append(world)
+        self.assertFalse(hasattr(worlds[1][0], '__dict__'))
+        self.assertEqual(str(worlds[0]), str(worlds[1]))
+        self.assertEqual([c.age for c in worlds[0]],
+                         [c.age for c in worlds[1]])
+
     def testCellsProperty(self):
         w = World()
         self.assertIsInstance(w.cells, list)
         self.assertEqual(len(w.cells), w.width * w.height)
 
     def testFromFile(self):
-        pass
+        f = io.StringIO('x = 3, y = 2, rule = B3/S23\n3o$o!\n')
+        world = self.worldClass.fromFile(f, CompactCell)
+        self.assertEqual((world.width, world.height), (3, 2))
+        self.assertIs(world.cellClass, CompactCell)
+        self.assertEqual(world.population, 4)
 
     def testFromString(self):
-        pass
+        world = self.worldClass.fromString('  x \n x  ')
+        self.assertEqual((world.width, world.height), (4, 2))
+        self.assertIs(world.cellClass, Cell)
+        self.assertEqual(str(world), '  . \n .  ')
+        self.assertEqual(world[2, 0].index, 2)
+
+    def testResizeMethod(self):
+        world = self.worldClass(6, 5)
+        world.addPattern('glider', x=1, y=1)
+        world.advance(3)
+
+        for width, height in [(9, 4), (5, 7), (9, 4)]:
+            before = {c.location: (c.alive, c.age) for c in world}
+            kept = world[2, 2]
+            world.resize(width, height)
+            self.assertEqual((world.width, world.height), (width, height))
+            self.assertEqual(len(world.cells), width * height)
+            self.assertEqual(world.generation, 3)
+            self.assertIs(world[2, 2], kept)
+            for i, cell in enumerate(world):
+                x, y = cell.location
+                self.assertEqual(cell.index, i)
+                self.assertEqual(i, (y * width) + x)
+                self.assertEqual((cell.alive, cell.age),
+                                 before.get((x, y), (False, 0)))
+                self.assertEqual(sorted(n.location for n in cell.neighbors),
+                                 sorted(((X % width), (Y % height)) for X, Y
+                                        in cell.neighborLocations))
+
+        fresh = World(9, 4)
+        for cell in world:
+            fresh[cell.location].alive = cell.alive
+        world.advance(4)
+        fresh.advance(4)
+        self.assertEqual(str(world), str(fresh))
 
     def testWriteMethod(self):
-        pass
+        world = World(6, 4)
+        world.addPattern('glider', x=1, y=0)
+        expected = '\n'.join(''.join(str(world[x, y]) for x in range(6))
+                             for y in range(4))
+        self.assertEqual(str(world), expected)
+        self.assertEqual(list(world.iterRows()), expected.split('\n'))
+        f = io.StringIO()
+        self.assertEqual(world.write(f, 'life'), len(expected))
+        self.assertEqual(f.getvalue(), expected)
 
     def testReadMethod(self):
         pass
@@ -82,6 +145,13 @@ class WorldTestCase(unittest.TestCase):
         for cell in world:
             self.assertTrue(cell is world[cell.location])
 
+    def testCellIndex(self):
+        world = World(width=7, height=5)
+        for i, cell in enumerate(world):
+            x, y = cell.location
+            self.assertEqual(cell.index, (y * world.width) + x)
+            self.assertEqual(cell.index, i)
+
     def testResetMethod(self):
 
         world = World(width=10, height=10)
@@ -171,6 +241,19 @@ class WorldTestCase(unittest.TestCase):
 
 class OptimizedWorldTestCase(WorldTestCase):
 
+    worldClass = OptimizedWorld
+
+    def testAdvanceMethod(self):
+        world = OptimizedWorld(width=16, height=16)
+        sworld = World(width=16, height=16)
+        world.addPattern('glider')
+        sworld.addPattern('glider')
+        world.advance(12)
+        for trip in range(12):
+            sworld.step()
+        self.assertEqual(world.generation, 12)
+        self.assertEqual(str(world), str(sworld))
+
     def testAliveProperty(self):
         pass
 
@@ -183,6 +266,149 @@ class OptimizedWorldTestCase(WorldTestCase):
     def testStepMethod(self):
         pass
 
+    def assertCountsAreCurrent(self, world):
+        for cell in world:
+            self.assertEqual(cell.aliveNeighbors,
+                             sum(n.alive for n in cell.neighbors), cell)
+
+    def testNeighborCounts(self):
+        world = OptimizedWorld(width=24, height=20)
+        sworld = World(width=24, height=20)
+        for w in (world, sworld):
+            w.addPattern('acorn', x=8, y=8)
+        self.assertCountsAreCurrent(world)
+        for trip in range(30):
+            world.step()
+            sworld.step()
+        self.assertCountsAreCurrent(world)
+        self.assertEqual(str(world), str(sworld))
+
+        world.addPattern('xxx\nxxx', x=10, y=10)
+        world.addPatterns([('block', (0, 0), 'identity', 'xor')])
+        self.assertCountsAreCurrent(world)
+
+        world[3, 3].alive = not world[3, 3].alive
+        world.recount()
+        self.assertCountsAreCurrent(world)
+        self.assertEqual(world.population,
+                         len([c for c in world if c.alive]))
+
+
+    def testFrontierMode(self):
+        world = OptimizedWorld(width=40, height=30)
+        reference = OptimizedWorld(width=40, height=30)
+        world.frontier = True
+        for w in (world, reference):
+            w.addPattern('block', x=2, y=2)
+            w.addPattern('blinker', x=30, y=5)
+            w.addPattern('r-pentomino', x=15, y=15)
+
+        def ages(w):
+            w.syncAges()
+            return sorted((c.location, c.age) for c in w.alive)
+
+        for trip in range(40):
+            world.step()
+            reference.step()
+            if trip == 20:
+                for w in (world, reference):
+                    w.addPattern('glider', x=30, y=20)
+            self.assertEqual(ages(world), ages(reference), trip)
+        self.assertCountsAreCurrent(world)
+
+        # a still life leaves an empty frontier
+        world = OptimizedWorld(width=16, height=16)
+        world.frontier = True
+        world.addPattern('block', x=4, y=4)
+        world.step()
+        world.step()
+        self.assertEqual(len(world._frontier), 0)
+        world.advance(10)
+        world.syncAges()
+        self.assertEqual([c.age for c in world.alive], [12] * 4)
+
+    def testFrontierResize(self):
+        world = OptimizedWorld(width=10, height=10)
+        reference = OptimizedWorld(width=10, height=10)
+        world.frontier = True
+        for w in (world, reference):
+            w.addPattern('block', x=3, y=3)
+            w.addPattern('blinker', x=6, y=7)
+            w.advance(3)
+
+        held = set(world.alive)
+        for w in (world, reference):
+            w.resize(12, 10)
+        self.assertEqual(held, world.alive)
+
+        def ages(w):
+            w.syncAges()
+            return sorted((c.location, c.age) for c in w.alive)
+
+        for trip in range(6):
+            self.assertEqual(ages(world), ages(reference), trip)
+            world.step()
+            reference.step()
+        self.assertCountsAreCurrent(world)
+
+    def testSetCellsDirectly(self):
+        for CellClass in (Cell, CompactCell):
+            for frontier in (False, True):
+                args = (CellClass, frontier)
+                world = OptimizedWorld(20, 16, CellClass)
+                world.frontier = frontier
+                sworld = World(20, 16, CellClass)
+                for w in (world, sworld):
+                    w.addPattern('block', x=2, y=2)
+                    w.step()
+                    w.step()
+                    for x, y in ((8, 8), (9, 8), (10, 8), (10, 7), (9, 6)):
+                        w[x, y].alive = True
+                    # set twice, and set back
+                    w[4, 12].alive = True
+                    w[4, 12].alive = True
+                    w[15, 3].alive = True
+                    w[15, 3].alive = False
+                    # a settled cell dies
+                    w[2, 2].alive = False
+                for trip in range(12):
+                    world.step()
+                    sworld.step()
+                    self.assertEqual(str(world), str(sworld), args + (trip,))
+                    if trip == 5:
+                        for w in (world, sworld):
+                            w[1, 14].alive = True
+                            w[2, 14].alive = True
+                            w[3, 14].alive = True
+                self.assertCountsAreCurrent(world)
+                self.assertEqual(world.population, sworld.population)
+                self.assertIs(world.cellClass, CellClass)
+                self.assertIs(type(world[0, 0]), CellClass)
+
+    def testPickle(self):
+        for CellClass in (Cell, CompactCell):
+            world = OptimizedWorld(12, 12, CellClass)
+            sworld = World(12, 12, CellClass)
+            for w in (world, sworld):
+                w.addPattern('glider', x=2, y=2)
+                w.step()
+            copy = pickle.loads(pickle.dumps(world))
+            self.assertEqual(str(copy), str(world))
+            self.assertIs(type(copy[0, 0]), CellClass)
+            self.assertEqual(str(pickle.loads(pickle.dumps(world[3, 3]))),
+                             str(world[3, 3]))
+            # the copy owns its cells
+            for w in (copy, sworld):
+                w[8, 8].alive = True
+                w[9, 8].alive = True
+                w[10, 8].alive = True
+            for trip in range(8):
+                copy.step()
+                sworld.step()
+            self.assertEqual(str(copy), str(sworld))
+            self.assertCountsAreCurrent(copy)
+            self.assertEqual(world.population, 5)
+
 
 class NumpyWorldTestCase(unittest.TestCase):
 
@@ -200,6 +426,174 @@ class NumpyWorldTestCase(unittest.TestCase):
         if height is not None:
             self.assertEqual(obj.height, height)
 
+    def worldClass(self):
+        return NumpyWorld
+
+    def testResizeMethod(self):
+        from GameOfLife.bitworld import BitWorld
+        from GameOfLife.sparse import SparseWorld
+        from GameOfLife.hashlife import HashLifeWorld
+        from GameOfLife.arrayworld import ArrayWorld
+
+        reference = World(9, 4)
+        reference.addPattern('blinker', x=1, y=1)
+        reference.addPattern('block', x=6, y=1)
+        reference.advance(3)
+        expected = [c.alive for c in reference][:27]
+
+        engines = [ArrayWorld, NumpyWorld, OptimizedNumpyWorld, BitWorld,
+                   SparseWorld, HashLifeWorld]
+        for engine in engines:
+            world = engine(9, 4)
+            world.addPattern('blinker', x=1, y=1)
+            world.addPattern('block', x=6, y=1)
+            world.advance(3)
+            world.resize(12, 3)
+            self.assertEqual((world.width, world.height), (12, 3))
+            self.assertEqual(world.generation, 3)
+            mask = numpy.zeros((3, 12), dtype=bool)
+            mask[:, :9] = numpy.reshape(expected, (3, 9))
+            self.assertTrue(numpy.array_equal(aliveMask(world), mask),
+                            engine.__name__)
+            world.step()
+
+    def testStepMethod(self):
+        world = self.worldClass()(width=10, height=10)
+
+        # block still life, ages increase every generation
+        world.addPattern('block', x=4, y=4)
+
+        for trip in range(1, 5):
+            world.step()
+            self.assertEqual(world.generation, trip)
+            self.assertEqual(len(world.alive), 4)
+            for x, y in world.alive:
+                self.assertEqual(world[x, y], trip + 1)
+
+        # blinker oscillates with period two
+        world = self.worldClass()(width=10, height=10)
+        world.addPattern('blinker', x=3, y=3)
+        start = sorted(world.alive)
+        world.step()
+        self.assertNotEqual(sorted(world.alive), start)
+        world.step()
+        self.assertEqual(sorted(world.alive), start)
+
+    def testStepWrapsEdges(self):
+        world = self.worldClass()(width=8, height=8)
+        world.addPattern('blinker', x=-1, y=-1)
+        world.step()
+        world.step()
+        world.addPattern('blinker', x=-1, y=-1)
+        self.assertEqual(len(world.alive), 3)
+
+    def testStepMatchesCalculateStateFor(self):
+        rs = numpy.random.RandomState(1)
+        world = self.worldClass()(width=17, height=13)
+        world.cells[...] = rs.randint(0, 2, world.cells.shape)
+
+        for trip in range(5):
+            world.state.fill(0)
+            for y in range(world.height):
+                for x in range(world.width):
+                    world.calculateStateFor(x, y)
+            expected = world.state.copy()
+            world.step()
+            self.assertTrue(numpy.array_equal(world.cells, expected))
+
+    def testAdvanceMatchesStep(self):
+        rs = numpy.random.RandomState(5)
+        for width, height, rulestring in [(17, 13, None), (40, 1, None),
+                                          (30, 20, 'B36/S23')]:
+            world = self.worldClass()(width, height, rulestring)
+            sworld = self.worldClass()(width, height, rulestring)
+            world.cells[...] = rs.randint(0, 2, world.cells.shape)
+            sworld.cells[...] = world.cells
+            world.advance(25)
+            for trip in range(25):
+                sworld.step()
+            self.assertEqual(world.generation, 25)
+            self.assertTrue(numpy.array_equal(world.cells, sworld.cells))
+        world.advance(0)
+        self.assertEqual(world.generation, 25)
+        with self.assertRaises(ValueError):
+            world.advance(-1)
+
+    def testRender(self):
+        world = self.worldClass()(width=7, height=5)
+        world.addPattern('glider', x=3, y=1)
+        world.cells[1, 4] = 9
+        rows = [''.join('.' if world.cells[y, x] else ' ' for x in range(7))
+                for y in range(5)]
+        self.assertEqual(str(world), '\n'.join(rows))
+        self.assertEqual(list(world.iterRows()), rows)
+
+        for markers in (['\u00b7', '\u2588'], ['  ', '[]'], [' ', 'ab']):
+            world.markers = markers
+            rows = [''.join(markers[int(world.cells[y, x] > 0)]
+                            for x in range(7)) for y in range(5)]
+            self.assertEqual(str(world), '\n'.join(rows))
+            self.assertEqual(list(world.iterRows()), rows)
+
+    def testStepMatchesWorld(self):
+        for name in ['glider', 'r-pentomino', 'pulsar', 'acorn']:
+            world = World(width=32, height=24)
+            nworld = self.worldClass()(width=32, height=24)
+            world.addPattern(name, x=5, y=5)
+            nworld.addPattern(name, x=5, y=5)
+            for trip in range(20):
+                world.step()
+                nworld.step()
+            alive = sorted(c.location for c in world if c.alive)
+            self.assertEqual(sorted(nworld.alive), alive, name)
+
 
 class OptimizedNumpyWorldTestCase(NumpyWorldTestCase):
-    pass
+
+    def worldClass(self):
+        return OptimizedNumpyWorld
+
+    def testDirtyTilesMatchNumpyWorld(self):
+        world = NumpyWorld(width=50, height=40)
+        tworld = OptimizedNumpyWorld(width=50, height=40, tileSize=4)
+        for name, x, y in [('r-pentomino', 10, 10), ('pulsar', 30, 5),
+                           ('glider', 44, 33), ('block', 5, 30)]:
+            world.addPattern(name, x=x, y=y)
+            tworld.addPattern(name, x=x, y=y)
+        for trip in range(80):
+            world.step()
+            tworld.step()
+            self.assertTrue(numpy.array_equal(world.cells, tworld.cells),
+                            trip)
+        self.assertFalse(tworld.active.all())
+
+    def testQuietTilesAreSkipped(self):
+        world = OptimizedNumpyWorld(width=64, height=64, tileSize=8)
+        world.addPattern('block', x=20, y=20)
+        world.step()
+        self.assertFalse(world.changed.any())
+        self.assertFalse(world.active.any())
+        self.assertEqual(list(world.candidates), [])
+        world.step()
+        self.assertEqual(world[20, 20], 3)
+        self.assertEqual(sorted(world.alive),
+                         [(20, 20), (20, 21), (21, 20), (21, 21)])
+
+        world[40, 40] = 1
+        self.assertTrue(world.changed[5, 5])
+        world.step()
+        self.assertEqual(world[40, 40], 0)
+
+    def testMarkDirty(self):
+        world = OptimizedNumpyWorld(width=32, height=32, tileSize=8)
+        world.step()
+        self.assertFalse(world.active.any())
+        world.cells[10:13, 10] = 1
+        world.markDirty(10, 11)
+        world.step()
+        self.assertEqual(sorted(world.alive), [(9, 11), (10, 11), (11, 11)])
+        world.cells.fill(0)
+        world.markDirty()
+        self.assertTrue(world.active.all())
+        world.step()
+        self.assertEqual(world.alive, [])
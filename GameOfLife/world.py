@@ -1,9 +1,363 @@
 
-from . import Cell
-from .patterns import Patterns as BuiltinPatterns
+import array
+import contextlib
+import gc
+import hashlib
+import itertools
+
+from . import Cell, CompactCell
+from . import formats
+from . import snapshot
+from .patterns import Patterns as BuiltinPatterns, Pattern
+from .patterns.compiled import CompiledPattern, placements, textCells
+from .neighbors import neighborTable
+from .rules import Rule, LIFE
+from .cycles import CycleDetector, ON_CYCLE
 
 import numpy as np
 
+# Conway's rule as a lookup table, see lookupTable
+_LIFE = np.array(LIFE.table, dtype=np.uint8)
+
+_ruleClasses = {}
+
+
+def ruleClassFor(CellClass, rule):
+    '''
+    :param: CellClass - subclass of Cell
+    :param: rule      - Rule
+    :return: CellClass or a subclass of it that plays by rule
+
+    The subclasses are created once per Cell class and rule and shared.
+    '''
+    if CellClass.rule == rule:
+        return CellClass
+    try:
+        return _ruleClasses[CellClass, rule]
+    except KeyError:
+        pass
+    attributes = {'rule': rule}
+    if '__slots__' in vars(CellClass):
+        # keep the instances of slotted Cell classes compact
+        attributes['__slots__'] = ()
+    klass = type(CellClass.__name__, (CellClass,), attributes)
+    _ruleClasses[CellClass, rule] = klass
+    return klass
+
+
+def lookupTable(rule):
+    '''
+    :param: rule - Rule
+    :return: uint8 array with shape (2, 9), the rule's lookup table
+    '''
+    if rule == LIFE:
+        return _LIFE
+    return np.array(rule.table, dtype=np.uint8)
+
+
+def _countNeighbors(alive):
+    '''
+    :param: alive - array of zeros and ones
+    :return: array of live neighbor counts with the same shape as alive
+
+    The last two axes of alive are the rows and columns of a board
+    whose edges wrap. Counts are computed with whole-array shifts
+    rather than visiting each cell.
+    '''
+    rows = alive + np.roll(alive, 1, axis=-2) + np.roll(alive, -1, axis=-2)
+    return rows + np.roll(rows, 1, axis=-1) + np.roll(rows, -1, axis=-1) - alive
+
+
+def _nextAges(ages, counts, lookup):
+    '''
+    :param: ages   - array of cell ages, zero for dead cells
+    :param: counts - array of live neighbor counts
+    :param: lookup - rule lookup table, see lookupTable
+    :return: array of the ages of the cells in the next generation
+
+    Surviving cells age by one, newborn cells are one and all other
+    cells are zero.
+    '''
+    nextAlive = lookup[(ages > 0).view(np.uint8), counts]
+    return (ages + 1) * nextAlive
+
+
+def stepRegion(src, dst, rows, cols, lookup=_LIFE):
+    '''
+    :param: src  - two dimensional array of cell ages of a board
+                   whose edges wrap
+    :param: dst  - array with the same shape as src
+    :param: rows - slice of rows to compute, without a step
+    :param: cols - slice of columns to compute, without a step
+    :param: lookup - optional rule lookup table, see lookupTable
+    :return: None
+
+    Writes the next generation of the rectangle rows x cols of src
+    into the same rectangle of dst. Only the rectangle and its one
+    cell halo are read from src, so disjoint rectangles can be
+    computed independently.
+    '''
+    h, w = src.shape
+    ys = np.arange(rows.start - 1, rows.stop + 1) % h
+    xs = np.arange(cols.start - 1, cols.stop + 1) % w
+
+    block = src[np.ix_(ys, xs)]
+    alive = (block > 0).view(np.uint8)
+
+    counts = (alive[:-2, :-2] + alive[:-2, 1:-1] + alive[:-2, 2:] +
+              alive[1:-1, :-2] + alive[1:-1, 2:] +
+              alive[2:, :-2] + alive[2:, 1:-1] + alive[2:, 2:])
+
+    dst[rows, cols] = _nextAges(block[1:-1, 1:-1], counts, lookup)
+
+
+def rowRuns(alive):
+    '''
+    :param: alive - two dimensional array, nonzero for live cells
+    :return: generator of runs (x, y, length) of live cells sorted by
+             row and then column
+
+    The runs are found with one pass over the rows rather than by
+    visiting each cell.
+    '''
+    h, w = alive.shape
+    edges = np.zeros((h, w + 2), dtype=np.int8)
+    edges[:, 1:-1] = alive != 0
+    steps = np.diff(edges, axis=1)
+    ys, starts = np.nonzero(steps == 1)
+    stops = np.nonzero(steps == -1)[1]
+    return zip(starts.tolist(), ys.tolist(), (stops - starts).tolist())
+
+
+def pointRuns(xs, ys):
+    '''
+    :param: xs - array of integer x coordinates of live cells
+    :param: ys - array of integer y coordinates of live cells
+    :return: generator of runs (x, y, length) sorted by row and then
+             column
+    '''
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    order = np.lexsort((xs, ys))
+    xs, ys = xs[order], ys[order]
+    breaks = (np.diff(ys) != 0) | (np.diff(xs) != 1)
+    starts = np.concatenate([[0], np.nonzero(breaks)[0] + 1])
+    lengths = np.diff(np.concatenate([starts, [len(xs)]]))
+    if not len(xs):
+        starts = lengths = starts[:0]
+    return zip(xs[starts].tolist(), ys[starts].tolist(), lengths.tolist())
+
+
+def stampRegion(shape, pattern, x=0, y=0):
+    '''
+    :param: shape   - tuple (height, width) of a board whose edges wrap
+    :param: pattern - CompiledPattern
+    :param: x       - optional integer
+    :param: y       - optional integer
+    :return: index of the cells of the board covered by the pattern's
+             bounding box placed at x,y
+
+    The index is a pair of slices unless the box crosses an edge of
+    the board.
+    '''
+    return boxRegion(shape, x + pattern.x, y + pattern.y,
+                     pattern.width, pattern.height)
+
+
+def boxRegion(shape, x, y, width, height):
+    '''
+    :param: shape  - tuple (height, width) of a board whose edges wrap
+    :param: x      - integer
+    :param: y      - integer
+    :param: width  - integer
+    :param: height - integer
+    :return: index of the cells of the board covered by the box whose
+             top left corner is at x,y
+
+    The index is a pair of slices unless the box crosses an edge of
+    the board.
+    '''
+    h, w = shape
+    X = x % w
+    Y = y % h
+    if X + width <= w and Y + height <= h:
+        return (slice(Y, Y + height), slice(X, X + width))
+    return np.ix_(np.arange(Y, Y + height) % h, np.arange(X, X + width) % w)
+
+
+def placePatterns(cells, placements):
+    '''
+    :param: cells      - two dimensional array of a board whose edges
+                         wrap, or boards stacked along leading axes
+    :param: placements - patterns.compiled.Placements
+    :return: None
+
+    Applies the placements to the board with one scatter per kind of
+    change. Cells that were alive and are born again keep their age.
+    '''
+    h, w = cells.shape[-2:]
+    xs, ys = placements.cleared
+    cells[..., ys % h, xs % w] = 0
+
+    xs, ys = placements.born
+    ys, xs = ys % h, xs % w
+    cells[..., ys, xs] = np.maximum(cells[..., ys, xs], 1)
+
+    xs, ys = placements.toggled
+    if len(xs):
+        index, counts = np.unique((ys % h) * w + xs % w, return_counts=True)
+        ys, xs = np.divmod(index[counts % 2 == 1], w)
+        cells[..., ys, xs] = cells[..., ys, xs] == 0
+
+
+def placeRuns(cells, runs, x=0, y=0):
+    '''
+    :param: cells - two dimensional array of a board whose edges wrap,
+                    or boards stacked along leading axes
+    :param: runs  - iterable of runs (x, y, length)
+    :param: x     - optional integer
+    :param: y     - optional integer
+    :return: None
+
+    Sets the cells covered by the runs, offset by x,y, to one. Runs
+    that do not cross an edge are written as a single slice.
+    '''
+    h, w = cells.shape[-2:]
+    for rx, ry, n in runs:
+        X = x + rx
+        Y = (y + ry) % h
+        if 0 <= X and X + n <= w:
+            cells[..., Y, X:X + n] = 1
+        else:
+            cells[..., Y, np.arange(X, X + n) % w] = 1
+
+
+def coverBox(header, width, height):
+    '''
+    :param: header - formats.Header, the bounding box of the live cells
+                     of an unbounded world
+    :param: width  - integer, viewport width
+    :param: height - integer, viewport height
+    :return: formats.Header of the smallest box holding both the
+             viewport and the bounding box
+    '''
+    if not header.width:
+        return formats.Header(width, height, rule=header.rule)
+    x = min(0, header.x)
+    y = min(0, header.y)
+    return formats.Header(max(width, header.x + header.width) - x,
+                          max(height, header.y + header.height) - y,
+                          x, y, header.rule)
+
+
+def aliveMask(world):
+    '''
+    :param: world - any engine
+    :return: boolean array with shape (height, width), True for the
+             live cells of the board, or of the viewport of unbounded
+             worlds
+    '''
+    cells = world.cells
+    if isinstance(cells, np.ndarray):
+        return cells > 0
+    mask = np.zeros((world.height, world.width), dtype=np.uint8)
+    placeRuns(mask, world.runs())
+    return mask > 0
+
+
+def _markerTable(markers, eol=''):
+    '''
+    :param: markers - sequence whose first two items are the strings
+                      shown for dead and live cells
+    :param: eol     - optional string
+    :return: tuple (table, end, codec) of the markers' code points as
+             an array with shape (2, length), eol's code points and the
+             codec that turns them back into a string, or None if the
+             markers differ in length
+    '''
+    dead, live = markers[0], markers[1]
+    if len(dead) != len(live):
+        return None
+    text = dead + live + eol
+    if all(ord(c) < 256 for c in text):
+        dtype, codec = np.uint8, 'latin-1'
+    else:
+        dtype, codec = np.dtype('<u4'), 'utf-32-le'
+    codes = np.frombuffer(text.encode(codec), dtype=dtype)
+    n = len(dead)
+    return codes[:2 * n].reshape(2, n), codes[2 * n:], codec
+
+
+def renderRows(alive, markers, rows=256):
+    '''
+    :param: alive   - two dimensional array, nonzero for live cells
+    :param: markers - sequence whose first two items are the strings
+                      shown for dead and live cells
+    :param: rows    - optional integer, rows rendered at a time
+    :return: generator of the rows of the board as strings
+
+    Each block of rows is mapped through the marker table into one
+    buffer and decoded once, so only a block is ever held as text.
+    '''
+    h, w = alive.shape
+    table = _markerTable(markers)
+    if table is None:
+        for row in alive:
+            yield ''.join(markers[int(v != 0)] for v in row)
+        return
+
+    table, end, codec = table
+    n = w * table.shape[1]
+    for top in range(0, h, rows):
+        block = (alive[top:top + rows] != 0).view(np.uint8)
+        text = table[block].tobytes().decode(codec)
+        for i in range(block.shape[0]):
+            yield text[i * n:(i + 1) * n]
+
+
+def render(alive, markers, eol='\n'):
+    '''
+    :param: alive   - two dimensional array, nonzero for live cells
+    :param: markers - sequence whose first two items are the strings
+                      shown for dead and live cells
+    :param: eol     - optional string that separates the rows
+    :return: string of the board
+
+    The board and the line ends are written into one buffer through
+    the marker table and decoded in a single pass.
+    '''
+    table = _markerTable(markers, eol)
+    if table is None:
+        return eol.join(renderRows(alive, markers))
+
+    table, end, codec = table
+    h, w = alive.shape
+    n = w * table.shape[1]
+    buf = np.empty((h, n + len(end)), dtype=table.dtype)
+    buf[:, :n] = table[(alive != 0).view(np.uint8)].reshape(h, n)
+    buf[:, n:] = end
+    text = buf.tobytes().decode(codec)
+    return text[:len(text) - len(eol)]
+
+
+@contextlib.contextmanager
+def pausedCollector():
+    '''
+    Pauses the cyclic garbage collector for the duration of the block.
+
+    Building a world allocates millions of cells and neighbor lists
+    that all live on; with the collector running every few hundred
+    allocations set off a collection that visits the objects made so
+    far, which costs more than making them.
+    '''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
 
 class World(object):
     '''
@@ -24,33 +378,79 @@ class World(object):
     @classmethod
     def fromString(cls, worldString, CellClass=None, rule=None, eol='\n'):
         '''
-        XXX missing doc string
+        :param: worldString - string, see addPattern
+        :param: CellClass   - optional subclass of Cell, for the worlds
+                              that take one
+        :param: rule - optional function with signature 'f(x) returns boolean'
+        :param: eol  - optional character that marks the end of a line in
+                       the string
+        :return: a world of this class the size of the string
+
+        The world starts out empty and is built once, at the size of
+        the pattern.
         '''
-        w = cls(CellClass, 0, 0,)
-        w.addPattern(worldString, 0, 0, rule=rule, eol=eol, resize=True)
+        w = cls._empty(CellClass)
+        w.addPattern(worldString, rule=rule, eol=eol, resize=True)
         return w
 
     @classmethod
     def fromFile(cls, fileobj, CellClass=None, rule=None, eol='\n'):
         '''
-        XXX missing doc string
+        :param: fileobj   - file-like object or path
+        :param: CellClass - optional subclass of Cell, for the worlds
+                            that take one
+        :param: rule - optional function with signature 'f(x) returns boolean'
+        :param: eol  - optional character that marks the end of a line in
+                       plaintext
+        :return: a world of this class the size of the pattern in the file
+
+        See read.
         '''
-        w = cls(CellClass, 0, 0)
+        w = cls._empty(CellClass)
         w.read(fileobj, rule=rule, eol=eol)
         return w
 
-    def __init__(self, width=80, height=23, CellClass=None):
+    @classmethod
+    def _empty(cls, CellClass=None):
+        '''
+        :param: CellClass - optional subclass of Cell
+        :return: a world of this class without cells
+        '''
+        if CellClass is None:
+            return cls(0, 0)
+        return cls(0, 0, CellClass)
+
+    @classmethod
+    def open(cls, fileobj, mode='c'):
+        '''
+        :param: fileobj - binary file-like object or path of a snapshot
+        :param: mode    - optional string, memory map mode, see
+                          snapshot.Snapshot
+        :return: a world of this class restored from the snapshot
+
+        See save and restore.
+        '''
+        w = cls()
+        w.restore(snapshot.Snapshot(fileobj, mode))
+        return w
+
+    def __init__(self, width=80, height=23, CellClass=None, rulestring=None):
         '''
         :param: width - integer
         :param: height - integer
         :param: CellClass - subclass of Cell
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
 
         Creates a world populated with cells created with
         the CellClass.  The world is a rectangular grid
         whose dimensions are specified by width and height.
 
+        Cells play by the rule of the CellClass unless a
+        rulestring is given, in which case the cells are
+        created from a subclass of CellClass with that rule.
+
         Will raise a TypeError if the supplied CellClass is
-        not a subclass of Cell.
+        not a subclass of Cell or CompactCell.
 
         '''
         self.generation = 0
@@ -60,13 +460,29 @@ class World(object):
         if CellClass is None:
             CellClass = Cell
 
-        if not issubclass(CellClass, Cell):
-            msg = 'expecting subclass of Cell, got {klass}'
+        if not issubclass(CellClass, (Cell, CompactCell)):
+            msg = 'expecting subclass of Cell or CompactCell, got {klass}'
             raise TypeError(msg.format(klass=CellClass))
 
+        if rulestring is not None:
+            CellClass = ruleClassFor(CellClass, Rule.compile(rulestring))
+
         self.cellClass = CellClass
         self.reset()
 
+    @property
+    def rule(self):
+        '''
+        The Rule the world's cells play by.
+        '''
+        return self.cellClass.rule
+
+    @rule.setter
+    def rule(self, newValue):
+        self.cellClass = ruleClassFor(self.cellClass, Rule.compile(newValue))
+        for c in self.cells:
+            c.__class__ = self.cellClass
+
     @property
     def cells(self):
         '''
@@ -83,14 +499,31 @@ class World(object):
 
     def __str__(self):
         '''
+        The board with one marker per cell, see render.
         '''
-        s = []
-        for y in range(self.height):
-            r = ''
-            for x in range(self.width):
-                r += str(self[x, y])
-            s.append(r)
-        return '\n'.join(s)
+        return render(*self._canvas())
+
+    def iterRows(self):
+        '''
+        :return: generator of the rows of the board as strings
+
+        Rows are rendered a block at a time, see renderRows, so the
+        board is never held as one string.
+        '''
+        return renderRows(*self._canvas())
+
+    def _canvas(self):
+        '''
+        :return: tuple of an array with shape (height, width), nonzero
+                 for live cells, and the markers for dead and live cells
+
+        The cells of a world share their markers.
+        '''
+        try:
+            markers = self.cells[0].markers
+        except IndexError:
+            markers = ' .'
+        return aliveMask(self), markers
 
     def __repr__(self):
         '''
@@ -103,34 +536,218 @@ class World(object):
 
         return ''.join(s).format(self=self)
 
-    def write(self, fileobj):
+    def write(self, fileobj, format=None):
         '''
         :param: fileobj - File-like object or string
+        :param: format - optional string, one of 'life', 'rle' or 'mc'
         :return: number of bytes written
 
-        XXX missing doc string
+        Writes the world as plaintext, run length encoded or Macrocell.
+        The format defaults to the one named by the file's extension
+        and to plaintext otherwise. Plaintext is streamed a row at a
+        time, see iterRows. RLE and Macrocell files record the
+        world's rule and are written from its runs of live cells, see
+        runs.
         '''
-        try:
-            nbytes = fileobj.write(str(self))
+        if not hasattr(fileobj, 'write'):
+            with open(fileobj, 'w') as f:
+                return self.write(f, format)
+
+        format = formats.formatFor(fileobj, format)
+
+        if format == 'life':
+            nbytes = 0
+            for y, row in enumerate(self.iterRows()):
+                nbytes += fileobj.write('\n' + row if y else row)
             return nbytes
-        except AttributeError:
-            pass
 
-        f = open(fileobj, 'w')
-        nbytes = f.write(str(self))
-        return nbytes
+        if format == 'mc':
+            return self._writeMacrocell(fileobj)
 
-    def read(self, fileobj, rule=None, eol='\n'):
+        header = self.header
+        runs = ((x - header.x, y - header.y, n) for x, y, n in self.runs())
+        return formats.writeRLE(fileobj, header, runs)
+
+    def _writeMacrocell(self, fileobj):
         '''
-        XXX missing doc string
+        :param: fileobj - file-like object
+        :return: number of bytes written
         '''
-        try:
-            pattern = fileobj.read()
-        except AttributeError:
-            f = open(fileobj, 'r')
-            pattern = f.read()
+        header = self.header
+        runs = ((x - header.x, y - header.y, n) for x, y, n in self.runs())
+        return formats.writeMacrocell(fileobj, header, runs)
+
+    def read(self, fileobj, rule=None, eol='\n', format=None):
+        '''
+        :param: fileobj - File-like object or string
+        :param: rule - optional function with signature 'f(x) returns boolean'
+                       used to decode plaintext
+        :param: eol - optional character that marks the end of a line in
+                      plaintext
+        :param: format - optional string, one of 'life', 'rle' or 'mc'
 
-        self.addPattern(pattern, resize=True)
+        Replaces the world with the pattern in the file, see load. The
+        format defaults to the one named by the file's extension, then
+        to the one its first line suggests and finally to plaintext.
+        RLE and Macrocell files are decoded line by line.
+        '''
+        if not hasattr(fileobj, 'read'):
+            with open(fileobj, 'r') as f:
+                return self.read(f, rule=rule, eol=eol, format=format)
+
+        lines = iter(fileobj)
+        firstLine = next(lines, '')
+        format = formats.formatFor(fileobj, format, firstLine)
+        lines = itertools.chain([firstLine], lines)
+
+        if format == 'life':
+            self.addPattern(''.join(lines), rule=rule, eol=eol, resize=True)
+            return
+
+        self.load(*formats.read(lines, format))
+
+    def load(self, header, runs):
+        '''
+        :param: header - formats.Header
+        :param: runs   - iterable of runs (x, y, length) relative to the
+                         top left corner of the pattern
+
+        Resizes the world to the pattern, adopts the pattern's rule if
+        it names one and places the runs at (0,0).
+        '''
+        if header.rule:
+            self.rule = header.rule
+        self.width = header.width
+        self.height = header.height
+        self.reset()
+        self.addRuns(runs)
+
+    def save(self, fileobj, encoding='bits'):
+        '''
+        :param: fileobj  - binary file-like object or path
+        :param: encoding - optional string, one of snapshot.ENCODINGS
+        :return: number of bytes written
+
+        Writes a binary snapshot of the board, its generation and its
+        rule. Unlike write, the board is stored as one array that
+        open maps back into memory without decoding it.
+        '''
+        box = self._snapshotBox()
+        return snapshot.write(fileobj, self._snapshotPayload(encoding),
+                              encoding, box.width, box.height,
+                              self.generation, str(self.rule), box.x, box.y)
+
+    def _snapshotBox(self):
+        '''
+        :return: formats.Header, the size and position of the board
+                 written by save
+        '''
+        return formats.Header(self.width, self.height)
+
+    def _snapshotPayload(self, encoding):
+        '''
+        :param: encoding - string, one of snapshot.ENCODINGS
+        :return: array holding the board in the encoding
+        '''
+        return snapshot.encode(aliveMask(self), encoding)
+
+    def restore(self, snap):
+        '''
+        :param: snap - snapshot.Snapshot
+
+        Replaces the world with the board of the snapshot, adopting its
+        size, rule and generation.
+        '''
+        self.load(snap.header, rowRuns(snap.alive))
+        self.generation = snap.generation
+
+    @property
+    def header(self):
+        '''
+        A formats.Header describing the world: its size, the position
+        of its top left corner and its rule.
+        '''
+        return formats.Header(self.width, self.height, rule=str(self.rule))
+
+    def runs(self):
+        '''
+        :return: iterable of runs (x, y, length) of horizontally adjacent
+                 live cells, sorted by row and then column
+        '''
+        for y in range(self.height):
+            x = 0
+            for alive, group in itertools.groupby(
+                    self[X, y].alive for X in range(self.width)):
+                n = len(list(group))
+                if alive:
+                    yield (x, y, n)
+                x += n
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: set of visited cells
+
+        Brings the cells covered by the runs, offset by x,y, to life.
+        Cells outside the runs are left as they are.
+        '''
+        visited = set()
+        for rx, ry, n in runs:
+            for X in range(x + rx, x + rx + n):
+                cell = self[X, y + ry]
+                cell.alive = True
+                visited.add(cell)
+        return visited
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of tuples (pattern, (x, y)),
+                        (pattern, (x, y), transform) or
+                        (pattern, (x, y), transform, mode)
+        :return: set of visited cells
+
+        Places many patterns at once. Patterns are compiled once, see
+        patterns.compiled.compilePattern, transform is one of
+        patterns.compiled.TRANSFORMS and mode is 'or', 'overwrite' or
+        'xor', defaulting to 'identity' and 'or'. See
+        patterns.compiled.placements for how overlapping placements
+        combine.
+        '''
+        p = placements(items, (self.width, self.height))
+        visited = set()
+        for (xs, ys), alive in ((p.cleared, False), (p.born, True)):
+            for X, Y in zip(xs.tolist(), ys.tolist()):
+                cell = self[X, Y]
+                cell.alive = alive
+                visited.add(cell)
+        xs, ys = p.toggled
+        for X, Y in zip(xs.tolist(), ys.tolist()):
+            cell = self[X, Y]
+            cell.alive = not cell.alive
+            visited.add(cell)
+        return visited
+
+    def _stamp(self, pattern, x, y):
+        '''
+        :param: pattern - CompiledPattern
+        :param: x - integer
+        :param: y - integer
+        :return: set of visited cells
+
+        Sets the cells of the pattern's bounding box, placed at x,y,
+        alive or dead.
+        '''
+        visited = set()
+        x += pattern.x
+        y += pattern.y
+        for Y, row in enumerate(pattern.cells.tolist()):
+            for X, alive in enumerate(row):
+                cell = self[x + X, y + Y]
+                cell.alive = alive
+                visited.add(cell)
+        return visited
 
     def _warp(self, key):
         '''
@@ -164,21 +781,95 @@ class World(object):
 
         return self.cells[key]
 
+    def __iter__(self):
+        '''
+        Iterates over the cells row by row, straight from the list of
+        cells rather than through __getitem__.
+        '''
+        return iter(self.cells)
+
     def reset(self):
         '''
         Resets the simulation to base state:
         - sets generation to zero
         - deletes all cells and allocates a new set cells
+        - numbers each cell with its index, y * width + x
+        - wires each cell to its neighbors using the shared
+          neighbor table for the world's shape
         '''
         self.generation = 0
-        self.cells.clear()
-        for y in range(self.height):
-            for x in range(self.width):
-                self.cells.append(self.cellClass(x, y))
+        with pausedCollector():
+            self.cells[:] = self._newCells(range(self.width),
+                                           range(self.height))
+            self._wire()
 
-        for cell in self:
-            cell.neighbors.extend([self[loc]
-                                   for loc in cell.neighborLocations])
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        Changes the size of the world. Cells where the old and the new
+        board overlap are kept with their state and age, and the world
+        keeps its generation; the cells of the new rows and columns are
+        created dead. Every cell is numbered again, but only the new
+        cells and the kept cells on the edges of the overlap, whose
+        neighbors wrap differently, are wired again.
+        '''
+        width, height = int(width), int(height)
+        cells = self.cells
+        keptRows = min(self.height, height)
+        keptCols = min(self.width, width)
+        rows = []
+        with pausedCollector():
+            for y in range(keptRows):
+                start = y * self.width
+                rows.append(cells[start:start + keptCols])
+                rows.append(self._newCells(range(keptCols, width), [y]))
+            rows.append(self._newCells(range(width),
+                                       range(self.height, height)))
+            self.width, self.height = width, height
+            cells[:] = itertools.chain.from_iterable(rows)
+
+            stale = np.ones((height, width), dtype=bool)
+            stale[1:keptRows - 1, 1:keptCols - 1] = False
+            self._wire(np.flatnonzero(stale))
+
+    def _newCells(self, xs, ys):
+        '''
+        :param: xs - sequence of x coordinates
+        :param: ys - sequence of y coordinates
+        :return: list of new cells, one for each x of each y, row by row
+        '''
+        xs = list(xs)
+        return [self.cellClass(x, y) for y in ys for x in xs]
+
+    def _wire(self, stale=None):
+        '''
+        :param: stale - optional array of the indices of the cells to
+                        wire, all cells by default
+        :return: list of the indices of each cell's neighbors when all
+                 cells are wired, otherwise None
+
+        Numbers each cell with its index and wires the stale cells to
+        their neighbors from the neighbor table for the world's shape.
+        '''
+        cells = self.cells
+        for i, cell in enumerate(cells):
+            cell.index = i
+
+        table = neighborTable(self.width, self.height)
+        if stale is None:
+            links = table.tolist()
+            wired = zip(cells, links)
+        else:
+            links = None
+            wired = zip(map(cells.__getitem__, stale.tolist()),
+                        table[stale].tolist())
+
+        for cell, indices in wired:
+            cell.neighbors = map(cells.__getitem__, indices)
+        return links
 
     def step(self):
         '''
@@ -200,9 +891,105 @@ class World(object):
         for c in self:
             c.act()
 
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations.
+        Engines replace this with their fastest way of taking many
+        steps at once.
+        '''
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        step = self.step
+        for _ in range(generations):
+            step()
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return sum(1 for c in self if c.alive)
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        Worlds with the same cells alive have the same fingerprint,
+        ages are not taken into account. See CycleDetector.
+        '''
+        return hashlib.blake2b(bytes([c.alive for c in self]),
+                               digest_size=16).digest()
+
+    def _skipCycles(self, generations, period):
+        '''
+        :param: generations - integer, a multiple of period
+        :param: period      - integer, period of the world's cycle
+
+        Moves a world that repeats every period generations forward
+        without stepping. Cells whose age is at least period have not
+        changed state during the last cycle and never will, so they
+        age by generations; the ages of all other cells repeat.
+        '''
+        for c in self:
+            if c.age >= period:
+                c.age += generations
+        self.generation += generations
+
+    def run(self, generations, onCycle='stop', history=64):
+        '''
+        :param: generations - integer, number of generations to advance
+        :param: onCycle     - optional string, what to do once the world
+                              dies out or repeats: 'stop' stepping,
+                              'jump' ahead to the last generation or
+                              'continue' stepping
+        :param: history     - optional integer, the longest period found
+        :return: Cycle or None
+
+        Advances the simulation up to generations generations while
+        watching for a repeating board with a CycleDetector. Returns
+        the Cycle found, or None if the world never repeated.
+        '''
+        if onCycle not in ON_CYCLE:
+            msg = 'unknown onCycle {!r}, expecting one of {}'
+            raise ValueError(msg.format(onCycle, ON_CYCLE))
+
+        # an empty board is not final if it gives birth to cells
+        canDie = 0 not in self.rule.born
+
+        def observe():
+            population = self.population if canDie else None
+            return detector.observe(self.generation, self.fingerprint(),
+                                    population)
+
+        target = self.generation + int(generations)
+        detector = CycleDetector(history)
+
+        cycle = observe()
+        while cycle is None and self.generation < target:
+            self.step()
+            cycle = observe()
+
+        if cycle is None or onCycle == 'stop':
+            return cycle
+
+        if onCycle == 'jump':
+            remaining = target - self.generation
+            self._skipCycles(remaining - remaining % cycle.period,
+                             cycle.period)
+
+        while self.generation < target:
+            self.step()
+
+        return cycle
+
     def addPattern(self, pattern, x=0, y=0, rule=None, eol='\n', resize=False):
         '''
-        :param: pattern - string
+        :param: pattern - string, Pattern or CompiledPattern
         :param: x - optional integer
         :param: y - optional integer
         :param: rule - optional function with signature 'f(x) returns boolean'
@@ -221,6 +1008,10 @@ class World(object):
         The rule parameter can be used to specify the rule for determining
         how to interpret each item in the string in terms of alive or dead.
 
+        RLE and Macrocell patterns are placed from their runs and only
+        bring cells to life, see addRuns. Compiled patterns set every
+        cell of their bounding box, without parsing, see
+        patterns.compiled.
         '''
 
         try:
@@ -228,19 +1019,33 @@ class World(object):
         except KeyError:
             pass
 
-        if rule is None:
-            rule = lambda c: not c.isspace()
+        if isinstance(pattern, Pattern):
+            header, runs = pattern.read()
+            if resize:
+                self.width, self.height = header.width, header.height
+                self.reset()
+            return self.addRuns(runs, x, y)
+
+        if isinstance(pattern, CompiledPattern):
+            if resize:
+                self.width = pattern.x + pattern.width
+                self.height = pattern.y + pattern.height
+                self.reset()
+            return self._stamp(pattern, x, y)
+
+        cells, present = textCells(pattern, rule, eol)
 
         if resize:
-            self.height = len(pattern.split(eol))
-            self.width = max([len(l) for l in pattern.split(eol)])
+            self.height, self.width = cells.shape
             self.reset()
 
         visited = set()
-        for Y, line in enumerate(pattern.split(eol)):
-            for X, c in enumerate(line):
-                self[x + X, y + Y].alive = int(rule(c))
-                visited.add(self[x + X, y + Y])
+        ys, xs = np.nonzero(present)
+        for X, Y, alive in zip(xs.tolist(), ys.tolist(),
+                               cells[present].tolist()):
+            cell = self[x + X, y + Y]
+            cell.alive = bool(alive)
+            visited.add(cell)
         return visited
 
 
@@ -260,16 +1065,81 @@ class OptimizedWorld(World):
 
     This world has an optimized step method that only updates live
     cells and their neighbors rather than all cells, live or dead.
+
+    Each cell's count of live neighbors is kept from one generation
+    to the next: when a cell is born or dies the world adds one to or
+    subtracts one from the counts of its eight neighbors, so cells do
+    not sum their neighbors every step. The world owns its cells and
+    they report being set alive or dead to it, see Cell.alive, so
+    cells may be set through the world or directly:
+
+    >>> w[3, 4].alive = True
+    >>> w.step()
+
+    Code that changes a cell's state without going through its alive
+    attribute must call recount before the next step.
+
+    Setting frontier to True makes step evaluate only the cells that
+    were born or died in the last generation and their neighbors;
+    every other cell has the same state and neighbor count as when it
+    was last evaluated, so it cannot change. Settled regions then cost
+    nothing. Settled live cells catch up on their ages when they are
+    next evaluated or when syncAges is called; dead cells outside the
+    frontier do not age.
+
+    >>> w = OptimizedWorld(400, 400)
+    >>> w.frontier = True
     '''
 
+    # evaluate only the cells around last generation's changes
+    frontier = False
+
     @property
     def alive(self):
+        '''
+        The set of live cells. Cells set alive or dead directly are
+        accounted for first, see _flush.
+        '''
         try:
-            return self._alive
+            alive = self._alive
         except AttributeError:
-            pass
-        self._alive = set()
-        return self._alive
+            alive = self._alive = set()
+        if self._touched:
+            self._flush()
+        return alive
+
+    # cells set alive or dead since the world last looked, see _flush
+    _touched = ()
+
+    def _changed(self, cell):
+        '''
+        :param: cell - Cell of this world about to be set alive or dead
+        :return: None
+
+        Called by the world's cells, see Cell.alive.
+        '''
+        self._touched.append(cell)
+
+    def _newCells(self, xs, ys):
+        '''
+        See World._newCells, the world owns the new cells.
+        '''
+        cells = super(OptimizedWorld, self)._newCells(xs, ys)
+        for cell in cells:
+            cell._owner = self
+        return cells
+
+    def _flush(self):
+        '''
+        :return: None
+
+        Updates the set of live cells and the neighbor counts for the
+        cells set alive or dead since the world last looked.
+        '''
+        # a cell set more than once is listed once
+        touched = list(dict.fromkeys(self._touched))
+        del self._touched[:]
+        self._track(touched)
 
     def reset(self):
         '''
@@ -277,10 +1147,119 @@ class OptimizedWorld(World):
         - sets generation to zero
         - deletes all cells and allocates a new set cells
         - creates an empty list of live cells
+        - keeps the neighbor table as lists of cell indices
         '''
-        super(OptimizedWorld, self).reset()
-        self.alive.clear()
-        self.alive.update(set([c for c in self if c.alive]))
+        self._touched = []
+        with pausedCollector():
+            super(OptimizedWorld, self).reset()
+            self.recount()
+
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        See World.resize, the set of live cells and the neighbor counts
+        are rebuilt for the new board. The ages that frontier stepping
+        left behind are brought up to date first and the frontier, held
+        as cell indices, is rebuilt from the live cells.
+        '''
+        self.syncAges()
+        with pausedCollector():
+            super(OptimizedWorld, self).resize(width, height)
+            self.recount()
+
+    def _wire(self, stale=None):
+        '''
+        See World._wire, the neighbor indices are kept for step.
+        '''
+        links = super(OptimizedWorld, self)._wire(stale)
+        if links is None:
+            links = neighborTable(self.width, self.height).tolist()
+        self._links = links
+        return links
+
+    def recount(self):
+        '''
+        :return: None
+
+        Rebuilds the set of live cells and every cell's count of live
+        neighbors from the cells' alive attributes.
+        '''
+        self.syncAges()
+        self._settled.clear()
+        self._frontier = None
+        del self._touched[:]
+        alive = self.alive
+        alive.clear()
+        alive.update([c for c in self if c.alive])
+        for cell in self:
+            cell.aliveNeighbors = 0
+        self._push(alive, 1)
+
+    def syncAges(self):
+        '''
+        :return: None
+
+        Brings the ages of the live cells that frontier stepping left
+        alone up to the current generation.
+        '''
+        try:
+            settled = self._settled
+        except AttributeError:
+            settled = self._settled = {}
+        for cell, generation in settled.items():
+            cell.age += self.generation - generation
+            settled[cell] = self.generation
+
+    def _push(self, cells, delta):
+        '''
+        :param: cells - iterable of cells that were born or died
+        :param: delta - integer, 1 for births and -1 for deaths
+        :return: None
+
+        Adds delta to the live neighbor count of each neighbor of the
+        cells.
+        '''
+        for cell in cells:
+            for neighbor in cell.neighbors:
+                neighbor.aliveNeighbors += delta
+
+    def _neighborhood(self, cells):
+        '''
+        :param: cells - iterable of cells
+        :return: set of the indices of the cells and their neighbors
+
+        The neighborhood is gathered as small integers from the
+        neighbor table rather than by hashing the neighbor cells.
+        '''
+        links = self._links
+        indices = {c.index for c in cells}
+        for i in list(indices):
+            indices.update(links[i])
+        return indices
+
+    def _track(self, visited):
+        '''
+        :param: visited - iterable of cells that may have changed
+        :return: None
+
+        Updates the set of live cells and the neighbor counts for the
+        visited cells that were born or died.
+        '''
+        alive = self.alive
+        born = [c for c in visited if c.alive and c not in alive]
+        died = [c for c in visited if not c.alive and c in alive]
+        alive.update(born)
+        alive.difference_update(died)
+        self._push(born, 1)
+        self._push(died, -1)
+
+        for cell in born + died:
+            self._settled.pop(cell, None)
+        if self._frontier is not None:
+            self._frontier.update(self._neighborhood(born + died))
 
     def addPattern(self, pattern, **kwds):
         '''
@@ -299,12 +1278,12 @@ class OptimizedWorld(World):
 
         The first character in the string corresponds to coordinate (0,0).
 
-        Updates the set of live cells.
+        Updates the set of live cells and the neighbor counts.
         '''
 
-        visited = super(OptimizedWorld, self).addPattern(pattern, **kwds)
+        super(OptimizedWorld, self).addPattern(pattern, **kwds)
 
-        self.alive.update(set([c for c in visited if c.alive]))
+        self._flush()
 
     def step(self):
         '''
@@ -316,53 +1295,209 @@ class OptimizedWorld(World):
         their immediate neighbors which results in significant gains
         in preformance compared to the super class' step method.
 
-        Set operations are used to ensure that alive and neighbor
-        cells are only visited once during each phase; neighbor
-        count and state update.
+        Cells act on the neighbor counts kept from the last
+        generation, see _push; the births and deaths are collected
+        first and pushed to their neighbors once every cell has acted.
+        Cells set alive or dead directly since the last step are
+        accounted for first.
         '''
-        self.generation += 1
+        live = self.alive
 
-        borders = set()
+        if 0 in self.rule.born:
+            # every cell can come alive, tracking is no help
+            self.syncAges()
+            super(OptimizedWorld, self).step()
+            self.recount()
+            return self.alive
 
-        for c in self.alive:
-            borders.update(c.neighbors)
+        if self.frontier:
+            return self._stepFrontier()
 
-        self.alive.update(borders)
+        if self._settled:
+            self.syncAges()
+            self._settled.clear()
+        self._frontier = None
 
-        for cell in self.alive:
-            cell.think()
+        self.generation += 1
 
-        deaders = set()
-        for cell in self.alive:
+        cells = self.cells
+        born = []
+        died = []
+        for i in self._neighborhood(live):
+            cell = cells[i]
+            alive = cell.alive
             cell.act()
-            if not cell.alive:
-                deaders.add(cell)
+            if cell.alive != alive:
+                if alive:
+                    died.append(cell)
+                else:
+                    born.append(cell)
+        # the changes reported while acting are the ones collected
+        del self._touched[:]
+
+        live.update(born)
+        live.difference_update(died)
+        self._push(born, 1)
+        self._push(died, -1)
+        return live
+
+    def _stepFrontier(self):
+        '''
+        :return: set of cells currently alive
+
+        Advances the simulation one generation evaluating only the
+        frontier: the cells born or died in the last generation and
+        their neighbors, or every live cell and its neighbors after
+        the world was reset or recounted. Live cells that leave the
+        frontier are recorded with the generation of their age, see
+        syncAges.
+        '''
+        live = self.alive
+        frontier = self._frontier
+        if frontier is None:
+            frontier = self._neighborhood(live)
+
+        cells = self.cells
+        settled = self._settled
+        last = self.generation
+        self.generation += 1
+
+        born = []
+        died = []
+        for i in frontier:
+            cell = cells[i]
+            alive = cell.alive
+            if alive:
+                seen = settled.pop(cell, None)
+                if seen is not None:
+                    cell.age += last - seen
+            cell.act()
+            if cell.alive != alive:
+                if alive:
+                    died.append(cell)
+                else:
+                    born.append(cell)
+        del self._touched[:]
+
+        live.update(born)
+        live.difference_update(died)
+        self._push(born, 1)
+        self._push(died, -1)
+
+        self._frontier = self._neighborhood(born + died)
+
+        for i in frontier - self._frontier:
+            if cells[i].alive:
+                settled[cells[i]] = self.generation
 
-        return self.alive.difference_update(deaders)
+        return live
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles, ages left behind by frontier stepping
+        are brought up to date first.
+        '''
+        self.syncAges()
+        super(OptimizedWorld, self)._skipCycles(generations, period)
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: set of visited cells
+
+        See World.addRuns, updates the set of live cells and the
+        neighbor counts.
+        '''
+        visited = super(OptimizedWorld, self).addRuns(runs, x, y)
+        self._flush()
+        return visited
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :return: set of visited cells
+
+        See World.addPatterns, the set of live cells and the neighbor
+        counts are updated once after all patterns are placed.
+        '''
+        visited = super(OptimizedWorld, self).addPatterns(items)
+        self._flush()
+        return visited
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return len(self.alive)
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        Only the set of live cells is visited, see World.fingerprint.
+        '''
+        indices = sorted((y * self.width) + x
+                         for x, y in (c.location for c in self.alive))
+        return hashlib.blake2b(array.array('q', indices).tobytes(),
+                               digest_size=16).digest()
 
 
 class NumpyWorld(World):
     '''
     '''
 
-    def __init__(self, width=80, height=23):
+    def __init__(self, width=80, height=23, rulestring=None):
         '''
+        :param: width      - integer
+        :param: height     - integer
+        :param: rulestring - optional Rule or rulestring like 'B36/S23',
+                             defaults to Conway's rule
         '''
         self.generation = 0
         self.width = int(width)
         self.height = int(height)
         self.markers = [' ', '.']
+        self.rule = rulestring
 
-    def __str__(self):
+    @property
+    def rule(self):
         '''
+        The Rule of the world. Setting it accepts a Rule, a rulestring
+        or None for Conway's rule and compiles the lookup table.
         '''
-        s = []
-        for y in range(self.height):
-            r = ''
-            for x in range(self.width):
-                r += self.markers[self.cells[y, x] > 0]
-            s.append(r)
-        return '\n'.join(s)
+        return self._rule
+
+    @rule.setter
+    def rule(self, newValue):
+        self._rule = Rule.compile(newValue)
+        self.lookup = lookupTable(self._rule)
+
+    def _lookupFor(self, born, live):
+        '''
+        :param: born - list of neighbor counts that give birth or None
+        :param: live - list of neighbor counts that sustain life or None
+        :return: lookup table of the world's rule with born and live
+                 replaced by the given counts
+        '''
+        if born is None and live is None:
+            return self.lookup
+
+        if born is None:
+            born = self.rule.born
+
+        if live is None:
+            live = self.rule.survive
+
+        return lookupTable(Rule(born, live))
+
+    def _canvas(self):
+        '''
+        See World._canvas, the cells array is rendered as it is.
+        '''
+        return self.cells, self.markers
 
     def __repr__(self):
         '''
@@ -381,7 +1516,7 @@ class NumpyWorld(World):
             return self._cells
         except AttributeError:
             pass
-        self._cells = np.zeros((self.height, self.width), dtype=np.int)
+        self._cells = np.zeros((self.height, self.width), dtype=np.int64)
         return self._cells
 
     @property
@@ -393,7 +1528,7 @@ class NumpyWorld(World):
             return self._state
         except AttributeError:
             pass
-        self._state = np.zeros((self.height, self.width), dtype=np.int)
+        self._state = np.zeros_like(self.cells)
         return self._state
 
     @property
@@ -409,7 +1544,7 @@ class NumpyWorld(World):
         '''
         x, y = key
         h, w = self.cells.shape
-        return (x % (w - 1), y % (h - 1))
+        return (x % w, y % h)
 
     def __getitem__(self, key):
         '''
@@ -444,45 +1579,175 @@ class NumpyWorld(World):
 
         return x, y, v
 
-    def read(self, fileobj):
+    def runs(self):
         '''
+        :return: iterable of runs (x, y, length) of horizontally adjacent
+                 live cells, sorted by row and then column
         '''
-        pass
+        return rowRuns(self.cells)
 
-    def write(self, fileobj):
+    def _snapshotPayload(self, encoding):
         '''
+        See World._snapshotPayload, the cells keep their ages.
         '''
-        pass
+        return snapshot.encode(self.cells, encoding)
+
+    def restore(self, snap):
+        '''
+        :param: snap - snapshot.Snapshot
+
+        See World.restore. The memory map of an 'int64' snapshot
+        becomes the world's cells without being copied, so stepping a
+        world restored from a snapshot opened with mode 'r+' updates
+        the file. Other encodings are decoded into a new board.
+        '''
+        if snap.rule:
+            self.rule = snap.rule
+        self.width = snap.width
+        self.height = snap.height
+        if snap.encoding == 'int64':
+            self._cells = snap.data
+            try:
+                del self._state
+            except AttributeError:
+                pass
+        else:
+            self.reset()
+            self.cells[...] = snap.ages
+        self.generation = snap.generation
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        :param: runs - iterable of runs (x, y, length)
+        :param: x - optional integer
+        :param: y - optional integer
+        :return: None
+
+        Brings the cells covered by the runs, offset by x,y, to life by
+        writing each run into the board as a slice.
+        '''
+        placeRuns(self.cells, runs, x, y)
+
+    def addPatterns(self, items):
+        '''
+        :param: items - iterable of placements, see World.addPatterns
+        :return: None
+
+        Places many patterns at once with a few array scatters, see
+        placePatterns.
+        '''
+        placePatterns(self.cells,
+                      placements(items, (self.width, self.height)))
+
+    def _stamp(self, pattern, x, y):
+        '''
+        :param: pattern - CompiledPattern
+        :param: x - integer
+        :param: y - integer
+        :return: index of the cells written, see stampRegion
+
+        Writes the pattern's bounding box, placed at x,y, into the board
+        with one assignment.
+        '''
+        region = stampRegion(self.cells.shape, pattern, x, y)
+        self.cells[region] = pattern.cells
+        return region
 
     def addPattern(self, pattern, x=0, y=0, rule=None, eol='\n', resize=False):
         '''
+        See World.addPattern.
+
+        :return: index of the cells written for a string, see _place,
+                 None for a Pattern or CompiledPattern
+
+        A string is converted to an array once, see textCells, and
+        written into the board with array assignments.
         '''
         try:
             pattern = BuiltinPatterns[pattern]
         except KeyError:
             pass
 
-        if rule is None:
-            rule = lambda c: not c.isspace()
+        if isinstance(pattern, Pattern):
+            header, runs = pattern.read()
+            if resize:
+                self.width, self.height = header.width, header.height
+                self.reset()
+            self.addRuns(runs, x, y)
+            return None
+
+        if isinstance(pattern, CompiledPattern):
+            if resize:
+                self.width = pattern.x + pattern.width
+                self.height = pattern.y + pattern.height
+                self.reset()
+            self._stamp(pattern, x, y)
+            return None
+
+        cells, present = textCells(pattern, rule, eol)
 
         if resize:
-            self.height = len(pattern.split(eol))
-            self.width = max([len(l) for l in pattern.split(eol)])
+            self.height, self.width = cells.shape
             self.reset()
 
-        visited = set()
-        for Y, line in enumerate(pattern.split(eol)):
-            for X, c in enumerate(line):
-                self[x + X, y + Y] = int(rule(c))
-                visited.add((x + X, y + Y))
-        return visited
+        return self._place(cells, present, x, y)
+
+    def _place(self, cells, present, x, y):
+        '''
+        :param: cells   - array of zeros and ones, see textCells
+        :param: present - boolean array, True for the cells to write
+        :param: x - integer
+        :param: y - integer
+        :return: index of the cells written
+
+        Writes the cells into the board at x,y. A rectangle is written
+        with one assignment and its index is the one of stampRegion;
+        otherwise the present cells are scattered and the index is a
+        tuple of arrays (ys, xs) of their positions.
+        '''
+        h, w = self.cells.shape
+        if present.all():
+            region = boxRegion((h, w), x, y, cells.shape[1], cells.shape[0])
+            self.cells[region] = cells
+            return region
+        ys, xs = np.nonzero(present)
+        index = ((ys + y) % h, (xs + x) % w)
+        self.cells[index] = cells[present]
+        return index
 
     def reset(self):
         '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - kills all cells, reallocating the board if the world was
+          resized
         '''
         self.generation = 0
+        if self.cells.shape != (self.height, self.width):
+            del self._cells
+            try:
+                del self._state
+            except AttributeError:
+                pass
         self.cells.fill(0)
 
+    def resize(self, width, height):
+        '''
+        :param: width  - integer
+        :param: height - integer
+        :return: None
+
+        See World.resize, the overlap of the old and the new board is
+        written into the new board with one assignment.
+        '''
+        width, height = int(width), int(height)
+        kept = np.array(self.cells[:height, :width])
+        generation = self.generation
+        self.width, self.height = width, height
+        self.reset()
+        self.generation = generation
+        self._place(kept, np.ones(kept.shape, dtype=bool), 0, 0)
+
     def neighbors(self, x, y):
         '''
         '''
@@ -499,48 +1764,44 @@ class NumpyWorld(World):
     def calculateStateFor(self, x, y, born=None, live=None):
         '''
         '''
-        if born is None:
-            born = [3]
-
-        if live is None:
-            live = [2, 3]
+        lookup = self._lookupFor(born, live)
 
-        # build a 3x3 array of neighbor values for cell at x,y
+        # gather the eight neighbor values for cell at x,y
 
-        neighbors = np.array([self[key] for key in self.neighbors(x, y)]) > 0
-        neighbors.shape = (3, 3)
-        neighbors[1, 1] = 0      # target cell doesn't contribute to state
+        x, y = self._warp((x, y))
+        table = neighborTable(self.width, self.height)
+        neighbors = self.cells.ravel()[table[(y * self.width) + x]] > 0
 
         # sum the state of the neighbors
         v = neighbors.sum()
 
-        state = 0               # start off assuming dead
+        # newborn cells are one, survivors age and the dead are zero
+        self.state[y, x] = (self[x, y] + 1) * lookup[int(self[x, y] > 0), v]
 
-        if (self[x, y] == 0) and (v in born):
-            state = 1
-
-        if (self[x, y] > 0) and (v in live):
-            state = self[x, y] + 1
+    def updateState(self, born=None, live=None):
+        '''
+        :param: born - optional list of neighbor counts that give birth
+        :param: live - optional list of neighbor counts that sustain life
+        :return: None
 
-        self.state[y, x] = state
+        Computes the next generation of every cell into the state
+        buffer using whole-array operations. Surviving cells have
+        their age incremented, newborn cells have an age of one and
+        dead cells are zero.
 
-    def updateState(self):
-        '''
+        The world's rule is used unless born or live are given.
         '''
+        lookup = self._lookupFor(born, live)
+
+        counts = _countNeighbors((self.cells > 0).view(np.uint8))
 
-        self.state.fill(0)
-        for x, y in self.candidates:
-            self.calculateStateFor(x, y)
+        self.state[...] = _nextAges(self.cells, counts, lookup)
 
     def updateCells(self):
         '''
+        Copies the state buffer into the cells.
         '''
-
-        alive = self.state.nonzero()
-
-        self.cells.fill(0)
-
-        self.cells[alive] = self.state[alive]
+        np.copyto(self.cells, self.state)
 
     @property
     def candidates(self):
@@ -554,11 +1815,87 @@ class NumpyWorld(World):
 
     def step(self):
         '''
+        :return: None
+
+        Advances the simulation one generation. The whole board is
+        updated with a handful of array passes; see updateState.
         '''
         self.updateState()
         self.updateCells()
         self.generation += 1
 
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations in
+        one loop. The buffers are allocated once and every array
+        operation writes in place: the live cells are copied into a
+        board padded with the wrapped edges, neighbors are counted
+        with two sums of three slices and the next state is looked up
+        in the rule table.
+        '''
+        generations = int(generations)
+        if generations < 0:
+            raise ValueError('generations must not be negative')
+
+        cells = self.cells
+        h, w = cells.shape
+        padded = np.empty((h + 2, w + 2), dtype=np.uint8)
+        alive = padded[1:-1, 1:-1]
+        columns = np.empty((h, w + 2), dtype=np.uint8)
+        index = np.empty((h, w), dtype=np.uint8)
+        nextAlive = np.empty((h, w), dtype=np.uint8)
+        table = self.lookup.ravel()
+
+        for _ in range(generations):
+            np.greater(cells, 0, out=alive)
+            padded[0, 1:-1] = alive[-1]
+            padded[-1, 1:-1] = alive[0]
+            padded[:, 0] = padded[:, -2]
+            padded[:, -1] = padded[:, 1]
+
+            np.add(padded[:-2], padded[1:-1], out=columns)
+            np.add(columns, padded[2:], out=columns)
+            np.add(columns[:, :-2], columns[:, 1:-1], out=index)
+            np.add(index, columns[:, 2:], out=index)
+            np.subtract(index, alive, out=index)
+
+            # index the flattened (state, count) table
+            np.multiply(alive, 9, out=nextAlive)
+            np.add(index, nextAlive, out=index)
+            np.take(table, index, out=nextAlive)
+
+            np.add(cells, 1, out=cells)
+            np.multiply(cells, nextAlive, out=cells)
+
+        self.generation += generations
+
+    @property
+    def population(self):
+        '''
+        Number of live cells.
+        '''
+        return int(np.count_nonzero(self.cells))
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        The board is packed to one bit per cell and hashed.
+        '''
+        return hashlib.blake2b(np.packbits(self.cells > 0).tobytes(),
+                               digest_size=16).digest()
+
+    def _skipCycles(self, generations, period):
+        '''
+        See World._skipCycles.
+        '''
+        cells = self.cells
+        cells[cells >= period] += generations
+        self.generation += generations
+
     def _go(self, steps=-1):
         try:
             while self.generation != steps:
@@ -569,11 +1906,282 @@ class NumpyWorld(World):
 
 
 class OptimizedNumpyWorld(NumpyWorld):
+    '''
+    A NumpyWorld that only recomputes the tiles of the board that
+    can change.
+
+    >>> w = OptimizedNumpyWorld(4096, 4096)
+    >>> w.addPattern('diehard', x=2000, y=2000)
+    >>> w.step()
+
+    The board is divided into square tiles of tileSize cells and a
+    bitmap, changed, records the tiles whose live cells changed in
+    the last generation. A tile can only change if it or one of its
+    eight neighboring tiles changed, so each step recomputes just
+    those tiles with stepRegion and ages the live cells of the other
+    occupied tiles. Once a board settles into still lifes the cost
+    of a step is close to zero; when most tiles are active the whole
+    board is stepped at once instead.
+
+    Setting cells through the world marks their tiles changed. Code
+    that writes to the cells array directly must call markDirty.
+    '''
+
+    # fraction of active tiles above which the whole board is stepped
+    FULL_STEP_RATIO = 0.5
+
+    def __init__(self, width=80, height=23, rulestring=None, tileSize=32):
+        '''
+        :param: width      - integer
+        :param: height     - integer
+        :param: rulestring - optional Rule or rulestring like 'B36/S23'
+        :param: tileSize   - optional integer, width and height of a tile
+        '''
+        self.tileSize = int(tileSize)
+        super(OptimizedNumpyWorld, self).__init__(width, height, rulestring)
+
+    @NumpyWorld.rule.setter
+    def rule(self, newValue):
+        NumpyWorld.rule.fset(self, newValue)
+        self.markDirty()
+
+    @property
+    def tiles(self):
+        '''
+        Tuple (rows, columns), the number of tiles covering the board.
+        '''
+        h, w = self.cells.shape
+        size = self.tileSize
+        return (-(-h // size), -(-w // size))
+
+    @property
+    def changed(self):
+        '''
+        Boolean array with one entry per tile, True for the tiles whose
+        cells changed in the last generation or were set since.
+        '''
+        try:
+            if self._changed.shape == self.tiles:
+                return self._changed
+        except AttributeError:
+            pass
+        self._changed = np.ones(self.tiles, dtype=bool)
+        self._occupied = np.ones(self.tiles, dtype=bool)
+        self._stale = np.ones(self.tiles, dtype=bool)
+        self._tileHashes = np.zeros(self.tiles, dtype=np.uint64)
+        return self._changed
+
+    @property
+    def occupied(self):
+        '''
+        Boolean array with one entry per tile, True for the tiles that
+        may hold live cells.
+        '''
+        self.changed
+        return self._occupied
+
+    @property
+    def active(self):
+        '''
+        Boolean array with one entry per tile, True for the tiles that
+        need to be recomputed in the next step: the changed tiles and
+        their neighbors.
+        '''
+        changed = self.changed
+        rows = changed | np.roll(changed, 1, 0) | np.roll(changed, -1, 0)
+        return rows | np.roll(rows, 1, 1) | np.roll(rows, -1, 1)
 
     @property
     def candidates(self):
-        n = set()
-        for x, y in self.alive:
-            for key in self.neighbors(x, y):
-                n.add(self._warp(key))
-        return n
+        '''
+        Generator method that returns the x,y coordinates of the cells
+        in the active tiles.
+        '''
+        for rows, cols in self._tileSlices(self.active):
+            for y in range(rows.start, rows.stop):
+                for x in range(cols.start, cols.stop):
+                    yield (x, y)
+
+    def markDirty(self, x=None, y=None):
+        '''
+        :param: x - optional integer or array of integers
+        :param: y - optional integer or array of integers
+
+        Marks the tile holding the cell at x,y changed, or every tile
+        if no cell is given. Arrays of coordinates mark the tiles of
+        all their cells.
+        '''
+        changed = self.changed
+
+        if x is None or y is None:
+            changed[...] = True
+            self._occupied[...] = True
+            self._stale[...] = True
+            return
+
+        x, y = self._warp((x, y))
+        tile = (y // self.tileSize, x // self.tileSize)
+        changed[tile] = True
+        self._occupied[tile] = True
+        self._stale[tile] = True
+
+    def __setitem__(self, key, value):
+        '''
+        '''
+        super(OptimizedNumpyWorld, self).__setitem__(key, value)
+        self.markDirty(*key)
+
+    def addRuns(self, runs, x=0, y=0):
+        '''
+        See NumpyWorld.addRuns, marks every tile changed.
+        '''
+        super(OptimizedNumpyWorld, self).addRuns(runs, x, y)
+        self.markDirty()
+
+    def restore(self, snap):
+        '''
+        See NumpyWorld.restore, marks every tile changed.
+        '''
+        super(OptimizedNumpyWorld, self).restore(snap)
+        self.markDirty()
+
+    def addPatterns(self, items):
+        '''
+        See NumpyWorld.addPatterns, marks the tiles that were touched
+        changed.
+        '''
+        p = placements(items, (self.width, self.height))
+        placePatterns(self.cells, p)
+        self.markDirty(*p.touched)
+
+    def _stamp(self, pattern, x, y):
+        '''
+        See NumpyWorld._stamp, marks the tiles under the pattern changed.
+        '''
+        region = super(OptimizedNumpyWorld, self)._stamp(pattern, x, y)
+        x += pattern.x
+        y += pattern.y
+        size = self.tileSize
+        ys = list(range(y, y + pattern.height, size)) + [y + pattern.height - 1]
+        xs = list(range(x, x + pattern.width, size)) + [x + pattern.width - 1]
+        for Y in ys:
+            for X in xs:
+                self.markDirty(X, Y)
+        return region
+
+    def _place(self, cells, present, x, y):
+        '''
+        See NumpyWorld._place, marks the tiles of the cells written
+        changed.
+        '''
+        index = super(OptimizedNumpyWorld, self)._place(cells, present, x, y)
+        ys, xs = np.nonzero(present)
+        self.markDirty(xs + x, ys + y)
+        return index
+
+    def reset(self):
+        '''
+        Resets the simulation to base state:
+        - sets generation to zero
+        - kills all cells
+        - marks every tile changed
+        '''
+        super(OptimizedNumpyWorld, self).reset()
+        self.markDirty()
+
+    def _tileSlices(self, tiles):
+        '''
+        :param: tiles - boolean array with one entry per tile
+        :return: list of (rows, cols) slice tuples of the selected tiles
+        '''
+        h, w = self.cells.shape
+        size = self.tileSize
+        return [(slice(ty * size, min((ty + 1) * size, h)),
+                 slice(tx * size, min((tx + 1) * size, w)))
+                for ty, tx in zip(*np.nonzero(tiles))]
+
+    def _tileAny(self, mask):
+        '''
+        :param: mask - boolean array with the shape of the board
+        :return: boolean array with one entry per tile, True for the
+                 tiles where mask is set
+        '''
+        rows, cols = self.tiles
+        size = self.tileSize
+        padded = np.zeros((rows * size, cols * size), dtype=bool)
+        padded[:mask.shape[0], :mask.shape[1]] = mask
+        return padded.reshape(rows, size, cols, size).any(axis=(1, 3))
+
+    def step(self):
+        '''
+        :return: None
+
+        Advances the simulation one generation, recomputing only the
+        active tiles.
+        '''
+        active = self.active
+        cells = self.cells
+
+        if active.mean() > self.FULL_STEP_RATIO:
+            self.updateState()
+            alive = self.state > 0
+            self._changed = self._tileAny(alive != (cells > 0))
+            self._occupied = self._tileAny(alive)
+            self._stale |= self._changed
+            self.updateCells()
+            self.generation += 1
+            return
+
+        state = self.state
+        changed = np.zeros_like(active)
+        occupied = self._occupied
+
+        regions = self._tileSlices(active)
+        for rows, cols in regions:
+            stepRegion(cells, state, rows, cols, self.lookup)
+
+        # survivors in quiet tiles only get older
+        for rows, cols in self._tileSlices(occupied & ~active):
+            tile = cells[rows, cols]
+            tile += tile > 0
+
+        size = self.tileSize
+        for rows, cols in regions:
+            tile = (rows.start // size, cols.start // size)
+            nextAlive = state[rows, cols] > 0
+            changed[tile] = np.any(nextAlive != (cells[rows, cols] > 0))
+            occupied[tile] = np.any(nextAlive)
+            cells[rows, cols] = state[rows, cols]
+
+        self._changed = changed
+        self._stale |= changed
+        self.generation += 1
+
+    def advance(self, generations):
+        '''
+        :param: generations - integer
+        :return: None
+
+        Advances the simulation the given number of generations one
+        step at a time, so only the active tiles are recomputed.
+        '''
+        World.advance(self, generations)
+
+    def fingerprint(self):
+        '''
+        :return: bytes that identify the live cells of the world
+
+        Each tile keeps a hash of its live cells that is only updated
+        after the tile changes, so the cost follows the active tiles
+        rather than the size of the board.
+        '''
+        self.changed
+        hashes = self._tileHashes
+        for rows, cols in self._tileSlices(self._stale):
+            tile = (rows.start // self.tileSize, cols.start // self.tileSize)
+            digest = hashlib.blake2b(
+                np.packbits(self.cells[rows, cols] > 0).tobytes(),
+                digest_size=8).digest()
+            hashes[tile] = int.from_bytes(digest, 'little')
+        self._stale[...] = False
+        return hashlib.blake2b(hashes.tobytes(), digest_size=16).digest()